@@ -1,17 +1,234 @@
 import os
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from werkzeug.test import EnvironBuilder
 
 # Import the agent library (keeps AI logic separate from webserver)
-from trip_planner.agent import travel_agent
-from trip_planner.auth0 import requires_auth
+from trip_planner.agent import travel_agent, GEMINI_MODEL
+from trip_planner.auth0 import requires_auth, BATCH_AUTH_ENVIRON_KEY
 from trip_planner import db as tp_db
+from trip_planner import admission
+from trip_planner import compression
+from trip_planner import costs
+from trip_planner import follow_graph
+from trip_planner import geocode
+from trip_planner import itinerary_cache
+from trip_planner import json_patch
+from trip_planner import warmer
+from trip_planner import jsoncodec
+from trip_planner import query_log
+from trip_planner import routes
+from trip_planner.models import decode_saved_itinerary, ValidationError
+import base64
+import hashlib
 import json
-from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+class FastJSONProvider(JSONProvider):
+    """JSON provider backed by trip_planner.jsoncodec (orjson when installed).
+
+    Serializes the agent's dataclasses directly, so handlers don't need asdict().
+    Like Flask's default provider, responses are indented in debug mode or
+    when compact is False.
+    """
+
+    compact: bool | None = None
+
+    def dumps(self, obj, **kwargs):
+        indent = kwargs.pop('indent', None)
+        sort_keys = kwargs.pop('sort_keys', False)
+        separators = kwargs.pop('separators', None)
+        if kwargs or indent not in (None, 0, 2) or separators not in (None, (',', ':')) or (indent and separators):
+            # options orjson can't express: use the stdlib encoder with jsoncodec's type support
+            if indent is not None:
+                kwargs['indent'] = indent
+            if separators is not None:
+                kwargs['separators'] = separators
+            return json.dumps(obj, default=jsoncodec._default, sort_keys=sort_keys, **kwargs)
+        return jsoncodec.dumps(obj, sort_keys=sort_keys, indent=bool(indent))
+
+    def loads(self, s, **kwargs):
+        return jsoncodec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(jsoncodec.dumps_bytes(obj, indent=indent), mimetype='application/json')
+
 
 app = Flask(__name__, static_folder='trip_planner/templates', template_folder='trip_planner/templates')
+app.json = FastJSONProvider(app)
 CORS(app)
 
+MAX_BATCH_USERS = 100
+MAX_BATCH_REQUESTS = 20
+MAX_IMPORT_ERRORS = 20
+# PATCH /saved_trips/<id> without If-Match re-reads and re-applies this many times on a concurrent write
+MAX_PATCH_ATTEMPTS = 3
+MAX_CHANGES = 500
+# ?fixed= values for ?optimize_routes=1: which ends of each day stay in place
+ROUTE_FIXED_ENDS = {'both': (True, True), 'first': (True, False), 'last': (False, True), 'none': (False, False)}
+
+
+def _parse_itineraries(items):
+    """Replace each row's stored itinerary_json with the parsed itinerary."""
+    for it in items:
+        try:
+            it['itinerary'] = jsoncodec.loads(it.pop('itinerary_json'))
+        except Exception:
+            it['itinerary'] = None
+    return items
+
+
+def _route_options():
+    """(fixed_first, fixed_last) when ?optimize_routes=1 is set, else None; ValueError on a bad ?fixed=."""
+    if request.args.get('optimize_routes', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    fixed = request.args.get('fixed', 'both')
+    if fixed not in ROUTE_FIXED_ENDS:
+        raise ValueError(f'fixed must be one of {", ".join(ROUTE_FIXED_ENDS)}')
+    return ROUTE_FIXED_ENDS[fixed]
+
+
+def _enrich(itinerary, route_options=None):
+    """Geocode and price a decoded itinerary, and reorder its days if route_options is set."""
+    geocode.geocode_itinerary(itinerary)
+    costs.price_itinerary(itinerary)
+    if route_options:
+        routes.optimize_itinerary(itinerary, *route_options)
+    return itinerary
+
+
+def _import_created_at(value):
+    """An imported trip's created_at in the DB's format (naive UTC), or None to use now.
+
+    Unparseable and future timestamps are dropped: they would sort ahead of
+    every real trip in lists, the feed and its cursors.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        created_at = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if created_at.tzinfo:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    if created_at > datetime.utcnow():
+        return None
+    return created_at.isoformat()
+
+
+def _max_cost():
+    """?max_cost= as a float, or None when absent; ValueError if it isn't a non-negative number."""
+    raw = request.args.get('max_cost')
+    if raw is None or raw == '':
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValueError('max_cost must be a number') from None
+    if not value >= 0:
+        raise ValueError('max_cost must be a non-negative number')
+    return value
+
+
+def _encode_cursor(item):
+    raw = jsoncodec.dumps_bytes([item['created_at'], item['id']])
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """Decode a feed cursor into (created_at, id); raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, trip_id = jsoncodec.loads(raw)
+        return str(created_at), int(trip_id)
+    except Exception as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def _user_validators(user_id, resource):
+    """ETag and Last-Modified for a resource derived only from user_id's data version.
+
+    Last-Modified is the version's timestamp rounded up to a whole second, and
+    is left out until that second has passed: another write within it would
+    get the same Last-Modified, and If-Modified-Since couldn't tell them apart.
+    """
+    version, updated_at = tp_db.get_user_version(user_id)
+    etag = hashlib.sha256(f'{resource}:{user_id}:{version}'.encode()).hexdigest()[:32]
+    last_modified = None
+    if updated_at:
+        stamp = datetime.fromisoformat(updated_at).replace(tzinfo=timezone.utc)
+        last_modified = stamp.replace(microsecond=0) + timedelta(seconds=1 if stamp.microsecond else 0)
+        if last_modified > datetime.now(timezone.utc):
+            last_modified = None
+    return etag, last_modified
+
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # cache privately but always revalidate, since the body depends on the bearer token
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+    return response
+
+
+def _not_modified(etag, last_modified):
+    """Return a 304 response if the client's cached copy is still current, else None."""
+    if request.if_none_match:
+        # If-None-Match takes precedence; If-Modified-Since is then ignored (RFC 9110 13.2.2).
+        # Compressed representations carry an encoding-suffixed variant of the tag
+        fresh = any(request.if_none_match.contains(tag)
+                    for tag in [etag] + [f'{etag}-{enc}' for enc in compression.AVAILABLE_ENCODINGS])
+    else:
+        fresh = bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+    if not fresh:
+        return None
+    return _with_validators(app.response_class(status=304), etag, last_modified)
+
+
+@app.errorhandler(admission.AdmissionError)
+def admission_rejected(e):
+    """429 for a client over its rate limit, 503 when the LLM is saturated; both with Retry-After."""
+    response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+    response.status_code = e.status_code
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    """Compress large text responses with the best encoding the client accepts."""
+    response.vary.add('Accept-Encoding')
+    encoding = compression.negotiate(request.accept_encodings)
+    if not encoding:
+        return response
+    etag, weak = response.get_etag()
+
+    if response.status_code == 304:
+        if etag and request.if_none_match.contains(f'{etag}-{encoding}'):
+            response.set_etag(f'{etag}-{encoding}', weak)
+        return response
+
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300
+            or response.mimetype not in compression.COMPRESSIBLE_MIMETYPES):
+        return response
+    data = response.get_data()
+    if len(data) < compression.MIN_SIZE:
+        return response
+
+    response.set_data(compression.compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        # a different byte representation needs a different strong validator
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
 
 @app.route('/')
 def index():
@@ -39,24 +256,67 @@ def generate_itinerary():
 
     if duration < 1 or duration > 14:
         return jsonify({'error': 'Duration must be between 1 and 14 days'}), 400
+    try:
+        route_options = _route_options()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
-        full_itinerary = travel_agent.generate_itinerary(destination, duration, preferences, budget, departure_location)
+        params = itinerary_cache.normalize(destination, duration, preferences, budget, departure_location)
+        itinerary_cache.record_request(params)
+        itinerary_json, status = itinerary_cache.lookup(params), 'hit'
+        if itinerary_json is None:
+            # only cache misses reach Gemini, so only they need a slot; the rate token is taken with it
+            with admission.llm_slot(admission.client_key()):
+                itinerary_json, status = itinerary_cache.get_or_generate(travel_agent, params)
+        else:
+            admission.check_rate(admission.client_key())
+        if route_options:
+            # the cache keeps the LLM's order; reordering is per request
+            itinerary = jsoncodec.loads(itinerary_json)
+            routes.optimize_itinerary(itinerary, *route_options)
+            itinerary_json = jsoncodec.dumps(itinerary)
+        # splice the stored JSON in as-is instead of parsing and re-serializing it
+        body = b'{"success":true,"itinerary":' + itinerary_json.encode('utf-8') + b'}'
+        return Response(body, mimetype='application/json', headers={'X-Cache': status.upper()})
+
+    except admission.AdmissionError:
+        raise
+    except Exception as e:
+        return jsonify({'error': f'Failed to generate itinerary: {str(e)}'}), 500
 
-        itinerary_dict = {
-            'destination': full_itinerary.destination,
-            'duration': full_itinerary.duration,
-            'outbound_transport': asdict(full_itinerary.outbound_transport),
-            'return_transport': asdict(full_itinerary.return_transport),
-            'days': [asdict(day) for day in full_itinerary.days],
-            'destination_info': full_itinerary.destination_info,
-            'practical_info': full_itinerary.practical_info
-        }
 
-        return jsonify({'success': True, 'itinerary': itinerary_dict})
+@app.route('/itinerary/regenerate_day', methods=['POST'])
+def regenerate_day():
+    data = request.get_json(force=True) or {}
+    if not data.get('itinerary'):
+        return jsonify({'error': 'Itinerary data required'}), 400
+    try:
+        itinerary = decode_saved_itinerary(data['itinerary'])
+    except ValidationError as e:
+        return jsonify({'error': f'Invalid itinerary: {e}'}), 400
+    day_index = data.get('day_index')
+    if not isinstance(day_index, int) or isinstance(day_index, bool) or not 0 <= day_index < len(itinerary.days):
+        return jsonify({'error': f'day_index must be an integer between 0 and {len(itinerary.days) - 1}'}), 400
+    try:
+        route_options = _route_options()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    constraints = (data.get('constraints') or '').strip()
+    preferences = (data.get('preferences') or '').strip()
+    budget = (data.get('budget') or '').strip()
 
+    try:
+        with admission.llm_slot(admission.client_key()):
+            day = travel_agent.regenerate_day(itinerary, day_index, constraints, preferences, budget)
+        itinerary.days[day_index] = day
+        # day and trip totals change with the new day
+        _enrich(itinerary, route_options)
+        return jsonify({'success': True, 'day_index': day_index, 'day': day, 'itinerary': itinerary})
+    except admission.AdmissionError:
+        raise
     except Exception as e:
-        return jsonify({'error': f'Failed to generate itinerary: {str(e)}'}), 500
+        return jsonify({'error': f'Failed to regenerate day: {str(e)}'}), 500
 
 
 @app.route('/ask_question', methods=['POST'])
@@ -68,15 +328,20 @@ def ask_question():
         return jsonify({'error': 'Question is required'}), 400
 
     try:
-        answer = travel_agent.ask_question(question)
+        with admission.llm_slot(admission.client_key()):
+            answer = travel_agent.ask_question(question)
+        query_log.log_query(question, {'answer': answer})
         return jsonify({'success': True, 'answer': answer})
+    except admission.AdmissionError:
+        raise
     except Exception as e:
         return jsonify({'error': f'Failed to get answer: {str(e)}'}), 500
 
 
 @app.route('/health')
 def health_check():
-    return jsonify({'status': 'healthy', 'model': 'gemini-2.0-flash-exp'})
+    return jsonify({'status': 'healthy', 'model': GEMINI_MODEL, 'llm_usage': travel_agent.usage.snapshot(),
+                    'query_log': query_log.writer.stats()})
 
 
 @app.route('/saved_trips', methods=['POST'])
@@ -86,6 +351,14 @@ def save_trip():
     itinerary = data.get('itinerary')
     if not itinerary:
         return jsonify({'error': 'Itinerary data required'}), 400
+    try:
+        route_options = _route_options()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        itinerary = decode_saved_itinerary(itinerary)
+    except ValidationError as e:
+        return jsonify({'error': f'Invalid itinerary: {e}'}), 400
 
     # user identifier from token
     user_sub = getattr(request, 'auth_payload', {}).get('sub')
@@ -93,8 +366,11 @@ def save_trip():
         return jsonify({'error': 'Unable to determine user from token'}), 400
 
     try:
-        rowid = tp_db.save_itinerary(user_sub, json.dumps(itinerary))
-        return jsonify({'success': True, 'id': rowid}), 201
+        _enrich(itinerary, route_options)
+        rowid = tp_db.save_itinerary(user_sub, jsoncodec.dumps(itinerary))
+        response = jsonify({'success': True, 'id': rowid, 'version': 1})
+        response.set_etag(_trip_etag(rowid, 1))
+        return response, 201
     except Exception as e:
         return jsonify({'error': f'Failed to save itinerary: {e}'}), 500
 
@@ -107,20 +383,221 @@ def list_trips():
         return jsonify({'error': 'Unable to determine user from token'}), 400
 
     try:
-        items = tp_db.list_itineraries(user_sub)
-        # parse itinerary JSON
-        for it in items:
-            try:
-                it['itinerary'] = json.loads(it['itinerary_json'])
-                del it['itinerary_json']
-            except Exception:
-                it['itinerary'] = None
+        route_options = _route_options()
+        max_cost = _max_cost()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    currency = request.args.get('currency', 'USD').upper()
 
-        return jsonify({'success': True, 'items': items})
+    try:
+        resource = 'saved_trips'
+        if route_options:
+            resource += f':routes:{request.args.get("fixed", "both")}'
+        if max_cost is not None:
+            resource += f':max_cost:{max_cost}:{currency}'
+        etag, last_modified = _user_validators(user_sub, resource)
+        cached = _not_modified(etag, last_modified)
+        if cached:
+            return cached
+
+        items = tp_db.list_itineraries(user_sub, max_cost, currency)
+        _parse_itineraries(items)
+        if route_options:
+            for it in items:
+                if isinstance(it['itinerary'], dict):
+                    routes.optimize_itinerary(it['itinerary'], *route_options)
+
+        return _with_validators(jsonify({'success': True, 'items': items}), etag, last_modified)
     except Exception as e:
         return jsonify({'error': f'Failed to list itineraries: {e}'}), 500
 
 
+def _trip_etag(trip_id, version):
+    return hashlib.sha256(f'saved_trip:{trip_id}:{version}'.encode()).hexdigest()[:32]
+
+
+def _if_match(etag):
+    """False if the request has an If-Match header that doesn't match etag."""
+    if not request.if_match:
+        return True
+    return request.if_match.star_tag or any(
+        request.if_match.contains(tag) for tag in [etag] + [f'{etag}-{enc}' for enc in compression.AVAILABLE_ENCODINGS])
+
+
+@app.route('/saved_trips/<int:trip_id>', methods=['GET'])
+@requires_auth
+def get_trip(trip_id):
+    user_sub = getattr(request, 'auth_payload', {}).get('sub')
+    if not user_sub:
+        return jsonify({'error': 'Unable to determine user from token'}), 400
+
+    try:
+        trip = tp_db.get_itinerary(trip_id, user_sub)
+        if not trip:
+            return jsonify({'error': 'Trip not found'}), 404
+        etag = _trip_etag(trip_id, trip['version'])
+        cached = _not_modified(etag, None)
+        if cached:
+            return cached
+        _parse_itineraries([trip])
+        return _with_validators(jsonify({'success': True, 'trip': trip}), etag, None)
+    except Exception as e:
+        return jsonify({'error': f'Failed to get itinerary: {e}'}), 500
+
+
+@app.route('/saved_trips/<int:trip_id>', methods=['PATCH'])
+@requires_auth
+def patch_trip(trip_id):
+    """Edit a saved trip with a JSON Patch (an array of operations) or a JSON Merge Patch (an object).
+
+    Send If-Match with the trip's ETag to fail with 412 instead of
+    overwriting someone else's edit; without it, the patch is re-applied on
+    top of a concurrent change.
+    """
+    user_sub = getattr(request, 'auth_payload', {}).get('sub')
+    if not user_sub:
+        return jsonify({'error': 'Unable to determine user from token'}), 400
+
+    patch = request.get_json(force=True, silent=True)
+    if request.mimetype == 'application/merge-patch+json':
+        apply = json_patch.apply_merge_patch
+    elif request.mimetype == 'application/json-patch+json' or isinstance(patch, list):
+        apply = json_patch.apply_json_patch
+    else:
+        apply = json_patch.apply_merge_patch
+    if not isinstance(patch, (list, dict)):
+        return jsonify({'error': 'Body must be a JSON Patch array or a JSON Merge Patch object'}), 400
+
+    try:
+        for _ in range(MAX_PATCH_ATTEMPTS):
+            trip = tp_db.get_itinerary(trip_id, user_sub)
+            if not trip:
+                return jsonify({'error': 'Trip not found'}), 404
+            if not _if_match(_trip_etag(trip_id, trip['version'])):
+                response = jsonify({'error': 'Trip was modified', 'version': trip['version']})
+                response.set_etag(_trip_etag(trip_id, trip['version']))
+                return response, 412
+            try:
+                itinerary = decode_saved_itinerary(apply(jsoncodec.loads(trip['itinerary_json']), patch))
+            except json_patch.PatchError as e:
+                return jsonify({'error': f'Invalid patch: {e}'}), 400
+            except ValidationError as e:
+                return jsonify({'error': f'Invalid itinerary: {e}'}), 400
+            _enrich(itinerary)
+            itinerary_json = jsoncodec.dumps(itinerary)
+            # log what actually changed in storage, after decoding, geocoding and pricing,
+            # so clients replaying /changes end up with the stored document
+            stored_diff = json_patch.diff(jsoncodec.loads(trip['itinerary_json']), jsoncodec.loads(itinerary_json))
+            version = tp_db.update_itinerary(trip_id, user_sub, itinerary_json, trip['version'],
+                                             jsoncodec.dumps(stored_diff))
+            if version is not None:
+                response = jsonify({'success': True, 'id': trip_id, 'version': version, 'itinerary': itinerary})
+                response.set_etag(_trip_etag(trip_id, version))
+                return response
+            # changed between our read and write: If-Match now fails, or the patch is re-applied
+        return jsonify({'error': 'Trip is being modified concurrently, try again'}), 409
+    except Exception as e:
+        return jsonify({'error': f'Failed to update itinerary: {e}'}), 500
+
+
+@app.route('/saved_trips/search', methods=['GET'])
+@requires_auth
+def search_trips():
+    user_sub = getattr(request, 'auth_payload', {}).get('sub')
+    if not user_sub:
+        return jsonify({'error': 'Unable to determine user from token'}), 400
+
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': 'Search query (q) is required'}), 400
+    scope = request.args.get('scope', 'mine')
+    if scope not in ('mine', 'following', 'all'):
+        return jsonify({'error': "scope must be 'mine', 'following' or 'all'"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+
+    try:
+        items = _parse_itineraries(tp_db.search_itineraries(user_sub, query, scope, limit, offset))
+        next_offset = offset + limit if len(items) == limit else None
+        return jsonify({'success': True, 'items': items, 'next_offset': next_offset})
+    except Exception as e:
+        return jsonify({'error': f'Failed to search itineraries: {e}'}), 500
+
+
+@app.route('/saved_trips/export', methods=['GET'])
+@requires_auth
+def export_trips():
+    """Stream the caller's trips as NDJSON, one {"id", "created_at", "itinerary"} object per line."""
+    user_sub = getattr(request, 'auth_payload', {}).get('sub')
+    if not user_sub:
+        return jsonify({'error': 'Unable to determine user from token'}), 400
+
+    def lines():
+        for trip_id, created_at, itinerary_json in tp_db.iter_itineraries(user_sub):
+            # splice the stored JSON in as-is rather than parsing and re-encoding it
+            yield b'{"id":%d,"created_at":%s,"itinerary":%s}\n' % (
+                trip_id, jsoncodec.dumps_bytes(created_at), itinerary_json.encode('utf-8'))
+
+    body = lines()
+    response = Response(mimetype='application/x-ndjson')
+    encoding = compression.negotiate(request.accept_encodings)
+    if encoding:
+        body = compression.stream_compress(body, encoding)
+        response.headers['Content-Encoding'] = encoding
+    response.response = stream_with_context(body)
+    response.headers['Content-Disposition'] = 'attachment; filename="saved_trips.ndjson"'
+    return response
+
+
+@app.route('/saved_trips/import', methods=['POST'])
+@requires_auth
+def import_trips():
+    """Import NDJSON trips (as produced by /saved_trips/export, or bare itineraries per line).
+
+    The body is parsed line by line and inserted in batches; invalid lines are
+    skipped and reported. Each trip is geocoded and priced like POST /saved_trips,
+    and ?optimize_routes=1 applies here too.
+    """
+    user_sub = getattr(request, 'auth_payload', {}).get('sub')
+    if not user_sub:
+        return jsonify({'error': 'Unable to determine user from token'}), 400
+    try:
+        route_options = _route_options()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        stream = compression.open_decompressed(request.stream, request.headers.get('Content-Encoding'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 415
+
+    errors = []
+
+    def itineraries():
+        for line_no, line in enumerate(iter(stream.readline, b''), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = jsoncodec.loads(line)
+                created_at = None
+                if isinstance(record, dict) and 'itinerary' in record:
+                    created_at = _import_created_at(record.get('created_at'))
+                    record = record['itinerary']
+                itinerary = _enrich(decode_saved_itinerary(record), route_options)
+                yield jsoncodec.dumps(itinerary), created_at
+            except ValueError as e:
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append({'line': line_no, 'error': str(e)})
+
+    try:
+        imported = tp_db.import_itineraries(user_sub, itineraries())
+        return jsonify({'success': True, 'imported': imported, 'errors': errors})
+    except Exception as e:
+        return jsonify({'error': f'Failed to import itineraries: {e}'}), 500
+
+
 @app.route('/me', methods=['GET'])
 @requires_auth
 def me():
@@ -144,10 +621,15 @@ def get_profile():
     if not user_sub:
         return jsonify({'error': 'Unable to determine user from token'}), 400
     try:
+        etag, last_modified = _user_validators(user_sub, 'profile')
+        cached = _not_modified(etag, last_modified)
+        if cached:
+            return cached
+
         profile = tp_db.get_profile(user_sub)
         if not profile:
-            return jsonify({'success': True, 'profile': {'id': user_sub, 'bio': ''}})
-        return jsonify({'success': True, 'profile': profile})
+            profile = {'id': user_sub, 'bio': ''}
+        return _with_validators(jsonify({'success': True, 'profile': profile}), etag, last_modified)
     except Exception as e:
         return jsonify({'error': f'Failed to get profile: {e}'}), 500
 
@@ -175,23 +657,153 @@ def list_follows():
         return jsonify({'error': 'Unable to determine user from token'}), 400
 
     try:
+        etag, last_modified = _user_validators(user_sub, 'follows')
+        cached = _not_modified(etag, last_modified)
+        if cached:
+            return cached
+
         items = tp_db.list_follows(user_sub)
         # return basic shape
-        return jsonify({'success': True, 'items': items})
+        return _with_validators(jsonify({'success': True, 'items': items}), etag, last_modified)
     except Exception as e:
         return jsonify({'error': f'Failed to list follows: {e}'}), 500
 
 
+@app.route('/suggestions', methods=['GET'])
+@requires_auth
+def suggestions():
+    """People the caller may know: followed by the people they follow."""
+    user_sub = getattr(request, 'auth_payload', {}).get('sub')
+    if not user_sub:
+        return jsonify({'error': 'Unable to determine user from token'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    try:
+        ranked = follow_graph.index.suggestions(user_sub, limit)
+        profiles = tp_db.get_followed_profiles([uid for uid, _, _ in ranked])
+        items = [dict(profiles.get(uid, {'id': uid}), mutual_count=mutual, follower_count=followers)
+                 for uid, mutual, followers in ranked]
+        return jsonify({'success': True, 'items': items})
+    except Exception as e:
+        return jsonify({'error': f'Failed to load suggestions: {e}'}), 500
+
+
+@app.route('/feed', methods=['GET'])
+@requires_auth
+def feed():
+    user_sub = getattr(request, 'auth_payload', {}).get('sub')
+    if not user_sub:
+        return jsonify({'error': 'Unable to determine user from token'}), 400
+
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        cursor = request.args.get('cursor')
+        before = _decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        items = _parse_itineraries(tp_db.list_feed(user_sub, limit, before))
+        next_cursor = _encode_cursor(items[-1]) if len(items) == limit else None
+        return jsonify({'success': True, 'items': items, 'next_cursor': next_cursor})
+    except Exception as e:
+        return jsonify({'error': f'Failed to load feed: {e}'}), 500
+
+
+@app.route('/changes', methods=['GET'])
+@requires_auth
+def changes():
+    """What changed in your trips, follows and profile since ?since= (the next_since of the previous call)."""
+    user_sub = getattr(request, 'auth_payload', {}).get('sub')
+    if not user_sub:
+        return jsonify({'error': 'Unable to determine user from token'}), 400
+
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(max(int(request.args.get('limit', 100)), 1), MAX_CHANGES)
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    if since < 0:
+        return jsonify({'error': 'since must not be negative'}), 400
+
+    try:
+        etag, last_modified = _user_validators(user_sub, f'changes:{since}:{limit}')
+        cached = _not_modified(etag, last_modified)
+        if cached:
+            return cached
+
+        items, next_since, has_more = tp_db.list_changes(user_sub, since, limit)
+        _parse_itineraries([c for c in items if 'itinerary_json' in c])
+        return _with_validators(jsonify({'success': True, 'changes': items, 'next_since': next_since,
+                                         'has_more': has_more}), etag, last_modified)
+    except Exception as e:
+        return jsonify({'error': f'Failed to list changes: {e}'}), 500
+
+
+@app.route('/users', methods=['GET'])
+@requires_auth
+def get_users():
+    ids = [i.strip() for i in (request.args.get('ids') or '').split(',') if i.strip()]
+    if not ids:
+        return jsonify({'error': 'ids query parameter is required'}), 400
+    if len(ids) > MAX_BATCH_USERS:
+        return jsonify({'error': f'At most {MAX_BATCH_USERS} ids per request'}), 400
+    try:
+        profiles = tp_db.get_followed_profiles(ids)
+        # same fallback as /users/<id>: unknown users come back with only their id
+        users = [profiles.get(i, {'id': i}) for i in dict.fromkeys(ids)]
+        return jsonify({'success': True, 'users': users})
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch users: {e}'}), 500
+
+
+@app.route('/batch', methods=['POST'])
+@requires_auth
+def batch():
+    """Run several GET requests in one round-trip, verifying the token only once.
+
+    Body: {"requests": ["/me", "/saved_trips", ...]} (or {"path": ...} objects).
+    """
+    data = request.get_json(force=True) or {}
+    reqs = data.get('requests')
+    if not isinstance(reqs, list) or not reqs:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+    if len(reqs) > MAX_BATCH_REQUESTS:
+        return jsonify({'error': f'At most {MAX_BATCH_REQUESTS} requests per batch'}), 400
+
+    responses = []
+    for entry in reqs:
+        path = entry.get('path') if isinstance(entry, dict) else entry
+        if not isinstance(path, str) or not path.startswith('/') or urlsplit(path).path == '/batch':
+            responses.append({'path': path, 'status': 400, 'body': {'error': 'Invalid path'}})
+            continue
+        builder = EnvironBuilder(path=path, method='GET', headers={'Authorization': request.headers.get('Authorization', '')},
+                                 environ_overrides={'REMOTE_ADDR': request.remote_addr,
+                                                    BATCH_AUTH_ENVIRON_KEY: request.auth_payload})
+        try:
+            with app.request_context(builder.get_environ()):
+                rv = app.full_dispatch_request()
+            responses.append({'path': path, 'status': rv.status_code, 'body': rv.get_json(silent=True)})
+        except Exception as e:
+            responses.append({'path': path, 'status': 500, 'body': {'error': str(e)}})
+        finally:
+            builder.close()
+    return jsonify({'success': True, 'responses': responses})
+
+
 @app.route('/users/<user_id>', methods=['GET'])
 @requires_auth
 def get_user(user_id):
     # Return cached profile info if present, otherwise minimal info
     try:
-        profile = tp_db.get_followed_profile(user_id)
-        if profile:
-            return jsonify({'success': True, 'user': profile})
-        # fallback: return only id
-        return jsonify({'success': True, 'user': {'id': user_id}})
+        # unknown users fall back to just their id
+        user = tp_db.get_followed_profile(user_id) or {'id': user_id}
+        counts = follow_graph.index.counts(user_id)
+        user.update(follower_count=counts['followers'], following_count=counts['following'])
+        return jsonify({'success': True, 'user': user})
     except Exception as e:
         return jsonify({'error': f'Failed to fetch user: {e}'}), 500
 
@@ -200,14 +812,14 @@ def get_user(user_id):
 @requires_auth
 def list_user_saved_trips(user_id):
     try:
+        etag, last_modified = _user_validators(user_id, 'user_saved_trips')
+        cached = _not_modified(etag, last_modified)
+        if cached:
+            return cached
+
         items = tp_db.list_itineraries(user_id)
-        for it in items:
-            try:
-                it['itinerary'] = json.loads(it['itinerary_json'])
-                del it['itinerary_json']
-            except Exception:
-                it['itinerary'] = None
-        return jsonify({'success': True, 'items': items})
+        _parse_itineraries(items)
+        return _with_validators(jsonify({'success': True, 'items': items}), etag, last_modified)
     except Exception as e:
         return jsonify({'error': f'Failed to list user saved trips: {e}'}), 500
 
@@ -248,12 +860,7 @@ def dev_list_user_saved_trips(user_id):
         return jsonify({'error': 'Not allowed'}), 403
     try:
         items = tp_db.list_itineraries(user_id)
-        for it in items:
-            try:
-                it['itinerary'] = json.loads(it['itinerary_json'])
-                del it['itinerary_json']
-            except Exception:
-                it['itinerary'] = None
+        _parse_itineraries(items)
         return jsonify({'success': True, 'items': items})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -268,5 +875,7 @@ if __name__ == '__main__':
         tp_db.init_db()
     except Exception as e:
         print(f"Failed to initialize DB: {e}")
+    if os.getenv('ENABLE_CACHE_WARMER') == '1':
+        warmer.start_scheduler(travel_agent)
 
     app.run(debug=True, host=host, port=port)
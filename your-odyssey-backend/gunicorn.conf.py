@@ -0,0 +1,56 @@
+"""Production gunicorn settings for the Flask backend.
+
+  gunicorn -c gunicorn.conf.py flask_app:app
+
+The app is preloaded in the master and forked into the workers, so imports
+and module setup happen once. Caches that must survive across workers (Auth0
+keys, generated itineraries, rate limits) live in SQLite, not process memory.
+
+Reloading:
+  kill -HUP <master>    restart workers gracefully. The app was preloaded,
+                        so this picks up config and env changes, not new code.
+  kill -USR2 <master>   start a new master with the new code next to the old
+                        one; then send WINCH and QUIT to the old master.
+"""
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+
+# Requests mostly wait on Gemini, so threads per worker go further than extra processes
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+preload_app = True
+# itinerary generation can take most of a minute
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+# recycle workers now and then to bound memory growth; jitter avoids restarting them all together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = 100
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # schema setup runs once in the master, before any worker serves requests
+    from trip_planner import db as tp_db
+    tp_db.init_db()
+
+
+def post_fork(server, worker):
+    # threads don't survive fork, so the warmer starts per worker; its runs are
+    # claimed in the database, so only one worker generates per off-peak window
+    if os.getenv('ENABLE_CACHE_WARMER') == '1':
+        from flask_app import travel_agent
+        from trip_planner import warmer
+        warmer.start_scheduler(travel_agent)
+
+
+def worker_exit(server, worker):
+    # write out queued query logs before the worker goes away
+    from trip_planner import query_log
+    query_log.writer.close()
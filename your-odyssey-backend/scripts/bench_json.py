@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Micro-benchmark JSON encode/decode of itineraries of different sizes.
+
+Run from the backend folder:
+  python3 scripts/bench_json.py [--number 200]
+
+Compares the old path (dataclasses.asdict + stdlib json) with
+trip_planner.jsoncodec, which uses orjson when it is installed.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from trip_planner import jsoncodec  # noqa: E402
+from trip_planner.models import Activity, DayPlan, TransportationInfo, TravelItinerary  # noqa: E402
+
+
+def make_itinerary(days: int, activities_per_day: int = 4) -> TravelItinerary:
+    transport = TransportationInfo(
+        departure_location='New York, NY', arrival_location='Paris, France', transport_type='Flight',
+        duration='7-8 hours', estimated_cost='$600-1200 USD (roundtrip, economy)',
+        booking_info='Google Flights, Kayak, airline websites', tips='Book 2-3 months in advance')
+    day_plans = []
+    for d in range(1, days + 1):
+        activities = [
+            Activity(name=f'Activity {d}.{a}', description='Explore the neighborhood, its cafes and landmarks. ' * 2,
+                     location='Le Marais', address='Rue de Rivoli, 75004 Paris, France', duration='2-3 hours',
+                     estimated_cost='$20-30 USD', category='sightseeing', rating=4.5,
+                     opening_hours='9:00 AM - 6:00 PM', tips='Arrive early to avoid the crowds',
+                     website='https://example.com')
+            for a in range(activities_per_day)
+        ]
+        day_plans.append(DayPlan(day=d, date=f'Day {d}', theme='City highlights', activities=activities,
+                                 total_estimated_cost='$80-120 USD', transportation_notes='Metro and walking'))
+    return TravelItinerary(destination='Paris', duration=days, outbound_transport=transport,
+                           return_transport=transport, days=day_plans,
+                           destination_info={'name': 'Paris', 'currency': 'EUR', 'language': 'French'},
+                           practical_info={'packing_suggestions': ['Comfortable shoes', 'Umbrella']})
+
+
+def bench(fn, number: int) -> float:
+    """Best-of-5 time per call in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=200, help='calls per timing run')
+    args = parser.parse_args()
+
+    print(f"backend: {'orjson ' + jsoncodec.orjson.__version__ if jsoncodec.orjson else 'stdlib json (orjson not installed)'}")
+    print(f"{'days':>4} {'bytes':>8} {'asdict+json':>12} {'codec enc':>10} {'json.loads':>11} {'codec dec':>10}  (us/op)")
+    for days in (1, 3, 7, 14):
+        itinerary = make_itinerary(days)
+        text = json.dumps(asdict(itinerary))
+        old_enc = bench(lambda: json.dumps(asdict(itinerary)), args.number)
+        new_enc = bench(lambda: jsoncodec.dumps_bytes(itinerary), args.number)
+        old_dec = bench(lambda: json.loads(text), args.number)
+        new_dec = bench(lambda: jsoncodec.loads(text), args.number)
+        print(f'{days:>4} {len(text):>8} {old_enc:>12.1f} {new_enc:>10.1f} {old_dec:>11.1f} {new_dec:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark read latency of the storage layer as the dataset grows.
+
+Run from the backend folder:
+  python3 scripts/bench_storage.py [--steps 10000,100000,1000000] [--samples 500]
+
+For each step, builds a fresh synthetic database with that many trips
+(see generate_data.py; one user per --trips-per-user trips) and times
+list_itineraries, list_follows and get_followed_profile. Users are sampled
+the way traffic would hit them: trip owners in proportion to their trips,
+followers in proportion to their follows, followed users in proportion to
+their followers. Prints p50/p95/p99 latency and the largest result size.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from trip_planner import db as tp_db  # noqa: E402
+import generate_data  # noqa: E402
+
+
+def sample_column(table: str, column: str, count: int, rng: random.Random) -> list:
+    """column of count rows of table picked uniformly by id (so heavy users show up more)."""
+    conn = tp_db._get_conn()
+    try:
+        max_id = conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0] or 0
+        values = []
+        for _ in range(count * 3):
+            if len(values) >= count or not max_id:
+                break
+            row = conn.execute(f'SELECT {column} FROM {table} WHERE id = ?', (rng.randint(1, max_id),)).fetchone()
+            if row:
+                values.append(row[0])
+    finally:
+        conn.close()
+    return values
+
+
+def time_calls(func, args: list) -> dict:
+    timings = []
+    largest = 0
+    for arg in args:
+        started = time.perf_counter()
+        result = func(arg)
+        timings.append((time.perf_counter() - started) * 1000)
+        largest = max(largest, len(result) if isinstance(result, list) else int(result is not None))
+    if len(timings) < 2:
+        return {'calls': len(timings), 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'rows': largest}
+    q = statistics.quantiles(timings, n=100)
+    return {'calls': len(timings), 'p50': q[49], 'p95': q[94], 'p99': q[98], 'rows': largest}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', default='10000,100000,1000000', help='comma-separated trip counts')
+    parser.add_argument('--trips-per-user', type=int, default=10)
+    parser.add_argument('--follows', type=float, default=20, help='mean follows per user')
+    parser.add_argument('--alpha', type=float, default=1.1, help='Zipf exponent for popularity and activity')
+    parser.add_argument('--samples', type=int, default=500, help='calls timed per function and step')
+    parser.add_argument('--db', default=generate_data.DEFAULT_DB, help='scratch database, recreated per step')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'trips':>9} {'users':>8} {'follows':>9} {'MB':>8}  {'function':<22} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max rows':>8}")
+    for trips in (int(s) for s in args.steps.split(',')):
+        users = max(2, trips // args.trips_per_user)
+        stats = generate_data.generate(args.db, users, trips, args.follows, args.alpha, args.seed)
+        benches = (
+            ('list_itineraries', tp_db.list_itineraries, sample_column('saved_trips', 'user_id', args.samples, rng)),
+            ('list_follows', tp_db.list_follows, sample_column('follows', 'follower_id', args.samples, rng)),
+            ('get_followed_profile', tp_db.get_followed_profile,
+             sample_column('follows', 'followed_id', args.samples, rng)),
+        )
+        for name, func, sample in benches:
+            r = time_calls(func, sample)
+            print(f"{stats['trips']:>9} {users:>8} {stats['follows']:>9} {stats['db_bytes'] / 1e6:>8.1f}  {name:<22} "
+                  f"{r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} {r['rows']:>8}")
+
+
+if __name__ == '__main__':
+    main()
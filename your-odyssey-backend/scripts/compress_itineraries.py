@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Deduplicate, train a zstd dictionary on, and recompress stored itineraries.
+
+Run from the backend folder:
+  python3 scripts/compress_itineraries.py [--no-dedupe] [--no-train] [--batch-size 500]
+
+Rows are rewritten in batches, so this is safe to run against a live database
+and to re-run later (e.g. after enough new trips exist to retrain).
+"""
+import argparse
+import os
+import sys
+
+# Make the backend root importable. trip_planner/__init__.py is empty, so this
+# only loads the db layer, not heavy dependencies like google.generativeai.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from trip_planner import db as tp_db  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--no-dedupe', action='store_true', help='leave inline itinerary bodies in place')
+    parser.add_argument('--no-train', action='store_true', help='reuse the current dictionary')
+    parser.add_argument('--dict-size', type=int, default=64 * 1024)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    tp_db.init_db()
+    if not args.no_dedupe:
+        migrated = tp_db.dedupe_itineraries(batch_size=args.batch_size)
+        print(f'Moved {migrated} saved trips into shared itinerary blobs.')
+    if not args.no_train:
+        dict_id = tp_db.train_itinerary_dictionary(dict_size=args.dict_size)
+        if dict_id is None:
+            print(f'Not enough saved trips to train a dictionary (need {tp_db.MIN_DICT_SAMPLES}); '
+                  'compressing without one.')
+        else:
+            print(f'Trained itinerary dictionary id={dict_id}')
+
+    rewritten = tp_db.recompress_itineraries(batch_size=args.batch_size)
+    print(f'Recompressed {rewritten} stored itineraries.')
+
+
+if __name__ == '__main__':
+    main()
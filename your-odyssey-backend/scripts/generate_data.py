@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Generate a synthetic dataset of users, follows and saved trips.
+
+Run from the backend folder:
+  python3 scripts/generate_data.py [--users 10000] [--trips 100000] [--db bench.sqlite3]
+
+Popularity follows a Zipf-like power law: a few users are followed by a
+large share of everyone, and a few users own most of the trips. Out-degrees
+are heavy-tailed too. Trips are variations of the seed_demo.py templates
+with 1-14 days, shuffled activities and dates spread over the last two
+years. Rows go in through the bulk insert helpers, one commit per batch.
+
+Writes to a separate database (--db), recreated on every run, so the
+development db.sqlite3 is left alone. scripts/bench_storage.py uses this to
+build databases of growing size.
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from trip_planner import db as tp_db  # noqa: E402
+from trip_planner import jsoncodec  # noqa: E402
+import seed_demo  # noqa: E402
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bench.sqlite3')
+
+FIRST_NAMES = ('Alice', 'Bob', 'Sarah', 'Diego', 'Mei', 'Omar', 'Priya', 'Lukas', 'Amara', 'Kenji',
+               'Sofia', 'Noah', 'Leila', 'Mateo', 'Hana', 'Ivan', 'Zoe', 'Tariq', 'Elena', 'Sam')
+LAST_NAMES = ('Moreno', 'Chen', 'Kumari', 'Silva', 'Tanaka', 'Haddad', 'Rao', 'Becker', 'Okafor',
+              'Novak', 'Rossi', 'Dubois', 'Kim', 'Lopez', 'Nguyen', 'Jensen', 'Adeyemi', 'Walsh')
+BIOS = ('Weekend city escapes and too much coffee.', 'Backpacker, always planning the next train route.',
+        'Food-first traveler. Markets, street food, and night walks.', 'Mountains over beaches, every time.',
+        'Slow travel with a camera.', 'Museum hopper and architecture nerd.', '')
+TEMPLATES = (seed_demo.weekend_in_lisbon, seed_demo.autumn_hike, seed_demo.PARIS_ITINERARY,
+             seed_demo.TOKYO_ITINERARY, seed_demo.NEW_YORK_ITINERARY)
+MAX_DAYS = 14
+HISTORY = timedelta(days=730)
+
+
+def make_users(count: int, rng: random.Random) -> list:
+    users = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        users.append({
+            'id': f'auth0|gen{i}',
+            'name': f'{first} {last}',
+            'username': f'{first.lower()}.{last.lower()}{i}',
+            'bio': rng.choice(BIOS) or None,
+            'picture': f'https://i.pravatar.cc/400?u=gen{i}',
+        })
+    return users
+
+
+def zipf_cum_weights(count: int, alpha: float) -> list:
+    """Cumulative weights 1/rank**alpha, for random.choices(..., cum_weights=...)."""
+    total = 0.0
+    cum = []
+    for rank in range(1, count + 1):
+        total += rank ** -alpha
+        cum.append(total)
+    return cum
+
+
+def by_popularity(users: list, rng: random.Random) -> list:
+    """The users in a random order, read as most to least popular."""
+    ranked = list(users)
+    rng.shuffle(ranked)
+    return ranked
+
+
+def generate_follows(users: list, mean_follows: float, alpha: float, rng: random.Random):
+    """Yield bulk_insert_follows rows: Zipf-popular targets, Pareto out-degrees."""
+    ranked = by_popularity(users, rng)
+    cum = zipf_cum_weights(len(ranked), alpha)
+    now = datetime.utcnow()
+    for follower in users:
+        # Pareto(2) has mean 2, so this averages about mean_follows with a long tail
+        degree = min(len(users) - 1, int(mean_follows / 2 * rng.paretovariate(2)))
+        followed = {}
+        # popular targets repeat, so draw extra; a heavy follower may end up with a few less
+        for _ in range(3):
+            for target in rng.choices(ranked, cum_weights=cum, k=degree - len(followed)):
+                if target['id'] != follower['id']:
+                    followed[target['id']] = target
+            if len(followed) >= degree:
+                break
+        for target in list(followed.values())[:degree]:
+            created_at = (now - HISTORY * rng.random()).isoformat()
+            yield (follower['id'], target['id'], target['name'], target['username'], target['bio'],
+                   target['picture'], created_at)
+
+
+def vary_itinerary(rng: random.Random, first_name: str, start: datetime) -> dict:
+    """A template itinerary stretched or trimmed to 1-MAX_DAYS days, personalized."""
+    template = rng.choice(TEMPLATES)
+    itinerary = template(first_name) if callable(template) else copy.deepcopy(template)
+    base_days = itinerary['days']
+    days = rng.randint(1, MAX_DAYS)
+    itinerary['days'] = []
+    for d in range(days):
+        day = copy.deepcopy(base_days[d % len(base_days)])
+        rng.shuffle(day['activities'])
+        day['day'] = d + 1
+        day['date'] = (start + timedelta(days=d)).date().isoformat()
+        itinerary['days'].append(day)
+    itinerary['duration'] = days
+    if not callable(template):
+        itinerary['destination'] = f"{first_name}'s {days} days in {itinerary['destination']}"
+    return itinerary
+
+
+def generate_trips(users: list, count: int, alpha: float, rng: random.Random):
+    """Yield bulk_insert_itineraries rows, owners drawn from a Zipf activity distribution."""
+    ranked = by_popularity(users, rng)
+    cum = zipf_cum_weights(len(ranked), alpha)
+    now = datetime.utcnow()
+    for owner in rng.choices(ranked, cum_weights=cum, k=count):
+        created_at = now - HISTORY * rng.random()
+        start = created_at + timedelta(days=rng.randint(7, 180))
+        itinerary = vary_itinerary(rng, owner['name'].split()[0], start)
+        yield owner['id'], jsoncodec.dumps(itinerary), created_at.isoformat()
+
+
+def progress(rows, label: str, every: int = 100000):
+    started = time.perf_counter()
+    for n, row in enumerate(rows, 1):
+        yield row
+        if n % every == 0:
+            print(f'  {label}: {n} ({n / (time.perf_counter() - started):.0f}/s)')
+
+
+def generate(db_path: str, users: int, trips: int, mean_follows: float, alpha: float, seed: int,
+             batch_size: int = 5000) -> dict:
+    """Create db_path from scratch and fill it. Returns row counts and timings."""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    tp_db.DB_PATH = db_path
+    tp_db.init_db()
+    rng = random.Random(seed)
+    people = make_users(users, rng)
+
+    started = time.perf_counter()
+    # trips first: with no follows yet, the feed triggers have nothing to fan out to
+    inserted_trips = tp_db.bulk_insert_itineraries(
+        progress(generate_trips(people, trips, alpha, rng), 'trips'), batch_size)
+    trips_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    inserted_follows = tp_db.bulk_insert_follows(
+        progress(generate_follows(people, mean_follows, alpha, rng), 'follows'), batch_size)
+    follows_s = time.perf_counter() - started
+    return {'users': users, 'trips': inserted_trips, 'follows': inserted_follows,
+            'trips_s': trips_s, 'follows_s': follows_s, 'db_bytes': os.path.getsize(db_path)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=DEFAULT_DB, help='database file to (re)create')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--trips', type=int, default=100000)
+    parser.add_argument('--follows', type=float, default=20, help='mean follows per user')
+    parser.add_argument('--alpha', type=float, default=1.1, help='Zipf exponent for popularity and activity')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows per transaction')
+    args = parser.parse_args()
+
+    print(f'Generating into {args.db}...')
+    stats = generate(args.db, args.users, args.trips, args.follows, args.alpha, args.seed, args.batch_size)
+    print(f"{stats['users']} users, {stats['trips']} trips in {stats['trips_s']:.1f}s, "
+          f"{stats['follows']} follows in {stats['follows_s']:.1f}s, "
+          f"{stats['db_bytes'] / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
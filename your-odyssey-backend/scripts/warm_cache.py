@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Pre-generate popular itineraries into the itinerary cache.
+
+Run from the backend folder (e.g. from cron during off-peak hours):
+  python3 scripts/warm_cache.py [--max 100] [--concurrency 2] [--dry-run]
+
+Only entries that are missing or about to expire are regenerated, so
+re-running it is cheap. Needs GEMINI_API_KEY unless --dry-run is given.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from trip_planner import db as tp_db  # noqa: E402
+from trip_planner import warmer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max', type=int, default=warmer.MAX_PER_RUN, help='most itineraries to generate')
+    parser.add_argument('--concurrency', type=int, default=warmer.CONCURRENCY, help='parallel Gemini calls')
+    parser.add_argument('--top', type=int, default=warmer.TOP_REQUESTED,
+                        help='most requested combinations to include besides the curated destinations')
+    parser.add_argument('--refresh-margin', type=int, default=warmer.REFRESH_MARGIN,
+                        help='also regenerate entries expiring within this many seconds')
+    parser.add_argument('--dry-run', action='store_true', help='list what would be generated and exit')
+    args = parser.parse_args()
+
+    tp_db.init_db()
+    if args.dry_run:
+        todo = warmer.stale(warmer.candidates(args.top), args.refresh_margin)[:args.max]
+        for p in todo:
+            print(f"{p['destination']}: {p['duration']} days, {p['budget']}, {p['preferences'] or '-'}")
+        print(f'{len(todo)} itineraries would be generated.')
+        return
+
+    # imported here so --dry-run works without the Gemini client installed
+    from trip_planner.agent import travel_agent
+    stats = warmer.warm(travel_agent, max_items=args.max, concurrency=args.concurrency,
+                        refresh_margin=args.refresh_margin, top_requested=args.top)
+    print(f"Warmed {stats['warmed']} of {stats['stale']} stale itineraries "
+          f"({stats['candidates']} candidates, {stats['failed']} failed).")
+
+
+if __name__ == '__main__':
+    main()
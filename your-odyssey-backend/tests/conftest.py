@@ -0,0 +1,48 @@
+"""Shared fixtures: a fresh SQLite database per test and a Flask test client with Auth0 stubbed out.
+
+Run from the backend folder:
+  python3 -m pytest tests
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+# make the backend root importable, as scripts/seed_demo.py does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+# keep the Auth0 key cache out of the working tree
+os.environ.setdefault('SHARED_CACHE_PATH', os.path.join(tempfile.mkdtemp(), 'cache.sqlite3'))
+
+from trip_planner import db as tp_db  # noqa: E402
+
+USER = 'auth0|test'
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(tp_db, 'DB_PATH', str(tmp_path / 'db.sqlite3'))
+    tp_db.init_db()
+    return tp_db
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    import flask_app
+    from trip_planner import auth0, geocode
+
+    monkeypatch.setattr(auth0, 'decode_and_verify_jwt', lambda token: {'sub': USER})
+    # no network lookups from tests
+    monkeypatch.setattr(geocode, 'geocoder', None)
+    return flask_app.app.test_client()
+
+
+@pytest.fixture
+def auth():
+    return {'Authorization': 'Bearer test'}
+
+
+def itinerary(destination='Lisbon', activities=('Castle', 'Tram 28'), **fields):
+    """A minimal saved-itinerary payload with one day of activities."""
+    return {'destination': destination, 'duration': 1,
+            'days': [{'day': 1, 'activities': [{'name': name} for name in activities]}], **fields}
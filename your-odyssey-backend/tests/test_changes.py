@@ -0,0 +1,94 @@
+from trip_planner import jsoncodec
+from trip_planner.json_patch import apply_json_patch
+from conftest import USER, itinerary
+
+
+def _changes(client, auth, since=0, **params):
+    query = '&'.join(f'{k}={v}' for k, v in {'since': since, **params}.items())
+    response = client.get(f'/changes?{query}', headers=auth)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_changes_collapse_per_entity(client, auth, db):
+    trip_id = client.post('/saved_trips', json={'itinerary': itinerary()}, headers=auth).get_json()['id']
+    for destination in ('Porto', 'Faro'):
+        client.patch(f'/saved_trips/{trip_id}', headers=auth, json={'destination': destination})
+    client.post('/profile', json={'bio': 'first'}, headers=auth)
+    client.post('/profile', json={'bio': 'second'}, headers=auth)
+    db.save_follow(USER, 'auth0|friend', name='Friend')
+
+    body = _changes(client, auth)
+    changes = {c['type']: c for c in body['changes']}
+    assert len(body['changes']) == 3
+    assert [c['seq'] for c in body['changes']] == sorted(c['seq'] for c in body['changes'])
+    assert body['next_since'] == body['changes'][-1]['seq']
+    assert not body['has_more']
+
+    trip = changes['trip']
+    # created in this window: the whole current itinerary, not patches
+    assert (trip['id'], trip['op'], trip['version']) == (trip_id, 'upsert', 3)
+    assert trip['itinerary']['destination'] == 'Faro'
+    assert 'patches' not in trip
+    assert changes['profile']['profile']['bio'] == 'second'
+    assert changes['follow']['follow']['followed_id'] == 'auth0|friend'
+
+    assert _changes(client, auth, body['next_since'])['changes'] == []
+
+
+def test_edits_come_as_patches_from_the_clients_version(client, auth):
+    trip_id = client.post('/saved_trips', json={'itinerary': itinerary()}, headers=auth).get_json()['id']
+    first = _changes(client, auth)
+    local = first['changes'][0]['itinerary']
+
+    client.patch(f'/saved_trips/{trip_id}', headers=auth, json=[
+        {'op': 'add', 'path': '/days/0/activities/-', 'value': {'name': 'Fado'}}])
+    client.patch(f'/saved_trips/{trip_id}', headers=auth, json={'destination': 'Sintra', 'duration': 2})
+
+    (change,) = _changes(client, auth, first['next_since'])['changes']
+    assert (change['from_version'], change['version']) == (1, 3)
+    assert len(change['patches']) == 2
+    for patch in change['patches']:
+        local = apply_json_patch(local, patch)
+    assert local == client.get(f'/saved_trips/{trip_id}', headers=auth).get_json()['trip']['itinerary']
+
+
+def test_missing_patch_falls_back_to_full_itinerary(client, auth, db):
+    trip_id = client.post('/saved_trips', json={'itinerary': itinerary()}, headers=auth).get_json()['id']
+    since = _changes(client, auth)['next_since']
+    client.patch(f'/saved_trips/{trip_id}', headers=auth, json={'destination': 'Porto'})
+    conn = db._get_conn()
+    conn.execute('DELETE FROM trip_patches')
+    conn.commit()
+    conn.close()
+
+    (change,) = _changes(client, auth, since)['changes']
+    assert 'patches' not in change
+    assert change['itinerary']['destination'] == 'Porto'
+
+
+def test_limit_pages_through_the_log(client, auth, db):
+    for i in range(3):
+        db.save_itinerary(USER, jsoncodec.dumps(itinerary(f'City {i}')))
+
+    seen, since = [], 0
+    while True:
+        body = _changes(client, auth, since, limit=2)
+        seen += [c['itinerary']['destination'] for c in body['changes']]
+        since = body['next_since']
+        if not body['has_more']:
+            break
+    assert seen == ['City 0', 'City 1', 'City 2']
+
+
+def test_unchanged_log_is_304(client, auth):
+    client.post('/profile', json={'bio': 'hi'}, headers=auth)
+    etag = client.get('/changes', headers=auth).headers['ETag']
+    assert client.get('/changes', headers={**auth, 'If-None-Match': etag}).status_code == 304
+    client.post('/profile', json={'bio': 'bye'}, headers=auth)
+    assert client.get('/changes', headers={**auth, 'If-None-Match': etag}).status_code == 200
+
+
+def test_rejects_bad_parameters(client, auth):
+    assert client.get('/changes?since=-1', headers=auth).status_code == 400
+    assert client.get('/changes?limit=x', headers=auth).status_code == 400
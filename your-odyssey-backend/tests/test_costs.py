@@ -0,0 +1,70 @@
+import pytest
+
+from trip_planner import costs
+from conftest import itinerary
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('$20-30 USD', (20.0, 30.0, 'USD')),
+    ('$20 - $30', (20.0, 30.0, 'USD')),
+    ('20 to 30 EUR', (20.0, 30.0, 'EUR')),
+    ('R$ 25 – 40', (25.0, 40.0, 'BRL')),
+    ('$1-2k', (1000.0, 2000.0, 'USD')),
+    ('€15', (15.0, 15.0, 'EUR')),
+    ('12,50 €', (12.5, 12.5, 'EUR')),
+    ('¥1,200', (1200.0, 1200.0, 'JPY')),
+    ('£1.5k', (1500.0, 1500.0, 'GBP')),
+    ('A$40', (40.0, 40.0, 'AUD')),
+    ('2,000 yen', (2000.0, 2000.0, 'JPY')),
+    ('Free', (0.0, 0.0, None)),
+    ('Included', (0.0, 0.0, None)),
+    ('Free (donations welcome, $5 suggested)', (0.0, 5.0, 'USD')),
+    ('Varies', None),
+    ('30 minutes', None),
+    (None, None),
+])
+def test_parse_cost(text, expected):
+    assert costs.parse_cost(text) == expected
+
+
+def test_price_itinerary_totals_in_the_majority_currency():
+    trip = {'days': [
+        {'activities': [{'estimated_cost': '$10-20'}, {'estimated_cost': 'Free'}, 'Old-style name']},
+        {'activities': [{'estimated_cost': '$5'}, {'estimated_cost': '€30'}, {'estimated_cost': 'Varies'}]},
+    ], 'outbound_transport': {'estimated_cost': '$100-150'}}
+    summary = costs.price_itinerary(trip)
+
+    assert summary == {'min': 115.0, 'max': 175.0, 'currency': 'USD', 'priced': 4, 'unpriced': 2}
+    assert (trip['days'][0]['total_cost_min'], trip['days'][0]['total_cost_max']) == (10.0, 20.0)
+    assert (trip['days'][1]['total_cost_min'], trip['days'][1]['total_cost_max']) == (5.0, 5.0)
+    assert trip['days'][1]['activities'][1]['currency'] == 'EUR'
+    assert trip['days'][1]['activities'][2]['cost_min'] is None
+
+
+def test_repricing_clears_stale_fields():
+    trip = {'days': [{'activities': [{'estimated_cost': '$10'}]}]}
+    costs.price_itinerary(trip)
+    trip['days'][0]['activities'][0]['estimated_cost'] = 'Varies'
+    costs.price_itinerary(trip)
+    activity = trip['days'][0]['activities'][0]
+    assert (activity['cost_min'], activity['cost_max'], activity['currency']) == (None, None, None)
+    assert trip['cost_summary']['priced'] == 0
+
+
+def test_max_cost_filter(client, auth):
+    for destination, cost in [('Free', 'Free'), ('Cheap', '$10'), ('Pricey', '$900'), ('Euro', '€5'),
+                              ('Unknown', 'Varies')]:
+        trip = itinerary(destination, activities=['Stop'])
+        trip['days'][0]['activities'][0]['estimated_cost'] = cost
+        client.post('/saved_trips', json={'itinerary': trip}, headers=auth)
+
+    def destinations(query):
+        items = client.get(f'/saved_trips?{query}', headers=auth).get_json()['items']
+        return sorted(item['itinerary']['destination'] for item in items)
+
+    assert destinations('max_cost=20&currency=USD') == ['Cheap', 'Free']
+    assert destinations('max_cost=0') == ['Free']
+    assert destinations('max_cost=20&currency=eur') == ['Euro', 'Free']
+    assert len(destinations('')) == 5
+    assert client.get('/saved_trips?max_cost=-1', headers=auth).status_code == 400
+
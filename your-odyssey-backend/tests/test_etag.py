@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import flask_app
+from conftest import itinerary
+
+
+def test_unchanged_list_is_304(client, auth):
+    client.post('/saved_trips', json={'itinerary': itinerary()}, headers=auth)
+    etag = client.get('/saved_trips', headers=auth).headers['ETag']
+
+    response = client.get('/saved_trips', headers={**auth, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert not response.data
+
+
+def test_write_changes_etag(client, auth):
+    etag = client.get('/saved_trips', headers=auth).headers['ETag']
+    client.post('/saved_trips', json={'itinerary': itinerary()}, headers=auth)
+
+    response = client.get('/saved_trips', headers={**auth, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_compressed_representation_has_suffixed_etag(client, auth):
+    big = itinerary(activities=[f'Activity number {i}' for i in range(100)])
+    client.post('/saved_trips', json={'itinerary': big}, headers=auth)
+    plain = client.get('/saved_trips', headers=auth).headers['ETag'].strip('"')
+
+    response = client.get('/saved_trips', headers={**auth, 'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == f'"{plain}-gzip"'
+
+    cached = client.get('/saved_trips', headers={**auth, 'Accept-Encoding': 'gzip',
+                                                 'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == f'"{plain}-gzip"'
+    # the same version fetched without compression is still current
+    cached = client.get('/saved_trips', headers={**auth, 'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+
+
+def test_if_none_match_takes_precedence(client, auth):
+    response = client.get('/saved_trips', headers={**auth, 'If-None-Match': '"stale"',
+                                                   'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
+
+
+def test_last_modified_rounds_up(client, auth, monkeypatch):
+    monkeypatch.setattr(flask_app.tp_db, 'get_user_version', lambda user_id: (3, '2026-01-01T12:00:00.250'))
+    response = client.get('/saved_trips', headers=auth)
+    assert response.headers['Last-Modified'] == 'Thu, 01 Jan 2026 12:00:01 GMT'
+
+    cached = client.get('/saved_trips', headers={**auth, 'If-Modified-Since': 'Thu, 01 Jan 2026 12:00:01 GMT'})
+    assert cached.status_code == 304
+    # fetched before the write's second was over: must not validate
+    response = client.get('/saved_trips', headers={**auth, 'If-Modified-Since': 'Thu, 01 Jan 2026 12:00:00 GMT'})
+    assert response.status_code == 200
+
+
+def test_last_modified_withheld_within_current_second(client, auth, monkeypatch):
+    stamp = (datetime.utcnow() + timedelta(seconds=0.5)).isoformat()
+    monkeypatch.setattr(flask_app.tp_db, 'get_user_version', lambda user_id: (3, stamp))
+    response = client.get('/saved_trips', headers=auth)
+    assert 'Last-Modified' not in response.headers
+
+    response = client.get('/saved_trips', headers={**auth, 'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
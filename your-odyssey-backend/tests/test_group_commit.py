@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+from trip_planner import jsoncodec
+from conftest import itinerary
+
+
+def _count(db, sql):
+    conn = sqlite3.connect(db.DB_PATH)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_concurrent_saves(db):
+    ids, errors = [], []
+
+    def save(i):
+        try:
+            ids.append(db.save_itinerary('user', jsoncodec.dumps(itinerary(f'City {i % 10}'))))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(100)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len(set(ids)) == 100
+    assert _count(db, 'SELECT COUNT(*) FROM saved_trips') == 100
+    assert _count(db, 'SELECT COUNT(*) FROM trip_costs') == 100
+    assert _count(db, 'SELECT COUNT(*) FROM saved_trips_fts') == 100
+    # ten distinct bodies, each shared by ten trips
+    assert _count(db, 'SELECT COUNT(*) FROM itinerary_blobs') == 10
+    assert _count(db, 'SELECT SUM(ref_count) FROM itinerary_blobs') == 100
+
+
+def test_failed_write_rolls_back_only_its_savepoint(db, monkeypatch):
+    monkeypatch.setattr(db._group_writer, 'window', 0.2)
+    connections = []
+
+    def good(cur, name):
+        connections.append(cur.connection)
+        return db._insert_itinerary(cur, 'user', jsoncodec.dumps(itinerary(name)))
+
+    def bad(cur):
+        connections.append(cur.connection)
+        db._insert_itinerary(cur, 'user', jsoncodec.dumps(itinerary('Doomed')))
+        raise ValueError('boom')
+
+    futures = [db._group_writer.submit(good, 'Before'), db._group_writer.submit(bad),
+               db._group_writer.submit(good, 'After')]
+    wait(futures, timeout=10)
+
+    # all three ran in one transaction
+    assert len(connections) == 3 and len(set(map(id, connections))) == 1
+    with pytest.raises(ValueError, match='boom'):
+        futures[1].result()
+    assert futures[0].result() and futures[2].result()
+    destinations = [jsoncodec.loads(t['itinerary_json'])['destination'] for t in db.list_itineraries('user')]
+    assert sorted(destinations) == ['After', 'Before']
+    assert _count(db, 'SELECT COUNT(*) FROM itinerary_blobs') == 2
+    assert _count(db, 'SELECT COUNT(*) FROM trip_costs') == 2
+
+
+def test_timed_out_write_is_withdrawn(db, monkeypatch):
+    monkeypatch.setattr(db, 'GROUP_COMMIT_TIMEOUT', 0.3)
+    blocker = sqlite3.connect(db.DB_PATH, isolation_level=None)
+    blocker.execute('BEGIN IMMEDIATE')
+    try:
+        with pytest.raises(TimeoutError):
+            db.save_itinerary('user', jsoncodec.dumps(itinerary('Too late')))
+    finally:
+        blocker.execute('ROLLBACK')
+        blocker.close()
+
+    monkeypatch.setattr(db, 'GROUP_COMMIT_TIMEOUT', 30)
+    db.save_itinerary('user', jsoncodec.dumps(itinerary('Retried')))
+    # the writer has moved past the withdrawn write without committing it
+    destinations = [jsoncodec.loads(t['itinerary_json'])['destination'] for t in db.list_itineraries('user')]
+    assert destinations == ['Retried']
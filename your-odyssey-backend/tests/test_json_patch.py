@@ -0,0 +1,146 @@
+import pytest
+
+import flask_app
+from trip_planner import jsoncodec
+from trip_planner.json_patch import PatchError, apply_json_patch, apply_merge_patch, diff
+from conftest import USER, itinerary
+
+DOC = {'destination': 'Lisbon', 'days': [{'day': 1, 'activities': ['Castle', 'Tram']}], 'tags': {'a': 1}}
+
+
+@pytest.mark.parametrize('ops, expected', [
+    ([{'op': 'replace', 'path': '/destination', 'value': 'Porto'}], {**DOC, 'destination': 'Porto'}),
+    ([{'op': 'add', 'path': '/days/0/activities/-', 'value': 'Fado'}],
+     {**DOC, 'days': [{'day': 1, 'activities': ['Castle', 'Tram', 'Fado']}]}),
+    ([{'op': 'add', 'path': '/days/0/activities/0', 'value': 'Cafe'}],
+     {**DOC, 'days': [{'day': 1, 'activities': ['Cafe', 'Castle', 'Tram']}]}),
+    ([{'op': 'remove', 'path': '/tags/a'}], {**DOC, 'tags': {}}),
+    ([{'op': 'move', 'from': '/days/0/activities/1', 'path': '/days/0/activities/0'}],
+     {**DOC, 'days': [{'day': 1, 'activities': ['Tram', 'Castle']}]}),
+    ([{'op': 'copy', 'from': '/destination', 'path': '/tags/b'}], {**DOC, 'tags': {'a': 1, 'b': 'Lisbon'}}),
+    ([{'op': 'test', 'path': '/tags/a', 'value': 1}], DOC),
+])
+def test_apply_json_patch(ops, expected):
+    assert apply_json_patch(DOC, ops) == expected
+
+
+@pytest.mark.parametrize('ops', [
+    [{'op': 'replace', 'path': '/missing', 'value': 1}],
+    [{'op': 'remove', 'path': '/days/5'}],
+    [{'op': 'add', 'path': '/days/01', 'value': {}}],
+    [{'op': 'test', 'path': '/destination', 'value': 'Porto'}],
+    [{'op': 'move', 'from': '/days', 'path': '/days/0'}],
+    [{'op': 'frobnicate', 'path': '/destination'}],
+    [{'op': 'add', 'path': 'destination', 'value': 1}],
+    {'op': 'add', 'path': '/x', 'value': 1},
+])
+def test_invalid_json_patch(ops):
+    with pytest.raises(PatchError):
+        apply_json_patch(DOC, ops)
+
+
+def test_json_patch_is_atomic():
+    doc = {'a': [1]}
+    with pytest.raises(PatchError):
+        apply_json_patch(doc, [{'op': 'add', 'path': '/a/-', 'value': 2}, {'op': 'remove', 'path': '/b'}])
+    assert doc == {'a': [1]}
+
+
+def test_apply_merge_patch():
+    patched = apply_merge_patch(DOC, {'destination': 'Porto', 'tags': {'a': None, 'b': 2}, 'days': []})
+    assert patched == {'destination': 'Porto', 'days': [], 'tags': {'b': 2}}
+    assert DOC['tags'] == {'a': 1}
+
+
+@pytest.mark.parametrize('new', [
+    {**DOC, 'destination': 'Porto'},
+    {'destination': 'Lisbon', 'days': [{'day': 1, 'activities': ['Castle']}], 'extra': [1, {'a/b~c': None}]},
+    {'destination': 'Lisbon', 'days': [{'day': 1, 'activities': ['Castle', 'Tram', 'Fado', 'Port']}]},
+    {'destination': 'Lisbon', 'days': {}, 'tags': [1]},
+    [],
+])
+def test_diff_round_trips(new):
+    assert apply_json_patch(DOC, diff(DOC, new)) == new
+
+
+def _save(client, auth):
+    return client.post('/saved_trips', json={'itinerary': itinerary()}, headers=auth).get_json()['id']
+
+
+def test_patch_with_both_formats(client, auth):
+    trip_id = _save(client, auth)
+    response = client.patch(f'/saved_trips/{trip_id}', headers=auth, data=jsoncodec.dumps(
+        [{'op': 'replace', 'path': '/destination', 'value': 'Porto'}]), content_type='application/json-patch+json')
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 2
+
+    response = client.patch(f'/saved_trips/{trip_id}', headers=auth, data=jsoncodec.dumps({'duration': 2}),
+                            content_type='application/merge-patch+json')
+    assert response.status_code == 200
+    trip = client.get(f'/saved_trips/{trip_id}', headers=auth).get_json()['trip']
+    assert (trip['version'], trip['itinerary']['destination'], trip['itinerary']['duration']) == (3, 'Porto', 2)
+
+
+def test_patch_rejects_invalid_results(client, auth):
+    trip_id = _save(client, auth)
+    response = client.patch(f'/saved_trips/{trip_id}', headers=auth, json={'duration': 'two'})
+    assert response.status_code == 400
+    response = client.patch(f'/saved_trips/{trip_id}', headers=auth, json=[{'op': 'remove', 'path': '/nope'}])
+    assert response.status_code == 400
+    assert client.get(f'/saved_trips/{trip_id}', headers=auth).get_json()['trip']['version'] == 1
+
+
+def test_if_match_conflict(client, auth):
+    trip_id = _save(client, auth)
+    stale = client.get(f'/saved_trips/{trip_id}', headers=auth).headers['ETag']
+    fresh = client.patch(f'/saved_trips/{trip_id}', headers={**auth, 'If-Match': stale},
+                         json={'destination': 'Porto'}).headers['ETag']
+
+    response = client.patch(f'/saved_trips/{trip_id}', headers={**auth, 'If-Match': stale},
+                            json={'destination': 'Faro'})
+    assert response.status_code == 412
+    assert response.headers['ETag'] == fresh
+    assert client.get(f'/saved_trips/{trip_id}', headers=auth).get_json()['trip']['itinerary']['destination'] == 'Porto'
+
+
+def test_compare_and_set(db):
+    trip_id = db.save_itinerary(USER, jsoncodec.dumps(itinerary()))
+    assert db.update_itinerary(trip_id, USER, jsoncodec.dumps(itinerary('Porto')), 1, '[]') == 2
+    assert db.update_itinerary(trip_id, USER, jsoncodec.dumps(itinerary('Faro')), 1, '[]') is None
+    assert jsoncodec.loads(db.get_itinerary(trip_id, USER)['itinerary_json'])['destination'] == 'Porto'
+
+
+def _race(monkeypatch, edit):
+    """Make the first read of each PATCH followed by someone else's edit, before the PATCH writes."""
+    real_get = flask_app.tp_db.get_itinerary
+    raced = []
+
+    def get_itinerary(trip_id, user_id):
+        trip = real_get(trip_id, user_id)
+        if not raced:
+            raced.append(trip_id)
+            doc = edit(jsoncodec.loads(trip['itinerary_json']))
+            flask_app.tp_db.update_itinerary(trip_id, user_id, jsoncodec.dumps(doc), trip['version'], '[]')
+        return trip
+    monkeypatch.setattr(flask_app.tp_db, 'get_itinerary', get_itinerary)
+
+
+def test_concurrent_edit_is_reapplied_without_if_match(client, auth, monkeypatch):
+    trip_id = _save(client, auth)
+    _race(monkeypatch, lambda doc: {**doc, 'destination': 'Porto'})
+
+    response = client.patch(f'/saved_trips/{trip_id}', headers=auth, json={'duration': 4})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 3
+    patched = response.get_json()['itinerary']
+    assert (patched['destination'], patched['duration']) == ('Porto', 4)
+
+
+def test_concurrent_edit_fails_if_match(client, auth, monkeypatch):
+    trip_id = _save(client, auth)
+    etag = client.get(f'/saved_trips/{trip_id}', headers=auth).headers['ETag']
+    _race(monkeypatch, lambda doc: {**doc, 'destination': 'Porto'})
+
+    response = client.patch(f'/saved_trips/{trip_id}', headers={**auth, 'If-Match': etag}, json={'duration': 4})
+    assert response.status_code == 412
+    assert response.get_json()['version'] == 2
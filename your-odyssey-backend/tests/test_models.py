@@ -0,0 +1,63 @@
+import pytest
+
+from trip_planner import jsoncodec
+from trip_planner.models import (Activity, TravelItinerary, ValidationError, decode, decode_saved_itinerary,
+                                 itinerary_from_llm)
+
+
+def test_strict_decode_builds_models():
+    trip = decode_saved_itinerary({'destination': 'Lisbon', 'duration': 2,
+                                   'days': [{'day': 1, 'activities': [{'name': 'Castle', 'rating': 4.5}]}]})
+    assert isinstance(trip, TravelItinerary)
+    activity = trip.days[0].activities[0]
+    assert isinstance(activity, Activity)
+    assert (activity.name, activity.rating, activity.description) == ('Castle', 4.5, 'No description available')
+
+
+def test_strict_decode_accepts_json_text():
+    assert decode_saved_itinerary('{"destination": "Lisbon"}').destination == 'Lisbon'
+    with pytest.raises(ValidationError, match='invalid JSON'):
+        decode_saved_itinerary('{"destination": ')
+
+
+@pytest.mark.parametrize('data, message', [
+    ({'duration': '3'}, 'duration: expected integer, got str'),
+    ({'days': [{'activities': [{'rating': '4.5'}]}]}, r'days\[0\]\.activities\[0\]\.rating: expected number'),
+    ({'days': {}}, 'days: expected array'),
+    ({'destination': 'Lisbon', 'budget': 'low'}, 'budget: unknown field'),
+    ({'days': [{'activities': [{'name': 'Castle', 'baz': 1}]}]}, r'days\[0\]\.activities\[0\]\.baz: unknown field'),
+])
+def test_strict_decode_rejects_with_path(data, message):
+    with pytest.raises(ValidationError, match=message):
+        decode_saved_itinerary(data)
+
+
+def test_lenient_decode_coerces():
+    trip = decode(TravelItinerary, {'duration': '3', 'days': [{'day': '2', 'activities': [
+        {'name': 7, 'rating': '4.5', 'lat': 'n/a', 'unknown': True}]}]}, lenient=True)
+    activity = trip.days[0].activities[0]
+    assert trip.duration == 3
+    assert trip.days[0].day == 2
+    assert activity.name == '7'
+    assert activity.rating == 4.5
+    # uncoercible values fall back to the default, unknown fields are dropped
+    assert activity.lat is None
+
+
+def test_itinerary_from_llm_derives_destination_and_duration():
+    trip = itinerary_from_llm({'destination_info': {'name': 'Porto'}, 'days': [{}, {}]})
+    assert trip.destination == 'Porto'
+    assert trip.duration == 2
+
+
+def test_legacy_string_activities():
+    data = {'destination': 'Rome', 'days': [{'day': 1, 'activities': ['Colosseum', {'name': 'Forum'}]}]}
+
+    strict = decode_saved_itinerary(data)
+    assert strict.days[0].activities[0] == 'Colosseum'
+    assert isinstance(strict.days[0].activities[1], Activity)
+    # stored back as it was sent, not padded out with placeholder details
+    assert jsoncodec.loads(jsoncodec.dumps(strict))['days'][0]['activities'][0] == 'Colosseum'
+
+    lenient = decode(TravelItinerary, data, lenient=True)
+    assert lenient.days[0].activities[0] == Activity(name='Colosseum')
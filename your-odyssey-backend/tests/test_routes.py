@@ -0,0 +1,65 @@
+import math
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from trip_planner import routes  # noqa: E402
+
+# stops along a street, listed out of order: a, then the far end, then back and forth
+STOPS = {'a': 0.0, 'e': 0.04, 'b': 0.01, 'd': 0.03, 'c': 0.02}
+
+
+def _day(names, **extra):
+    return {'day': 1, 'activities': [{'name': n, 'lat': 38.7, 'lng': -9.1 + STOPS[n], **extra} for n in names]}
+
+
+def _names(day):
+    return [a['name'] for a in day['activities']]
+
+
+def _length(day):
+    points = [(a['lat'], a['lng']) for a in day['activities']]
+    return sum(math.dist(p, q) for p, q in zip(points, points[1:]))
+
+
+def test_keeps_both_ends_fixed():
+    trip = {'days': [_day(['a', 'e', 'b', 'd', 'c']), _day(['e', 'a', 'd', 'b', 'c'])]}
+    before = [_length(day) for day in trip['days']]
+    assert routes.optimize_itinerary(trip) == 2
+    for day, length, ends in zip(trip['days'], before, [('a', 'c'), ('e', 'c')]):
+        names = _names(day)
+        assert (names[0], names[-1]) == ends
+        assert sorted(names) == ['a', 'b', 'c', 'd', 'e']
+        assert _length(day) < length
+
+
+@pytest.mark.parametrize('fixed_first, fixed_last, expected', [
+    (True, False, ['a', 'b', 'c', 'd', 'e']),
+    (False, False, ['a', 'b', 'c', 'd', 'e']),
+])
+def test_free_ends(fixed_first, fixed_last, expected):
+    trip = {'days': [_day(['a', 'e', 'b', 'd', 'c'])]}
+    routes.optimize_itinerary(trip, fixed_first, fixed_last)
+    assert _names(trip['days'][0]) in (expected, expected[::-1])
+
+
+def test_fixed_last_only():
+    trip = {'days': [_day(['c', 'e', 'b', 'd', 'a'])]}
+    routes.optimize_itinerary(trip, fixed_first=False, fixed_last=True)
+    assert _names(trip['days'][0]) == ['e', 'd', 'c', 'b', 'a']
+
+
+def test_never_lengthens_an_optimal_day():
+    trip = {'days': [_day(['a', 'b', 'c', 'd', 'e'])]}
+    assert routes.optimize_itinerary(trip) == 0
+    assert _names(trip['days'][0]) == ['a', 'b', 'c', 'd', 'e']
+
+
+def test_days_without_usable_coordinates_are_left_alone():
+    missing = _day(['a', 'e', 'b', 'd', 'c'])
+    missing['activities'][2]['lat'] = None
+    city = _day(['a', 'e', 'b', 'd', 'c'], geo_precision='city')
+    trip = {'days': [missing, city, _day(['a', 'e', 'b', 'd', 'c'])]}
+    assert routes.optimize_itinerary(trip, fixed_first=False, fixed_last=False) == 1
+    assert _names(missing) == _names(city) == ['a', 'e', 'b', 'd', 'c']
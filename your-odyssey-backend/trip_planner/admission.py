@@ -0,0 +1,118 @@
+"""Admission control for the routes that call Gemini.
+
+Two layers, both backed by SQLite so every worker process sees the same state:
+
+- a token bucket per client (Auth0 sub when a valid token is sent, else the
+  IP address): LLM_RATE_PER_MINUTE requests, bursts of up to LLM_BURST.
+  Over the limit the route answers 429 right away.
+- LLM_MAX_CONCURRENCY slots shared by all in-flight Gemini calls. A request
+  that finds them all busy waits up to LLM_QUEUE_TIMEOUT seconds; at most
+  LLM_MAX_QUEUE requests per process wait at once. Past either bound the
+  route answers 503.
+
+Both errors carry a Retry-After value. A request that needs a slot spends
+its token and claims the slot in one write transaction (llm_slot(client)),
+so admission costs one round trip to the database, plus one to release.
+"""
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import request
+
+from trip_planner import auth0
+from trip_planner import db as tp_db
+
+RATE_PER_MINUTE = float(os.getenv('LLM_RATE_PER_MINUTE', '10'))  # 0 disables rate limiting
+BURST = float(os.getenv('LLM_BURST', '5'))
+MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+MAX_QUEUE = int(os.getenv('LLM_MAX_QUEUE', '8'))
+QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '10'))
+# longer than any Gemini call, so only slots of crashed workers get reclaimed
+SLOT_LEASE = float(os.getenv('LLM_SLOT_LEASE', '180'))
+SATURATED_RETRY_AFTER = int(os.getenv('LLM_SATURATED_RETRY_AFTER', '5'))
+
+
+class AdmissionError(Exception):
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class RateLimited(AdmissionError):
+    status_code = 429
+
+
+class Saturated(AdmissionError):
+    status_code = 503
+
+
+def client_key() -> str:
+    """Identify the caller: the verified Auth0 sub if a Bearer token is sent, else the remote address."""
+    auth = request.headers.get('Authorization', '')
+    parts = auth.split()
+    if len(parts) == 2 and parts[0].lower() == 'bearer':
+        try:
+            return 'sub:' + auth0.decode_and_verify_jwt(parts[1])['sub']
+        except Exception:
+            pass
+    return 'ip:' + (request.remote_addr or 'unknown')
+
+
+def check_rate(key: str) -> None:
+    if RATE_PER_MINUTE <= 0:
+        return
+    wait = tp_db.take_rate_token(key, RATE_PER_MINUTE / 60.0, BURST)
+    if wait > 0:
+        raise RateLimited('Too many requests, slow down', wait)
+
+
+_waiting = 0
+_waiting_lock = threading.Lock()
+
+
+@contextmanager
+def llm_slot(client: str | None = None):
+    """Hold one of the shared LLM call slots for the duration of the block.
+
+    With client (a client_key()), first spend one of its tokens, in the same
+    transaction as the first attempt at a slot; RateLimited if it has none.
+    """
+    global _waiting
+    holder = uuid.uuid4().hex
+    if client is not None and RATE_PER_MINUTE > 0:
+        wait, acquired = tp_db.admit_llm_call(client, RATE_PER_MINUTE / 60.0, BURST,
+                                              holder, MAX_CONCURRENCY, SLOT_LEASE)
+        if wait > 0:
+            raise RateLimited('Too many requests, slow down', wait)
+    else:
+        acquired = tp_db.acquire_llm_slot(holder, MAX_CONCURRENCY, SLOT_LEASE)
+    if not acquired:
+        with _waiting_lock:
+            if _waiting >= MAX_QUEUE:
+                raise Saturated('Itinerary service is busy, try again shortly', SATURATED_RETRY_AFTER)
+            _waiting += 1
+        try:
+            deadline = time.monotonic() + QUEUE_TIMEOUT
+            delay = 0.05
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Saturated('Itinerary service is busy, try again shortly', SATURATED_RETRY_AFTER)
+                # slots are released by other processes too, so poll with a capped backoff
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.5)
+                if tp_db.acquire_llm_slot(holder, MAX_CONCURRENCY, SLOT_LEASE):
+                    break
+        finally:
+            with _waiting_lock:
+                _waiting -= 1
+    try:
+        yield
+    finally:
+        tp_db.release_llm_slot(holder)
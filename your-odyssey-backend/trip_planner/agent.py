@@ -1,10 +1,15 @@
 import os
-import json
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict
 import google.generativeai as genai
+from google.generativeai import caching
 from dotenv import load_dotenv
+from trip_planner import jsoncodec
+from trip_planner import models
+# The itinerary models live in trip_planner.models; re-exported here for callers
+# that import them from the agent module.
+from trip_planner.models import TransportationInfo, Activity, DayPlan, TravelItinerary  # noqa: F401
 # Note: Flask imports and app instance were moved to `flask_app.py` so this
 # module can be used as a library by the Flask server and other code without
 # side effects on import.
@@ -17,66 +22,226 @@ load_dotenv()
 
 # Configuration - Only need Gemini API key to start
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
+
+# Explicit context caching of the itinerary instructions. Only some model
+# versions support it and the cached content must meet the API's minimum
+# token count, so it is opt-in; without it the instructions are still sent
+# as a system instruction, which the API can cache implicitly.
+GEMINI_CONTEXT_CACHE = os.getenv('GEMINI_CONTEXT_CACHE') == '1'
+GEMINI_CONTEXT_CACHE_TTL = int(os.getenv('GEMINI_CONTEXT_CACHE_TTL', '3600'))
 
 # Configure Gemini
 genai.configure(api_key=GEMINI_API_KEY)
 
+# The static part of every itinerary prompt; only the trip requirements change per request
+ITINERARY_INSTRUCTIONS = """
+You are a travel planner. Create a detailed vacation itinerary for the trip requirements you are given.
+
+Please create a comprehensive itinerary that includes:
+1. TRANSPORTATION TO AND FROM DESTINATION with specific details
+2. Popular attractions and must-see places with EXACT ADDRESSES
+3. Local restaurants and food experiences with FULL ADDRESSES
+4. Cultural activities and experiences with SPECIFIC LOCATIONS
+5. Transportation suggestions between locations
+6. Practical tips and advice
+7. Estimated costs for activities and transportation
+
+IMPORTANT:
+- Provide detailed transportation from the departure location to the destination and back
+- Include flight/train/bus options with estimated costs and duration
+- For each activity, provide the complete street address
+- Include booking websites and tips for transportation
+- Plan exactly one entry in "days" per day of the trip
+
+Format your response as a JSON object with this exact structure:
+
+{
+    "destination_info": {
+        "name": "the destination",
+        "best_time_to_visit": "season/months",
+        "currency": "local currency",
+        "language": "primary language",
+        "cultural_tips": ["tip1", "tip2", "tip3"]
+    },
+    "outbound_transport": {
+        "departure_location": "the departure location",
+        "arrival_location": "the destination",
+        "transport_type": "Flight/Train/Bus/Car",
+        "duration": "X hours",
+        "estimated_cost": "$XXX-XXX USD",
+        "booking_info": "Booking websites or tips",
+        "tips": "Travel tips for this route"
+    },
+    "return_transport": {
+        "departure_location": "the destination",
+        "arrival_location": "the departure location",
+        "transport_type": "Flight/Train/Bus/Car",
+        "duration": "X hours",
+        "estimated_cost": "$XXX-XXX USD",
+        "booking_info": "Booking websites or tips",
+        "tips": "Return travel tips"
+    },
+    "days": [
+        {
+            "day": 1,
+            "date": "Day 1",
+            "theme": "Arrival and City Introduction",
+            "activities": [
+                {
+                    "name": "Activity Name",
+                    "description": "Detailed description",
+                    "location": "General area or neighborhood",
+                    "address": "Complete street address with postal code",
+                    "duration": "2-3 hours",
+                    "estimated_cost": "$20-30 USD",
+                    "category": "sightseeing",
+                    "rating": 4.5,
+                    "opening_hours": "9:00 AM - 6:00 PM",
+                    "tips": "Practical tips for this activity",
+                    "phone": "+1-234-567-8900 (if available)",
+                    "website": "https://example.com (if known)"
+                }
+            ],
+            "total_estimated_cost": "$80-120 USD",
+            "transportation_notes": "How to get around this day"
+        }
+    ],
+    "practical_info": {
+        "total_estimated_budget": "total budget range including transportation",
+        "packing_suggestions": ["item1", "item2", "item3"],
+        "important_phrases": {"hello": "local greeting", "thank you": "local thanks"},
+        "emergency_info": "important emergency contacts or numbers",
+        "local_transportation": "How to get around the destination city"
+    }
+}
+
+Provide realistic, well-researched information based on your knowledge. Include 3-4 activities per day, balancing different types of experiences. Consider travel time between activities and provide practical advice.
+
+For transportation, research common routes and provide realistic costs and durations. Include multiple options when available (budget vs premium).
+
+Respond with ONLY the JSON structure, no other text.
+"""
+
+# Replacing one day of an existing itinerary: only that day's JSON comes back
+DAY_INSTRUCTIONS = """
+You are a travel planner. Replace one day of an existing vacation itinerary.
+
+You are given the destination, the themes of the days around it, activities already planned on other days
+(do not repeat them), the activities being replaced (do not reuse them) and the traveler's constraints.
+
+For each activity, provide the complete street address and an estimated cost. Include 3-4 activities,
+balancing different types of experiences, and consider travel time between them.
+
+Format your response as a JSON object with this exact structure:
+
+{
+    "theme": "Theme of the day",
+    "activities": [
+        {
+            "name": "Activity Name",
+            "description": "Detailed description",
+            "location": "General area or neighborhood",
+            "address": "Complete street address with postal code",
+            "duration": "2-3 hours",
+            "estimated_cost": "$20-30 USD",
+            "category": "sightseeing",
+            "rating": 4.5,
+            "opening_hours": "9:00 AM - 6:00 PM",
+            "tips": "Practical tips for this activity",
+            "phone": "+1-234-567-8900 (if available)",
+            "website": "https://example.com (if known)"
+        }
+    ],
+    "total_estimated_cost": "$80-120 USD",
+    "transportation_notes": "How to get around this day"
+}
+
+Respond with ONLY the JSON structure, no other text.
+"""
+
+QUESTION_INSTRUCTIONS = """
+You are a knowledgeable travel advisor. Answer travel questions with helpful, detailed, and practical information.
+
+Provide a comprehensive answer that includes:
+- Direct answer to the question
+- Practical tips and advice
+- Current general knowledge (as of your training)
+- Suggestions for further research if needed
+
+Be conversational but informative.
+"""
+
+
+class TokenUsage:
+    """Running totals of Gemini token usage, including tokens served from a context cache."""
 
-@dataclass
-class TransportationInfo:
-    departure_location: str
-    arrival_location: str
-    transport_type: str
-    duration: str
-    estimated_cost: str
-    booking_info: Optional[str] = None
-    tips: Optional[str] = None
-
-
-@dataclass
-class Activity:
-    name: str
-    description: str
-    location: str
-    address: str
-    duration: str
-    estimated_cost: str
-    category: str
-    rating: Optional[float] = None
-    opening_hours: Optional[str] = None
-    tips: Optional[str] = None
-    phone: Optional[str] = None
-    website: Optional[str] = None
-
-
-@dataclass
-class DayPlan:
-    day: int
-    date: str
-    theme: str
-    activities: List[Activity]
-    total_estimated_cost: str
-    transportation_notes: Optional[str] = None
-
-
-@dataclass
-class TravelItinerary:
-    destination: str
-    duration: int
-    outbound_transport: TransportationInfo
-    return_transport: TransportationInfo
-    days: List[DayPlan]
-    destination_info: Dict
-    practical_info: Dict
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, response):
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += getattr(usage, 'prompt_token_count', 0) or 0
+            self.cached_tokens += getattr(usage, 'cached_content_token_count', 0) or 0
+            self.output_tokens += getattr(usage, 'candidates_token_count', 0) or 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'prompt_tokens': self.prompt_tokens,
+                'cached_prompt_tokens': self.cached_tokens,
+                'cached_share': round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0,
+                'output_tokens': self.output_tokens,
+            }
 
 
 class SimplifiedTravelAgent:
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=QUESTION_INSTRUCTIONS)
+        self.itinerary_model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=ITINERARY_INSTRUCTIONS)
+        self.day_model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=DAY_INSTRUCTIONS)
+        self.usage = TokenUsage()
+        self._cache_lock = threading.Lock()
+        self._cached_model = None
+        self._cache_refresh_at = None
+
+    def _get_itinerary_model(self):
+        """The itinerary model, backed by a context cache of the instructions when enabled."""
+        if not GEMINI_CONTEXT_CACHE:
+            return self.itinerary_model
+        with self._cache_lock:
+            now = datetime.now(timezone.utc)
+            if self._cache_refresh_at is None or now >= self._cache_refresh_at:
+                ttl = timedelta(seconds=GEMINI_CONTEXT_CACHE_TTL)
+                try:
+                    cached = caching.CachedContent.create(model=GEMINI_MODEL, display_name='itinerary-instructions',
+                                                          system_instruction=ITINERARY_INSTRUCTIONS, ttl=ttl)
+                    self._cached_model = genai.GenerativeModel.from_cached_content(cached)
+                    print(f"Cached itinerary instructions as {cached.name} "
+                          f"({cached.usage_metadata.total_token_count} tokens)")
+                except Exception as e:
+                    print(f"Context caching unavailable, sending instructions uncached: {e}")
+                    self._cached_model = None
+                # recreate a little before the cache expires; after a failure, retry once per TTL
+                self._cache_refresh_at = now + ttl * 0.9
+            return self._cached_model or self.itinerary_model
 
     def generate_itinerary(self, destination: str, duration: int, preferences: str, budget: str,
-                           departure_location: str = "") -> TravelItinerary:
-        """Generate itinerary using Gemini directly"""
+                           departure_location: str = "", allow_fallback: bool = True) -> TravelItinerary:
+        """Generate itinerary using Gemini directly
+
+        With allow_fallback=False, failures raise instead of returning the
+        generic fallback itinerary (so callers can avoid caching it).
+        """
 
         prompt = f"""
         Create a detailed {duration}-day vacation itinerary for {destination}.
@@ -87,93 +252,11 @@ class SimplifiedTravelAgent:
         - Duration: {duration} days
         - Traveler Preferences: {preferences}
         - Budget Range: {budget}
-
-        Please create a comprehensive itinerary that includes:
-        1. TRANSPORTATION TO AND FROM DESTINATION with specific details
-        2. Popular attractions and must-see places with EXACT ADDRESSES
-        3. Local restaurants and food experiences with FULL ADDRESSES
-        4. Cultural activities and experiences with SPECIFIC LOCATIONS
-        5. Transportation suggestions between locations
-        6. Practical tips and advice
-        7. Estimated costs for activities and transportation
-
-        IMPORTANT: 
-        - Provide detailed transportation from {departure_location if departure_location else "a major departure city"} to {destination} and back
-        - Include flight/train/bus options with estimated costs and duration
-        - For each activity, provide the complete street address
-        - Include booking websites and tips for transportation
-
-        Format your response as a JSON object with this exact structure:
-
-        {{
-            "destination_info": {{
-                "name": "{destination}",
-                "best_time_to_visit": "season/months",
-                "currency": "local currency",
-                "language": "primary language",
-                "cultural_tips": ["tip1", "tip2", "tip3"]
-            }},
-            "outbound_transport": {{
-                "departure_location": "{departure_location if departure_location else 'Major departure city'}",
-                "arrival_location": "{destination}",
-                "transport_type": "Flight/Train/Bus/Car",
-                "duration": "X hours",
-                "estimated_cost": "$XXX-XXX USD",
-                "booking_info": "Booking websites or tips",
-                "tips": "Travel tips for this route"
-            }},
-            "return_transport": {{
-                "departure_location": "{destination}",
-                "arrival_location": "{departure_location if departure_location else 'Major departure city'}",
-                "transport_type": "Flight/Train/Bus/Car",
-                "duration": "X hours", 
-                "estimated_cost": "$XXX-XXX USD",
-                "booking_info": "Booking websites or tips",
-                "tips": "Return travel tips"
-            }},
-            "days": [
-                {{
-                    "day": 1,
-                    "date": "Day 1",
-                    "theme": "Arrival and City Introduction", 
-                    "activities": [
-                        {{
-                            "name": "Activity Name",
-                            "description": "Detailed description",
-                            "location": "General area or neighborhood",
-                            "address": "Complete street address with postal code",
-                            "duration": "2-3 hours",
-                            "estimated_cost": "$20-30 USD",
-                            "category": "sightseeing",
-                            "rating": 4.5,
-                            "opening_hours": "9:00 AM - 6:00 PM",
-                            "tips": "Practical tips for this activity",
-                            "phone": "+1-234-567-8900 (if available)",
-                            "website": "https://example.com (if known)"
-                        }}
-                    ],
-                    "total_estimated_cost": "$80-120 USD",
-                    "transportation_notes": "How to get around this day"
-                }}
-            ],
-            "practical_info": {{
-                "total_estimated_budget": "total budget range including transportation",
-                "packing_suggestions": ["item1", "item2", "item3"],
-                "important_phrases": {{"hello": "local greeting", "thank you": "local thanks"}},
-                "emergency_info": "important emergency contacts or numbers",
-                "local_transportation": "How to get around the destination city"
-            }}
-        }}
-
-        Provide realistic, well-researched information based on your knowledge. Include 3-4 activities per day, balancing different types of experiences. Consider travel time between activities and provide practical advice.
-
-        For transportation, research common routes and provide realistic costs and durations. Include multiple options when available (budget vs premium).
-
-        Respond with ONLY the JSON structure, no other text.
         """
 
         try:
-            response = self.model.generate_content(prompt)
+            response = self._get_itinerary_model().generate_content(prompt)
+            self.usage.record(response)
             response_text = response.text
 
             # Extract JSON from response
@@ -183,117 +266,89 @@ class SimplifiedTravelAgent:
             if json_start != -1 and json_end != -1:
                 json_str = response_text[json_start:json_end]
                 try:
-                    data = json.loads(json_str)
+                    data = jsoncodec.loads(json_str)
                     return self._parse_full_itinerary(data)
-                except json.JSONDecodeError as e:
+                except ValueError as e:
+                    # malformed JSON or a ValidationError from the model decoder
                     print(f"JSON parse error: {e}")
+                    if not allow_fallback:
+                        raise
                     return self._create_fallback_full_itinerary(destination, duration, preferences, budget,
                                                                 departure_location)
             else:
                 print("No JSON found in response")
+                if not allow_fallback:
+                    raise ValueError("No JSON found in response")
                 return self._create_fallback_full_itinerary(destination, duration, preferences, budget,
                                                             departure_location)
 
         except Exception as e:
             print(f"Error generating itinerary: {e}")
+            if not allow_fallback:
+                raise
             return self._create_fallback_full_itinerary(destination, duration, preferences, budget, departure_location)
 
-    def _parse_full_itinerary(self, data: Dict) -> TravelItinerary:
-        """Parse AI-generated itinerary data into TravelItinerary object"""
-        # Parse transportation
-        outbound_data = data.get('outbound_transport', {})
-        outbound_transport = TransportationInfo(
-            departure_location=outbound_data.get('departure_location', 'Unknown'),
-            arrival_location=outbound_data.get('arrival_location', 'Unknown'),
-            transport_type=outbound_data.get('transport_type', 'Flight'),
-            duration=outbound_data.get('duration', 'Unknown'),
-            estimated_cost=outbound_data.get('estimated_cost', 'N/A'),
-            booking_info=outbound_data.get('booking_info'),
-            tips=outbound_data.get('tips')
-        )
-
-        return_data = data.get('return_transport', {})
-        return_transport = TransportationInfo(
-            departure_location=return_data.get('departure_location', 'Unknown'),
-            arrival_location=return_data.get('arrival_location', 'Unknown'),
-            transport_type=return_data.get('transport_type', 'Flight'),
-            duration=return_data.get('duration', 'Unknown'),
-            estimated_cost=return_data.get('estimated_cost', 'N/A'),
-            booking_info=return_data.get('booking_info'),
-            tips=return_data.get('tips')
-        )
+    def regenerate_day(self, itinerary: TravelItinerary, day_index: int, constraints: str = "",
+                       preferences: str = "", budget: str = "") -> DayPlan:
+        """Generate a replacement for itinerary.days[day_index]; raises if generation fails.
 
-        # Parse days (reuse existing logic)
-        day_plans = self._parse_itinerary_data(data)
+        Gemini only sees the destination, the neighbouring days' themes and the
+        activity names already in the trip, not the whole itinerary, and only
+        writes one day. The itinerary itself is not modified.
+        """
+        days = itinerary.days
+        current = days[day_index]
+        info = itinerary.destination_info
+        # older trips list activities as plain names
+        names = [[a if isinstance(a, str) else a.name for a in d.activities] for d in days]
+        used = list(dict.fromkeys(n for i, day_names in enumerate(names) if i != day_index for n in day_names))
+
+        lines = [f"Destination: {info.get('name') or itinerary.destination}"]
+        for key in ('currency', 'language'):
+            if info.get(key):
+                lines.append(f"Local {key}: {info[key]}")
+        lines.append(f"Day {day_index + 1} of {len(days)}")
+        if day_index > 0:
+            lines.append(f"Previous day's theme: {days[day_index - 1].theme}")
+        if day_index < len(days) - 1:
+            lines.append(f"Next day's theme: {days[day_index + 1].theme}")
+        if used:
+            lines.append(f"Already planned on other days: {'; '.join(used)}")
+        lines.append(f"Being replaced: {current.theme} ({'; '.join(names[day_index])})")
+        if preferences:
+            lines.append(f"Traveler Preferences: {preferences}")
+        if budget:
+            lines.append(f"Budget Range: {budget}")
+        if constraints:
+            lines.append(f"Constraints for the new day: {constraints}")
+
+        response = self.day_model.generate_content('\n'.join(lines))
+        self.usage.record(response)
+        response_text = response.text
+        json_start = response_text.find('{')
+        json_end = response_text.rfind('}') + 1
+        if json_start == -1 or json_end == 0:
+            raise ValueError("No JSON found in response")
+        day = models.decode(DayPlan, jsoncodec.loads(response_text[json_start:json_end]), lenient=True)
+        # the day keeps its place in the trip, whatever the model numbered it
+        day.day, day.date = current.day, current.date
+        return day
 
-        return TravelItinerary(
-            destination=data.get('destination_info', {}).get('name', 'Unknown'),
-            duration=len(day_plans),
-            outbound_transport=outbound_transport,
-            return_transport=return_transport,
-            days=day_plans,
-            destination_info=data.get('destination_info', {}),
-            practical_info=data.get('practical_info', {})
-        )
+    def _parse_full_itinerary(self, data: Dict) -> TravelItinerary:
+        """Parse AI-generated itinerary data into TravelItinerary object"""
+        # one validating pass; missing fields get the model defaults
+        return models.itinerary_from_llm(data)
 
     def ask_question(self, question: str) -> str:
         """Ask the AI a travel-related question"""
         try:
-            prompt = f"""
-            You are a knowledgeable travel advisor. Answer this travel question with helpful, detailed, and practical information:
-
-            Question: {question}
-
-            Provide a comprehensive answer that includes:
-            - Direct answer to the question
-            - Practical tips and advice
-            - Current general knowledge (as of your training)
-            - Suggestions for further research if needed
-
-            Be conversational but informative.
-            """
-
-            response = self.model.generate_content(prompt)
+            response = self.model.generate_content(question)
+            self.usage.record(response)
             return response.text
 
         except Exception as e:
             return f"I apologize, but I encountered an error while processing your question: {str(e)}"
 
-    def _parse_itinerary_data(self, data: Dict) -> List[DayPlan]:
-        """Parse AI-generated itinerary data into DayPlan objects"""
-        day_plans = []
-
-        for day_data in data.get('days', []):
-            activities = []
-            for activity_data in day_data.get('activities', []):
-                activity = Activity(
-                    name=activity_data.get('name', 'Unknown Activity'),
-                    description=activity_data.get('description', 'No description available'),
-                    location=activity_data.get('location', 'Unknown location'),
-                    address=activity_data.get('address', 'Address not available'),
-                    duration=activity_data.get('duration', '1 hour'),
-                    estimated_cost=activity_data.get('estimated_cost', 'Free'),
-                    category=activity_data.get('category', 'general'),
-                    rating=activity_data.get('rating'),
-                    opening_hours=activity_data.get('opening_hours'),
-                    tips=activity_data.get('tips'),
-                    phone=activity_data.get('phone'),
-                    website=activity_data.get('website')
-                )
-                activities.append(activity)
-
-            day_plan = DayPlan(
-                day=day_data.get('day', 1),
-                date=day_data.get('date', f"Day {day_data.get('day', 1)}"),
-                theme=day_data.get('theme', 'Exploration'),
-                activities=activities,
-                total_estimated_cost=day_data.get('total_estimated_cost', 'N/A'),
-                transportation_notes=day_data.get('transportation_notes')
-            )
-            day_plans.append(day_plan)
-
-        return day_plans
-
     def _create_fallback_full_itinerary(self, destination: str, duration: int, preferences: str, budget: str,
                                         departure_location: str = "") -> TravelItinerary:
         """Create a basic fallback itinerary with transportation if AI generation fails"""
@@ -1,5 +1,6 @@
 import json
 import os
+import time
 from functools import wraps
 from urllib.request import urlopen
 
@@ -7,34 +8,58 @@ from jose import jwt
 from jose.utils import base64url_decode
 from flask import request, jsonify
 
+from trip_planner.shared_cache import SharedCache
+
 # Simple Auth0 JWT validation helper using JWKS
 
 AUTH0_DOMAIN = os.getenv('AUTH0_DOMAIN')
 AUTH0_AUDIENCE = os.getenv('AUTH0_AUDIENCE')
 
-def get_jwks():
+# WSGI environ key (not settable by clients) used to hand a verified payload to batch sub-requests
+BATCH_AUTH_ENVIRON_KEY = 'yourodyssey.auth_payload'
+
+# the key set is shared by all worker processes and only refetched when it expires
+JWKS_TTL = int(os.getenv('AUTH0_JWKS_TTL', '3600'))
+# an unknown kid forces a refetch (key rotation), but at most this often per process
+JWKS_MIN_REFRESH_INTERVAL = 60
+_jwks_cache = SharedCache('auth0_jwks', JWKS_TTL, local_ttl=300)
+_last_forced_refresh = float('-inf')
+
+def get_jwks(force_refresh: bool = False):
     if not AUTH0_DOMAIN:
         raise RuntimeError('AUTH0_DOMAIN not set')
+    if not force_refresh:
+        jwks = _jwks_cache.get(AUTH0_DOMAIN)
+        if jwks is not None:
+            return jwks
     jwks_url = f'https://{AUTH0_DOMAIN}/.well-known/jwks.json'
     with urlopen(jwks_url) as response:
-        return json.load(response)
-
-def decode_and_verify_jwt(token: str):
-    if not AUTH0_DOMAIN or not AUTH0_AUDIENCE:
-        raise RuntimeError('Auth0 config missing (AUTH0_DOMAIN/AUDIENCE)')
+        jwks = json.load(response)
+    _jwks_cache.set(AUTH0_DOMAIN, jwks)
+    return jwks
 
-    jwks = get_jwks()
-    unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
+def _find_rsa_key(jwks, kid):
     for key in jwks.get('keys', []):
-        if key.get('kid') == unverified_header.get('kid'):
-            rsa_key = {
+        if key.get('kid') == kid:
+            return {
                 'kty': key.get('kty'),
                 'kid': key.get('kid'),
                 'use': key.get('use'),
                 'n': key.get('n'),
                 'e': key.get('e')
             }
+    return {}
+
+def decode_and_verify_jwt(token: str):
+    global _last_forced_refresh
+    if not AUTH0_DOMAIN or not AUTH0_AUDIENCE:
+        raise RuntimeError('Auth0 config missing (AUTH0_DOMAIN/AUDIENCE)')
+
+    unverified_header = jwt.get_unverified_header(token)
+    rsa_key = _find_rsa_key(get_jwks(), unverified_header.get('kid'))
+    if not rsa_key and time.monotonic() - _last_forced_refresh > JWKS_MIN_REFRESH_INTERVAL:
+        _last_forced_refresh = time.monotonic()
+        rsa_key = _find_rsa_key(get_jwks(force_refresh=True), unverified_header.get('kid'))
     if not rsa_key:
         raise Exception('Unable to find appropriate key')
 
@@ -51,6 +76,12 @@ def decode_and_verify_jwt(token: str):
 def requires_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
+        # sub-requests dispatched by /batch carry the already verified payload
+        payload = request.environ.get(BATCH_AUTH_ENVIRON_KEY)
+        if payload is not None:
+            request.auth_payload = payload
+            return f(*args, **kwargs)
+
         auth = request.headers.get('Authorization', None)
         if not auth:
             return jsonify({'error': 'Authorization header is expected'}), 401
@@ -0,0 +1,136 @@
+import io
+import os
+import gzip
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+
+# brotli and zstandard are optional; gzip from the stdlib is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Responses smaller than this are sent as-is: the framing overhead isn't worth it
+MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+ZSTD_LEVEL = int(os.getenv('COMPRESS_ZSTD_LEVEL', '3'))
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/html', 'text/plain', 'text/css',
+                          'application/javascript')
+
+# compressed bodies kept for payloads that are served repeatedly (e.g. cache-hit itineraries)
+CACHE_MAX_ENTRIES = int(os.getenv('COMPRESS_CACHE_ENTRIES', '256'))
+CACHE_MAX_BYTES = int(os.getenv('COMPRESS_CACHE_BYTES', str(16 * 1024 * 1024)))
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    # ZstdCompressor is not thread-safe, so build one per call (cheap next to compressing)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+_CODECS = {
+    'zstd': _zstd_compress if zstandard else None,
+    'br': (lambda data: brotli.compress(data, quality=BROTLI_QUALITY)) if brotli else None,
+    'gzip': lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0),
+}
+
+# server preference when the client weights several encodings equally
+AVAILABLE_ENCODINGS = [name for name, codec in _CODECS.items() if codec]
+
+
+class CompressedBodyCache:
+    """Small thread-safe LRU of compressed bodies keyed by (content hash, encoding)."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._items.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = body
+            self._size += len(body)
+            while len(self._items) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+
+body_cache = CompressedBodyCache()
+
+
+def negotiate(accept_encodings) -> str | None:
+    """Pick the best available encoding for a werkzeug Accept-Encoding header, or None."""
+    if not accept_encodings:
+        return None
+    return accept_encodings.best_match(AVAILABLE_ENCODINGS)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress data with encoding, reusing a cached result for identical bodies."""
+    key = (hashlib.blake2b(data, digest_size=16).digest(), encoding)
+    body = body_cache.get(key)
+    if body is None:
+        body = _CODECS[encoding](data)
+        body_cache.put(key, body)
+    return body
+
+
+def stream_compress(chunks, encoding: str):
+    """Incrementally compress an iterable of byte chunks (for streamed responses)."""
+    if encoding == 'gzip':
+        c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31: gzip container
+        compress, finish = c.compress, c.flush
+    elif encoding == 'br':
+        c = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, finish = c.process, c.finish
+    elif encoding == 'zstd':
+        c = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        compress, finish = c.compress, c.flush
+    else:
+        raise ValueError(f'Unsupported encoding: {encoding}')
+    for chunk in chunks:
+        out = compress(chunk)
+        if out:
+            yield out
+    yield finish()
+
+
+def open_decompressed(stream, encoding: str | None):
+    """Wrap a readable binary stream so reads return decoded bytes.
+
+    Supports gzip and zstd request bodies; raises ValueError for anything else.
+    """
+    if not encoding or encoding == 'identity':
+        return stream
+    if encoding == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if encoding == 'zstd' and zstandard:
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream))
+    raise ValueError(f'Unsupported Content-Encoding: {encoding}')
@@ -0,0 +1,149 @@
+"""Structured costs parsed from the free-text estimated_cost strings.
+
+parse_cost("$20-30 USD") -> (20.0, 30.0, 'USD'). price_itinerary() runs it
+over every activity and transport leg of an itinerary and writes the result
+next to the original text as cost_min / cost_max / currency. It also sets
+total_cost_min / total_cost_max on each day and a cost_summary on the trip.
+Itineraries are priced when they are generated or saved. saved_trips rows
+get the trip totals in the indexed trip_costs table (see db._init_trip_costs),
+so filters like "under $1500" run in SQL.
+
+A trip is totalled in one currency: the one most of its priced items use.
+Items in any other currency, or whose text can't be parsed ("Varies"), are
+counted as unpriced rather than converted.
+"""
+import re
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_SYMBOLS = {'$': 'USD', '€': 'EUR', '£': 'GBP', '¥': 'JPY', '₹': 'INR', '฿': 'THB', '₩': 'KRW', '₫': 'VND',
+            '₺': 'TRY', '₱': 'PHP', 'R$': 'BRL', 'A$': 'AUD', 'C$': 'CAD', 'US$': 'USD', 'HK$': 'HKD'}
+_CODES = {'USD', 'EUR', 'GBP', 'JPY', 'CNY', 'INR', 'THB', 'KRW', 'VND', 'TRY', 'PHP', 'BRL', 'AUD', 'CAD',
+          'HKD', 'CHF', 'MXN', 'IDR', 'SGD', 'NZD', 'SEK', 'NOK', 'DKK', 'CZK', 'HUF', 'PLN', 'ZAR', 'AED',
+          'MAD', 'EGP', 'ISK', 'MYR', 'TWD', 'PEN', 'ARS', 'COP', 'CLP'}
+_WORDS = {'dollar': 'USD', 'euro': 'EUR', 'pound': 'GBP', 'yen': 'JPY', 'yuan': 'CNY', 'rupee': 'INR',
+          'baht': 'THB', 'won': 'KRW', 'dong': 'VND', 'peso': 'MXN'}
+_FREE = re.compile(r'\b(free|no cost|complimentary|included)\b', re.IGNORECASE)
+_SYMBOL = re.compile('|'.join(re.escape(s) for s in sorted(_SYMBOLS, key=len, reverse=True)))
+_CODE = re.compile(r'\b([A-Z]{3})\b')
+_WORD = re.compile(r'\b(' + '|'.join(_WORDS) + r')s?\b', re.IGNORECASE)
+_NUMBER = r'(\d[\d,]*(?:\.\d+)?)\s*([kK](?![a-zA-Z]))?'
+# "20-30", "$20 - $30", "20 to 30": up to a few symbol characters between the two numbers
+_RANGE = re.compile(_NUMBER + r'\s*(?:-|to)\s*\D{0,4}?' + _NUMBER)
+_SINGLE = re.compile(_NUMBER)
+
+
+def _amount(digits: str, thousands: str | None) -> float:
+    # "1,200" is twelve hundred; "12,50" is a decimal comma
+    if re.fullmatch(r'\d{1,3}(,\d{3})+(\.\d+)?', digits):
+        digits = digits.replace(',', '')
+    else:
+        digits = digits.replace(',', '.', 1).replace(',', '')
+    return float(digits) * (1000 if thousands else 1)
+
+
+def _currency(text: str) -> str | None:
+    match = _SYMBOL.search(text)
+    if match:
+        return _SYMBOLS[match.group(0)]
+    for code in _CODE.findall(text):
+        if code in _CODES:
+            return code
+    match = _WORD.search(text)
+    return _WORDS[match.group(1).lower()] if match else None
+
+
+def parse_cost(text) -> tuple | None:
+    """(min, max, currency) for a cost string; currency is None for free items. None if unparseable."""
+    if not isinstance(text, str):
+        return None
+    text = text.replace('–', '-').replace('—', '-')
+    free = _FREE.search(text)
+    match = _RANGE.search(text)
+    if match:
+        low, high = _amount(*match.group(1, 2)), _amount(*match.group(3, 4))
+        if match.group(4) and not match.group(2):
+            # "$1-2k" means 1000-2000
+            low *= 1000
+        low, high = min(low, high), max(low, high)
+    else:
+        match = _SINGLE.search(text)
+        if not match:
+            return (0.0, 0.0, None) if free else None
+        low = high = _amount(*match.group(1, 2))
+    currency = _currency(text)
+    if free:
+        low = 0.0
+    elif currency is None:
+        # a bare number could be anything (a duration, a count), so don't guess
+        return None
+    return low, high, currency
+
+
+def _sum_by(index, values, size: int) -> list:
+    if np is not None:
+        return np.bincount(index, weights=values, minlength=size).tolist() if len(index) else [0.0] * size
+    totals = [0.0] * size
+    for i, v in zip(index, values):
+        totals[i] += v
+    return totals
+
+
+def _get(item, name):
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+def _set(item, **values):
+    for name, value in values.items():
+        if isinstance(item, dict):
+            item[name] = value
+        else:
+            setattr(item, name, value)
+
+
+def _price(item) -> tuple | None:
+    cost = parse_cost(_get(item, 'estimated_cost'))
+    # unparseable text clears whatever an earlier estimated_cost left behind
+    low, high, currency = cost or (None, None, None)
+    _set(item, cost_min=low, cost_max=high, currency=currency)
+    return cost
+
+
+def price_itinerary(itinerary) -> dict:
+    """Price a TravelItinerary (or its JSON dict) in place; returns its cost_summary."""
+    if isinstance(itinerary, dict):
+        days = [d for d in itinerary.get('days') or [] if isinstance(d, dict)]
+        legs = [itinerary.get(k) for k in ('outbound_transport', 'return_transport')]
+    else:
+        days = itinerary.days
+        legs = [itinerary.outbound_transport, itinerary.return_transport]
+    legs = [leg for leg in legs if isinstance(leg, dict) or hasattr(leg, 'estimated_cost')]
+
+    # (day index or -1 for transport, parsed cost) for every priced item
+    items = []
+    for i, day in enumerate(days):
+        for activity in _get(day, 'activities') or []:
+            if isinstance(activity, str):
+                continue
+            items.append((i, _price(activity)))
+    for leg in legs:
+        items.append((-1, _price(leg)))
+
+    counts = Counter(cost[2] for _, cost in items if cost and cost[2])
+    currency = counts.most_common(1)[0][0] if counts else None
+    priced = [(i, cost) for i, cost in items if cost and cost[2] in (None, currency)]
+    # transport legs go in an extra bucket after the last day
+    index = [i if i >= 0 else len(days) for i, _ in priced]
+    mins = _sum_by(index, [cost[0] for _, cost in priced], len(days) + 1)
+    maxs = _sum_by(index, [cost[1] for _, cost in priced], len(days) + 1)
+    for i, day in enumerate(days):
+        _set(day, total_cost_min=mins[i], total_cost_max=maxs[i])
+
+    summary = {'min': sum(mins), 'max': sum(maxs), 'currency': currency,
+               'priced': len(priced), 'unpriced': len(items) - len(priced)}
+    _set(itinerary, cost_summary=summary)
+    return summary
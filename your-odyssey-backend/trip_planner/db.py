@@ -1,18 +1,603 @@
 import os
+import re
+import json
 import sqlite3
+import time
+import queue
+import random
+import hashlib
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from typing import Any, Dict, List
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from trip_planner import costs
+from trip_planner import jsoncodec
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'db.sqlite3')
 
+# columns of the saved_trips_fts index, in bm25 weight order
+SEARCH_FIELDS = ('destination', 'themes', 'activities', 'descriptions')
+SEARCH_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+
+# 'zstd' stores itineraries as compressed blobs, 'json' as plain text
+ITINERARY_CODEC = os.getenv('ITINERARY_CODEC', 'zstd' if zstandard else 'json')
+ZSTD_LEVEL = int(os.getenv('ITINERARY_ZSTD_LEVEL', '9'))
+# codec version byte at the start of every compressed itinerary blob
+CODEC_ZSTD = 1  # followed by a plain zstd frame
+CODEC_ZSTD_DICT = 2  # followed by a 4-byte big-endian dictionary id, then a zstd frame
+MIN_DICT_SAMPLES = 100
+
+# users following at least this many people get a materialized feed inbox
+FEED_INBOX_THRESHOLD = int(os.getenv('FEED_INBOX_THRESHOLD', '200'))
+
+# group commit: single-row writes from all threads share one transaction (and one fsync);
+# a write waits at most GROUP_COMMIT_WINDOW for others to join before its batch commits
+GROUP_COMMIT = os.getenv('DB_GROUP_COMMIT', '1') == '1'
+GROUP_COMMIT_WINDOW = float(os.getenv('DB_GROUP_COMMIT_WINDOW_MS', '2')) / 1000
+GROUP_COMMIT_MAX_BATCH = int(os.getenv('DB_GROUP_COMMIT_MAX_BATCH', '256'))
+# seconds a caller waits for its queued write to start before withdrawing it with TimeoutError;
+# a withdrawn write is skipped by the writer, so retrying can't create a duplicate
+GROUP_COMMIT_TIMEOUT = float(os.getenv('DB_GROUP_COMMIT_TIMEOUT', '30'))
+# seconds a connection waits on another connection's lock before raising "database is locked"
+BUSY_TIMEOUT = float(os.getenv('DB_BUSY_TIMEOUT', '10'))
+
+
+_dicts: Dict[int, Any] = {}
+_current_dict_id: int | None = None
+_current_dict_loaded = False
+_dict_lock = threading.Lock()
+_codec_local = threading.local()
+
+
+def _load_dict(dict_id: int, cur=None):
+    """Return the ZstdCompressionDict with dict_id, reading it from the DB on first use."""
+    zdict = _dicts.get(dict_id)
+    if zdict is not None:
+        return zdict
+    conn = None
+    if cur is None:
+        conn = _get_conn()
+        cur = conn.cursor()
+    cur.execute('SELECT dict_data FROM itinerary_dicts WHERE id = ?', (dict_id,))
+    row = cur.fetchone()
+    if conn is not None:
+        conn.close()
+    if not row:
+        raise ValueError(f'Unknown itinerary dictionary {dict_id}')
+    zdict = zstandard.ZstdCompressionDict(row[0])
+    with _dict_lock:
+        _dicts[dict_id] = zdict
+    return zdict
+
+
+def _current_dict(cur):
+    """(id, dict) of the newest trained dictionary, or (None, None) before any training."""
+    global _current_dict_id, _current_dict_loaded
+    if not _current_dict_loaded:
+        cur.execute('SELECT MAX(id) FROM itinerary_dicts')
+        _current_dict_id = cur.fetchone()[0]
+        _current_dict_loaded = True
+    if _current_dict_id is None:
+        return None, None
+    return _current_dict_id, _load_dict(_current_dict_id, cur)
+
+
+def _codec(kind: str, dict_id: int | None):
+    # zstd (de)compressors are not thread-safe, so each thread keeps its own per dictionary
+    cache = _codec_local.__dict__.setdefault(kind, {})
+    obj = cache.get(dict_id)
+    if obj is None:
+        zdict = _load_dict(dict_id) if dict_id is not None else None
+        if kind == 'c':
+            obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=zdict)
+        else:
+            obj = zstandard.ZstdDecompressor(dict_data=zdict)
+        cache[dict_id] = obj
+    return obj
+
+
+def _encode_itinerary(cur, itinerary_json: str):
+    """Encode itinerary JSON for storage: a versioned zstd blob, or the text itself."""
+    if ITINERARY_CODEC != 'zstd' or not zstandard:
+        return itinerary_json
+    raw = itinerary_json.encode('utf-8')
+    dict_id, _ = _current_dict(cur)
+    frame = _codec('c', dict_id).compress(raw)
+    if dict_id is None:
+        blob = bytes([CODEC_ZSTD]) + frame
+    else:
+        blob = bytes([CODEC_ZSTD_DICT]) + dict_id.to_bytes(4, 'big') + frame
+    # tiny documents can come out larger; keep those as text
+    return blob if len(blob) < len(raw) else itinerary_json
+
+
+def _decode_itinerary(value) -> str:
+    """Inverse of _encode_itinerary; plain-text rows pass through unchanged."""
+    if value is None or isinstance(value, str):
+        return value
+    if not zstandard:
+        raise RuntimeError('zstandard is required to read compressed itineraries')
+    version = value[0]
+    if version == CODEC_ZSTD:
+        return _codec('d', None).decompress(value[1:]).decode('utf-8')
+    if version == CODEC_ZSTD_DICT:
+        dict_id = int.from_bytes(value[1:5], 'big')
+        return _codec('d', dict_id).decompress(value[5:]).decode('utf-8')
+    raise ValueError(f'Unknown itinerary codec version {version}')
+
+
+def _decode_rows(rows) -> List[Dict[str, Any]]:
+    items = [dict(r) for r in rows]
+    for it in items:
+        it['itinerary_json'] = _decode_itinerary(it['itinerary_json'])
+    return items
+
+
+def _trip_body_sql(alias: str) -> str:
+    """SQL for a saved_trips row's stored body: its blob if it has one, else the legacy inline column."""
+    return (f'COALESCE((SELECT b.body FROM itinerary_blobs b WHERE b.hash = {alias}.itinerary_hash), '
+            f'{alias}.itinerary_json)')
+
+
+def _canonical_itinerary(itinerary_json: str) -> str:
+    """Canonical JSON text (sorted keys, compact, unescaped) so equal itineraries hash equally.
+
+    Always the stdlib json module, never jsoncodec: orjson writes some values
+    (floats such as 1e+16) differently, and a blob's hash must not depend on
+    which backend the process that stored it had installed.
+    """
+    try:
+        return json.dumps(json.loads(itinerary_json), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    except ValueError:
+        return itinerary_json
+
+
+def _store_blob(cur, itinerary_json: str) -> str:
+    """Make sure the itinerary body is stored once in itinerary_blobs; return its hash.
+
+    Reference counts are maintained by triggers on saved_trips.
+    """
+    canonical = _canonical_itinerary(itinerary_json)
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    cur.execute('SELECT 1 FROM itinerary_blobs WHERE hash = ?', (digest,))
+    if not cur.fetchone():
+        cur.execute('INSERT INTO itinerary_blobs (hash, body, ref_count, created_at) VALUES (?, ?, 0, ?)',
+                    (digest, _encode_itinerary(cur, canonical), datetime.utcnow().isoformat()))
+    return digest
+
+
+def _search_field(data: dict, field: str) -> str:
+    """Extract the text for one FTS column from a parsed itinerary."""
+    parts = []
+    if field == 'destination':
+        parts.append(data.get('destination'))
+        info = data.get('destination_info')
+        if isinstance(info, dict):
+            parts.append(info.get('name'))
+    else:
+        for day in data.get('days') or []:
+            if not isinstance(day, dict):
+                continue
+            if field == 'themes':
+                parts.append(day.get('theme'))
+                continue
+            for act in day.get('activities') or []:
+                if isinstance(act, str):
+                    # older itineraries store activities as plain strings
+                    if field == 'activities':
+                        parts.append(act)
+                elif isinstance(act, dict):
+                    if field == 'activities':
+                        parts.append(act.get('name'))
+                    else:
+                        parts.append(act.get('description'))
+                        parts.append(act.get('location'))
+    return ' '.join(p for p in parts if isinstance(p, str) and p)
+
+
+def _trip_cost(data: dict) -> tuple:
+    """(min, max, currency) of a parsed itinerary's cost summary; NULLs when nothing could be priced."""
+    summary = data.get('cost_summary')
+    if not isinstance(summary, dict) or 'priced' not in summary:
+        # imported or older trips were never priced
+        summary = costs.price_itinerary(data)
+    if not summary.get('priced'):
+        return None, None, None
+    return summary.get('min'), summary.get('max'), summary.get('currency')
+
+
+def _index_trip(cur, trip_id: int, itinerary_json: str) -> None:
+    """(Re)write a trip's search index and trip_costs rows, parsing its itinerary once.
+
+    Called from every write path in this module rather than from triggers,
+    so other writers to saved_trips (the sqlite3 CLI, migrations) don't need
+    Python functions registered; their rows are picked up by reindex_trips().
+    """
+    try:
+        data = jsoncodec.loads(itinerary_json)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        data = {}
+    cur.execute('DELETE FROM saved_trips_fts WHERE rowid = ?', (trip_id,))
+    cur.execute(f'INSERT INTO saved_trips_fts (rowid, {", ".join(SEARCH_FIELDS)}) '
+                f'VALUES (?, {", ".join("?" for _ in SEARCH_FIELDS)})',
+                (trip_id, *(_search_field(data, f) for f in SEARCH_FIELDS)))
+    cur.execute('INSERT OR REPLACE INTO trip_costs (trip_id, min_cost, max_cost, currency) VALUES (?, ?, ?, ?)',
+                (trip_id, *_trip_cost(data)))
+
+
+def reindex_trips(batch_size: int = 500, missing_only: bool = True) -> int:
+    """Build search and cost rows for saved trips; by default only those lacking them.
+
+    Needed for trips written without going through this module. Returns the
+    number of trips indexed.
+    """
+    conn = _get_conn()
+    cur = conn.cursor()
+    indexed = _reindex_trips(cur, batch_size, missing_only)
+    conn.commit()
+    conn.close()
+    return indexed
+
+
+def _reindex_trips(cur, batch_size: int = 500, missing_only: bool = True) -> int:
+    missing = 'AND t.id NOT IN (SELECT trip_id FROM trip_costs)' if missing_only else ''
+    indexed = last_id = 0
+    while True:
+        cur.execute(f'SELECT t.id, {_trip_body_sql("t")} AS itinerary_json FROM saved_trips t '
+                    f'WHERE t.id > ? {missing} ORDER BY t.id LIMIT ?', (last_id, batch_size))
+        rows = cur.fetchall()
+        if not rows:
+            return indexed
+        for r in rows:
+            _index_trip(cur, r['id'], _decode_itinerary(r['itinerary_json']))
+        last_id = rows[-1]['id']
+        indexed += len(rows)
+
+
 def _get_conn():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
     conn.row_factory = sqlite3.Row
     return conn
 
+
+def _init_search(cur) -> bool:
+    """Create the FTS5 index over saved_trips; returns whether it already existed.
+
+    Rows are written by _index_trip; only deletes are handled by a trigger.
+    """
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'saved_trips_fts'")
+    existed = cur.fetchone() is not None
+    cur.execute(f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS saved_trips_fts USING fts5(
+        {', '.join(SEARCH_FIELDS)},
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    ''')
+    # older databases indexed inserts and updates with triggers calling a Python function
+    for name in ('saved_trips_fts_ai', 'saved_trips_fts_au'):
+        cur.execute(f'DROP TRIGGER IF EXISTS {name}')
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS saved_trips_fts_ad AFTER DELETE ON saved_trips BEGIN
+        DELETE FROM saved_trips_fts WHERE rowid = old.id;
+    END
+    ''')
+    return existed
+
+
+def _init_blobs(cur):
+    """Content-addressed itinerary bodies shared by every saved_trips row with the same JSON."""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS itinerary_blobs (
+        hash TEXT PRIMARY KEY,
+        body BLOB NOT NULL,
+        ref_count INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL
+    )
+    ''')
+    cur.execute('PRAGMA table_info(saved_trips)')
+    if 'itinerary_hash' not in [r['name'] for r in cur.fetchall()]:
+        # rows saved before blobs existed keep their body inline in itinerary_json
+        cur.execute('ALTER TABLE saved_trips ADD COLUMN itinerary_hash TEXT')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_saved_trips_hash ON saved_trips (itinerary_hash)')
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS itinerary_blobs_ref_ai AFTER INSERT ON saved_trips
+    WHEN new.itinerary_hash IS NOT NULL BEGIN
+        UPDATE itinerary_blobs SET ref_count = ref_count + 1 WHERE hash = new.itinerary_hash;
+    END
+    ''')
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS itinerary_blobs_ref_ad AFTER DELETE ON saved_trips
+    WHEN old.itinerary_hash IS NOT NULL BEGIN
+        UPDATE itinerary_blobs SET ref_count = ref_count - 1 WHERE hash = old.itinerary_hash;
+        DELETE FROM itinerary_blobs WHERE hash = old.itinerary_hash AND ref_count <= 0;
+    END
+    ''')
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS itinerary_blobs_ref_au AFTER UPDATE OF itinerary_hash ON saved_trips
+    WHEN old.itinerary_hash IS NOT new.itinerary_hash BEGIN
+        UPDATE itinerary_blobs SET ref_count = ref_count + 1 WHERE hash = new.itinerary_hash;
+        UPDATE itinerary_blobs SET ref_count = ref_count - 1 WHERE hash = old.itinerary_hash;
+        DELETE FROM itinerary_blobs WHERE hash = old.itinerary_hash AND ref_count <= 0;
+    END
+    ''')
+
+
+def _init_feed_inbox(cur):
+    """Create the materialized feed inbox, filled by triggers for opted-in followers."""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS feed_inbox_owners (
+        follower_id TEXT PRIMARY KEY,
+        created_at TEXT NOT NULL
+    )
+    ''')
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS feed_inbox (
+        follower_id TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        trip_id INTEGER NOT NULL,
+        PRIMARY KEY (follower_id, created_at, trip_id)
+    ) WITHOUT ROWID
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_feed_inbox_trip ON feed_inbox (trip_id)')
+    # fan a new trip out to every materialized follower of its author
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS feed_inbox_trip_ai AFTER INSERT ON saved_trips BEGIN
+        INSERT OR IGNORE INTO feed_inbox (follower_id, created_at, trip_id)
+        SELECT f.follower_id, new.created_at, new.id
+        FROM follows f JOIN feed_inbox_owners o ON o.follower_id = f.follower_id
+        WHERE f.followed_id = new.user_id;
+    END
+    ''')
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS feed_inbox_trip_ad AFTER DELETE ON saved_trips BEGIN
+        DELETE FROM feed_inbox WHERE trip_id = old.id;
+    END
+    ''')
+    # a new follow copies the followed user's existing trips into a materialized inbox
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS feed_inbox_follow_ai AFTER INSERT ON follows
+    WHEN EXISTS (SELECT 1 FROM feed_inbox_owners WHERE follower_id = new.follower_id) BEGIN
+        INSERT OR IGNORE INTO feed_inbox (follower_id, created_at, trip_id)
+        SELECT new.follower_id, t.created_at, t.id FROM saved_trips t WHERE t.user_id = new.followed_id;
+    END
+    ''')
+
+
+# (table, event, user column) whose writes bump that user's version counter
+_VERSIONED_WRITES = (
+    ('saved_trips', 'INSERT', 'new.user_id'),
+    ('saved_trips', 'UPDATE', 'new.user_id'),
+    ('saved_trips', 'DELETE', 'old.user_id'),
+    ('profiles', 'INSERT', 'new.user_id'),
+    ('profiles', 'UPDATE', 'new.user_id'),
+    ('follows', 'INSERT', 'new.follower_id'),
+    ('follows', 'DELETE', 'old.follower_id'),
+)
+
+
+def _init_versions(cur):
+    """Per-user version counters, bumped by triggers on every write that changes a user's data."""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS user_versions (
+        user_id TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    ''')
+    for table, event, user_col in _VERSIONED_WRITES:
+        cur.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS user_versions_{table}_{event.lower()} AFTER {event} ON {table} BEGIN
+            INSERT INTO user_versions (user_id, version, updated_at)
+            VALUES ({user_col}, 1, strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+            ON CONFLICT(user_id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;
+        END
+        ''')
+
+
+def _init_itinerary_cache(cur):
+    """Generated itineraries keyed by normalized request parameters, plus request counts."""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS itinerary_cache (
+        cache_key TEXT PRIMARY KEY,
+        destination TEXT NOT NULL,
+        duration INTEGER NOT NULL,
+        budget TEXT NOT NULL,
+        preferences TEXT NOT NULL,
+        departure_location TEXT NOT NULL,
+        itinerary_json TEXT NOT NULL,
+        source TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        expires_at TEXT NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_itinerary_cache_expires ON itinerary_cache (expires_at)')
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS itinerary_requests (
+        cache_key TEXT PRIMARY KEY,
+        destination TEXT NOT NULL,
+        duration INTEGER NOT NULL,
+        budget TEXT NOT NULL,
+        preferences TEXT NOT NULL,
+        departure_location TEXT NOT NULL,
+        request_count INTEGER NOT NULL,
+        last_requested_at TEXT NOT NULL
+    )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_itinerary_requests_count ON itinerary_requests (request_count DESC)')
+    # one row per warmer run, so several app processes don't warm the same window twice
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS cache_warmer_runs (
+        run_key TEXT PRIMARY KEY,
+        started_at TEXT NOT NULL,
+        finished_at TEXT,
+        warmed INTEGER,
+        failed INTEGER
+    )
+    ''')
+
+
+def _init_admission(cur):
+    """Shared state for trip_planner.admission: per-client token buckets and LLM call slots."""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS rate_buckets (
+        client_key TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    ''')
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS llm_slots (
+        slot INTEGER PRIMARY KEY,
+        holder TEXT,
+        acquired_at REAL
+    )
+    ''')
+
+
+def _init_user_queries(cur):
+    """The table behind the Django UserQuery model (vacation_planner_web/trip_planner/models.py).
+
+    Both apps use db.sqlite3 in the backend root, so Flask writes query logs
+    where the Django ORM and admin can read them. The table is created here if
+    Django's migration hasn't run yet; run that migration with --fake-initial.
+    """
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS trip_planner_userquery (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        query_text TEXT NOT NULL,
+        response_data TEXT NOT NULL CHECK (JSON_VALID(response_data)),
+        created_at DATETIME NOT NULL
+    )
+    ''')
+
+
+def _init_geocode_cache(cur):
+    """Normalized address -> coordinates. lat/lng are NULL when the geocoder found nothing."""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS geocode_cache (
+        address_key TEXT PRIMARY KEY,
+        lat REAL,
+        lng REAL,
+        provider TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+
+def _init_trip_costs(cur):
+    """Trip cost totals (see trip_planner.costs) in an indexed table, written by _index_trip."""
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS trip_costs (
+        trip_id INTEGER PRIMARY KEY,
+        min_cost REAL,
+        max_cost REAL,
+        currency TEXT
+    )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_trip_costs_currency_max ON trip_costs (currency, max_cost)')
+    for name in ('trip_costs_ai', 'trip_costs_au'):
+        cur.execute(f'DROP TRIGGER IF EXISTS {name}')
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS trip_costs_ad AFTER DELETE ON saved_trips BEGIN
+        DELETE FROM trip_costs WHERE trip_id = old.id;
+    END
+    ''')
+
+
+def _init_trip_patches(cur):
+    """Per-trip version numbers for PATCH /saved_trips/<id>, and the log of patches applied."""
+    cur.execute('PRAGMA table_info(saved_trips)')
+    if 'version' not in [r['name'] for r in cur.fetchall()]:
+        cur.execute('ALTER TABLE saved_trips ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+    # the JSON Patch from the previous stored body to each version's, as computed by the caller
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS trip_patches (
+        trip_id INTEGER NOT NULL,
+        version INTEGER NOT NULL,
+        patch TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (trip_id, version)
+    ) WITHOUT ROWID
+    ''')
+    cur.execute('''
+    CREATE TRIGGER IF NOT EXISTS trip_patches_ad AFTER DELETE ON saved_trips BEGIN
+        DELETE FROM trip_patches WHERE trip_id = old.id;
+    END
+    ''')
+
+
+# (table, event, condition, values for user_id, entity, entity_id, op, version) of every change a client syncs
+_CHANGE_TRIGGERS = (
+    ('saved_trips', 'INSERT', '', "new.user_id, 'trip', new.id, 'insert', new.version"),
+    ('saved_trips', 'UPDATE OF version', 'WHEN old.version IS NOT new.version',
+     "new.user_id, 'trip', new.id, 'update', new.version"),
+    ('saved_trips', 'DELETE', '', "old.user_id, 'trip', old.id, 'delete', NULL"),
+    ('follows', 'INSERT', '', "new.follower_id, 'follow', new.id, 'insert', NULL"),
+    ('follows', 'DELETE', '', "old.follower_id, 'follow', old.id, 'delete', NULL"),
+    ('profiles', 'INSERT', '', "new.user_id, 'profile', new.user_id, 'update', NULL"),
+    ('profiles', 'UPDATE', '', "new.user_id, 'profile', new.user_id, 'update', NULL"),
+)
+
+
+def _init_changes(cur):
+    """Append-only log of changes to each user's trips, follows and profile, for GET /changes.
+
+    seq is AUTOINCREMENT, so it only grows and is never reused, even after
+    the newest rows are deleted.
+    """
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'changes'")
+    existed = cur.fetchone() is not None
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        entity TEXT NOT NULL,
+        entity_id TEXT NOT NULL,
+        op TEXT NOT NULL,
+        version INTEGER,
+        created_at TEXT NOT NULL
+    )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_changes_user_seq ON changes (user_id, seq)')
+    for table, event, condition, values in _CHANGE_TRIGGERS:
+        name = f'changes_{table}_{event.split()[0].lower()}'
+        cur.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} {condition} BEGIN
+            INSERT INTO changes (user_id, entity, entity_id, op, version, created_at)
+            VALUES ({values}, strftime('%Y-%m-%dT%H:%M:%f', 'now'));
+        END
+        ''')
+    if not existed:
+        # everything already stored counts as created, so since=0 returns the full state
+        cur.execute('''
+        INSERT INTO changes (user_id, entity, entity_id, op, version, created_at)
+        SELECT user_id, 'trip', id, 'insert', version, created_at FROM saved_trips ORDER BY id
+        ''')
+        cur.execute('''
+        INSERT INTO changes (user_id, entity, entity_id, op, version, created_at)
+        SELECT follower_id, 'follow', id, 'insert', NULL, created_at FROM follows ORDER BY id
+        ''')
+        cur.execute('''
+        INSERT INTO changes (user_id, entity, entity_id, op, version, created_at)
+        SELECT user_id, 'profile', user_id, 'update', NULL, COALESCE(updated_at, '') FROM profiles
+        ''')
+
+
 def init_db():
     conn = _get_conn()
     cur = conn.cursor()
+    # readers (exports, the feed) and writers don't block each other; the mode persists in the file,
+    # and every connection waits up to BUSY_TIMEOUT for the single writer (see _get_conn)
+    cur.execute('PRAGMA journal_mode=WAL')
     cur.execute('''
     CREATE TABLE IF NOT EXISTS saved_trips (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -42,28 +627,750 @@ def init_db():
         updated_at TEXT
     )
     ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_saved_trips_user_created ON saved_trips (user_id, created_at DESC, id DESC)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_follows_follower ON follows (follower_id, followed_id)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_follows_followed ON follows (followed_id, follower_id)')
+    # trained zstd dictionaries referenced by compressed itinerary blobs
+    cur.execute('''
+    CREATE TABLE IF NOT EXISTS itinerary_dicts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_at TEXT NOT NULL,
+        sample_count INTEGER NOT NULL,
+        dict_data BLOB NOT NULL
+    )
+    ''')
+    _init_blobs(cur)
+    search_existed = _init_search(cur)
+    _init_feed_inbox(cur)
+    _init_versions(cur)
+    _init_itinerary_cache(cur)
+    _init_admission(cur)
+    _init_user_queries(cur)
+    _init_geocode_cache(cur)
+    _init_trip_costs(cur)
+    _init_trip_patches(cur)
+    _init_changes(cur)
+    # index trips saved before the index tables existed, or by other writers since the last start
+    _reindex_trips(cur, missing_only=search_existed)
     conn.commit()
     conn.close()
 
+class _GroupCommitWriter:
+    """Background thread that runs queued write functions in shared transactions.
+
+    Each write runs inside its own savepoint, so a failing write is rolled back
+    and reported to its caller without affecting the rest of the batch.
+    """
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def submit(self, write, *args) -> Future:
+        """Queue write(cur, *args); the future resolves to its result once committed."""
+        if self._pid != os.getpid():
+            # (re)start per process: the thread of a preloading parent doesn't survive fork
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=10 * self.max_batch)
+                    threading.Thread(target=self._run, args=(self._queue,), name='db-group-commit',
+                                     daemon=True).start()
+                    self._pid = os.getpid()
+        future = Future()
+        self._queue.put((write, args, future), timeout=GROUP_COMMIT_TIMEOUT)
+        return future
+
+    def _run(self, q):
+        while True:
+            batch = [q.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        done = []
+        try:
+            conn = _get_conn()
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        try:
+            cur = conn.cursor()
+            cur.execute('BEGIN IMMEDIATE')
+            for write, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    # withdrawn by a caller that stopped waiting (see _write)
+                    continue
+                cur.execute('SAVEPOINT group_write')
+                try:
+                    result = write(cur, *args)
+                except Exception as e:
+                    cur.execute('ROLLBACK TO group_write')
+                    cur.execute('RELEASE group_write')
+                    future.set_exception(e)
+                    continue
+                cur.execute('RELEASE group_write')
+                done.append((future, result))
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            # fail every write not already failed on its own, including those never reached
+            self._fail(batch, e)
+        else:
+            for future, result in done:
+                future.set_result(result)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _fail(batch, e):
+        for _, _, future in batch:
+            # a pending future may be withdrawn concurrently; claiming it first settles the race
+            if not future.done() and (future.running() or future.set_running_or_notify_cancel()):
+                future.set_exception(e)
+
+
+_group_writer = _GroupCommitWriter(GROUP_COMMIT_WINDOW, GROUP_COMMIT_MAX_BATCH)
+
+
+def _write(write, *args):
+    """Run write(cur, *args) and commit, through the group-commit writer when enabled."""
+    if GROUP_COMMIT:
+        future = _group_writer.submit(write, *args)
+        try:
+            # bounded, so a stuck writer surfaces as an error instead of a hung request
+            return future.result(timeout=GROUP_COMMIT_TIMEOUT)
+        except FutureTimeoutError:
+            if future.cancel():
+                # never ran and now never will, so the caller may safely retry
+                raise
+            # already executing: it commits or fails with its batch shortly
+            return future.result()
+    conn = _get_conn()
+    try:
+        result = write(conn.cursor(), *args)
+        conn.commit()
+        return result
+    finally:
+        conn.close()
+
+
+def _insert_itinerary(cur, user_id: str, itinerary_json: str, created_at: str | None = None) -> int:
+    itinerary_hash = _store_blob(cur, itinerary_json)
+    cur.execute("INSERT INTO saved_trips (user_id, created_at, itinerary_json, itinerary_hash) VALUES (?, ?, '', ?)",
+                (user_id, created_at or datetime.utcnow().isoformat(), itinerary_hash))
+    trip_id = cur.lastrowid
+    _index_trip(cur, trip_id, itinerary_json)
+    return trip_id
+
+
 def save_itinerary(user_id: str, itinerary_json: str) -> int:
+    return _write(_insert_itinerary, user_id, itinerary_json)
+
+def get_itinerary(trip_id: int, user_id: str) -> Dict[str, Any] | None:
+    """One of user_id's saved trips, with its version; None if there is no such trip."""
     conn = _get_conn()
     cur = conn.cursor()
-    cur.execute('INSERT INTO saved_trips (user_id, created_at, itinerary_json) VALUES (?, ?, ?)',
-                (user_id, datetime.utcnow().isoformat(), itinerary_json))
+    cur.execute(f'SELECT t.id, t.user_id, t.created_at, t.version, {_trip_body_sql("t")} AS itinerary_json '
+                'FROM saved_trips t WHERE t.id = ? AND t.user_id = ?', (trip_id, user_id))
+    rows = cur.fetchall()
+    conn.close()
+    return _decode_rows(rows)[0] if rows else None
+
+
+def _update_itinerary(cur, trip_id: int, user_id: str, itinerary_json: str, version: int, patch_json: str):
+    itinerary_hash = _store_blob(cur, itinerary_json)
+    # compare-and-set: only the version the patch was applied to may be replaced
+    cur.execute("UPDATE saved_trips SET itinerary_hash = ?, itinerary_json = '', version = version + 1 "
+                'WHERE id = ? AND user_id = ? AND version = ?', (itinerary_hash, trip_id, user_id, version))
+    if not cur.rowcount:
+        if not _blob_referenced(cur, itinerary_hash):
+            cur.execute('DELETE FROM itinerary_blobs WHERE hash = ?', (itinerary_hash,))
+        return None
+    _index_trip(cur, trip_id, itinerary_json)
+    cur.execute('INSERT INTO trip_patches (trip_id, version, patch, created_at) VALUES (?, ?, ?, ?)',
+                (trip_id, version + 1, patch_json, datetime.utcnow().isoformat()))
+    return version + 1
+
+
+def _blob_referenced(cur, itinerary_hash: str) -> bool:
+    cur.execute('SELECT ref_count FROM itinerary_blobs WHERE hash = ?', (itinerary_hash,))
+    row = cur.fetchone()
+    return bool(row and row['ref_count'] > 0)
+
+
+def update_itinerary(trip_id: int, user_id: str, itinerary_json: str, version: int, patch_json: str) -> int | None:
+    """Replace a saved trip's itinerary if it is still at version; returns the new version, else None.
+
+    patch_json, the JSON Patch from the stored itinerary at version to
+    itinerary_json, is kept in trip_patches for GET /changes.
+    """
+    return _write(_update_itinerary, trip_id, user_id, itinerary_json, version, patch_json)
+
+
+def list_itineraries(user_id: str, max_cost: float | None = None, currency: str = 'USD') -> List[Dict[str, Any]]:
+    """user_id's saved trips, newest first; with max_cost, only trips costing at most that in currency."""
+    where, args = 't.user_id = ?', [user_id]
+    if max_cost is not None:
+        # trips priced only with free items have no currency, and cost nothing in any of them
+        where += ' AND t.id IN (SELECT trip_id FROM trip_costs WHERE (currency = ? OR currency IS NULL) AND max_cost <= ?)'
+        args += [currency, max_cost]
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute(f'SELECT t.id, t.user_id, t.created_at, t.version, {_trip_body_sql("t")} AS itinerary_json '
+                f'FROM saved_trips t WHERE {where} ORDER BY t.created_at DESC', args)
+    rows = cur.fetchall()
+    conn.close()
+    return _decode_rows(rows)
+
+
+def iter_itineraries(user_id: str, batch_size: int = 500):
+    """Yield user_id's saved trips oldest first, fetching batch_size rows at a time.
+
+    Each batch is its own short keyset query, finished before its rows are
+    yielded, so a slow reader never holds a read lock between batches.
+    """
+    last_id = 0
+    while True:
+        conn = _get_conn()
+        try:
+            cur = conn.cursor()
+            cur.execute(f'SELECT t.id, t.created_at, {_trip_body_sql("t")} AS itinerary_json FROM saved_trips t '
+                        'WHERE t.user_id = ? AND t.id > ? ORDER BY t.id LIMIT ?', (user_id, last_id, batch_size))
+            rows = cur.fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        for r in rows:
+            yield r['id'], r['created_at'], _decode_itinerary(r['itinerary_json'])
+        last_id = rows[-1]['id']
+
+
+def import_itineraries(user_id: str, itineraries, batch_size: int = 500) -> int:
+    """Bulk-insert (itinerary_json, created_at or None) pairs for user_id.
+
+    Consumes the iterable lazily and commits once per batch_size rows.
+    Returns the number of trips inserted.
+    """
+    rows = ((user_id, itinerary_json, created_at) for itinerary_json, created_at in itineraries)
+    return bulk_insert_itineraries(rows, batch_size)
+
+
+def bulk_insert_itineraries(rows, batch_size: int = 500) -> int:
+    """Bulk-insert (user_id, itinerary_json, created_at or None) rows for any number of users.
+
+    Same batching as import_itineraries, which is this for a single user.
+    """
+    inserted = 0
+    conn = _get_conn()
+    cur = conn.cursor()
+
+    try:
+        pending = 0
+        for user_id, itinerary_json, created_at in rows:
+            _insert_itinerary(cur, user_id, itinerary_json, created_at)
+            pending += 1
+            if pending >= batch_size:
+                conn.commit()
+                inserted += pending
+                pending = 0
+        if pending:
+            conn.commit()
+            inserted += pending
+    finally:
+        # a failure mid-batch must not leave blobs behind without referencing rows
+        conn.rollback()
+        conn.close()
+    return inserted
+
+
+def train_itinerary_dictionary(dict_size: int = 64 * 1024, max_samples: int = 5000) -> int | None:
+    """Train a zstd dictionary on the most recent saved trips and make it current.
+
+    Returns the new dictionary id, or None if there aren't enough trips yet.
+    """
+    global _current_dict_id, _current_dict_loaded
+    if not zstandard:
+        raise RuntimeError('zstandard is required to train an itinerary dictionary')
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('''
+    SELECT body FROM (
+        SELECT body, created_at FROM itinerary_blobs
+        UNION ALL
+        SELECT itinerary_json, created_at FROM saved_trips WHERE itinerary_hash IS NULL
+    ) ORDER BY created_at DESC LIMIT ?
+    ''', (max_samples,))
+    samples = [_decode_itinerary(r[0]).encode('utf-8') for r in cur.fetchall()]
+    if len(samples) < MIN_DICT_SAMPLES:
+        conn.close()
+        return None
+    try:
+        zdict = zstandard.train_dictionary(dict_size, samples)
+    except zstandard.ZstdError:
+        conn.close()
+        return None
+    cur.execute('INSERT INTO itinerary_dicts (created_at, sample_count, dict_data) VALUES (?, ?, ?)',
+                (datetime.utcnow().isoformat(), len(samples), zdict.as_bytes()))
     conn.commit()
-    rowid = cur.lastrowid
+    dict_id = cur.lastrowid
     conn.close()
-    return rowid
+    with _dict_lock:
+        _dicts[dict_id] = zdict
+        _current_dict_id = dict_id
+        _current_dict_loaded = True
+    return dict_id
+
+
+def _is_current_encoding(value, dict_id: int | None) -> bool:
+    if isinstance(value, str):
+        return False
+    if dict_id is None:
+        return value[0] == CODEC_ZSTD
+    return value[0] == CODEC_ZSTD_DICT and int.from_bytes(value[1:5], 'big') == dict_id
+
+
+# (select, update) pairs covering every place an itinerary body is stored
+_BODY_LOCATIONS = (
+    ('SELECT rowid AS id, body FROM itinerary_blobs WHERE rowid > ? ORDER BY rowid LIMIT ?',
+     'UPDATE itinerary_blobs SET body = ? WHERE rowid = ?'),
+    ('SELECT id, itinerary_json AS body FROM saved_trips WHERE itinerary_hash IS NULL AND id > ? ORDER BY id LIMIT ?',
+     'UPDATE saved_trips SET itinerary_json = ? WHERE id = ?'),
+    ('SELECT rowid AS id, itinerary_json AS body FROM itinerary_cache WHERE rowid > ? ORDER BY rowid LIMIT ?',
+     'UPDATE itinerary_cache SET itinerary_json = ? WHERE rowid = ?'),
+)
+
+
+def recompress_itineraries(batch_size: int = 500) -> int:
+    """Re-encode stored itineraries not yet using the current codec/dictionary.
+
+    Works in id order, one transaction per batch, so it can run against a
+    live database and be resumed. Returns the number of bodies rewritten.
+    """
+    if ITINERARY_CODEC != 'zstd' or not zstandard:
+        return 0
+    rewritten = 0
+    conn = _get_conn()
+    cur = conn.cursor()
+    dict_id, _ = _current_dict(cur)
+    for select_sql, update_sql in _BODY_LOCATIONS:
+        last_id = 0
+        while True:
+            cur.execute(select_sql, (last_id, batch_size))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            updates = []
+            for r in rows:
+                if _is_current_encoding(r['body'], dict_id):
+                    continue
+                encoded = _encode_itinerary(cur, _decode_itinerary(r['body']))
+                if encoded != r['body']:
+                    updates.append((encoded, r['id']))
+            if updates:
+                cur.executemany(update_sql, updates)
+                conn.commit()
+                rewritten += len(updates)
+    conn.close()
+    return rewritten
+
+
+def dedupe_itineraries(batch_size: int = 500) -> int:
+    """Move inline itinerary bodies of older saved_trips rows into itinerary_blobs.
+
+    Returns the number of rows migrated; identical itineraries end up sharing one blob.
+    """
+    migrated = 0
+    conn = _get_conn()
+    cur = conn.cursor()
+    while True:
+        cur.execute('SELECT id, itinerary_json FROM saved_trips WHERE itinerary_hash IS NULL ORDER BY id LIMIT ?',
+                    (batch_size,))
+        rows = cur.fetchall()
+        if not rows:
+            break
+        updates = [(_store_blob(cur, _decode_itinerary(r['itinerary_json'])), r['id']) for r in rows]
+        cur.executemany("UPDATE saved_trips SET itinerary_hash = ?, itinerary_json = '' WHERE id = ?", updates)
+        conn.commit()
+        migrated += len(updates)
+    conn.close()
+    return migrated
+
+
+_CACHE_PARAMS = ('destination', 'duration', 'budget', 'preferences', 'departure_location')
+
+
+def get_cached_itinerary(cache_key: str) -> str | None:
+    """Return the unexpired cached itinerary JSON for cache_key (counting the hit), or None."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('SELECT itinerary_json FROM itinerary_cache WHERE cache_key = ? AND expires_at > ?',
+                (cache_key, datetime.utcnow().isoformat()))
+    row = cur.fetchone()
+    if row:
+        cur.execute('UPDATE itinerary_cache SET hits = hits + 1 WHERE cache_key = ?', (cache_key,))
+        conn.commit()
+    conn.close()
+    return _decode_itinerary(row['itinerary_json']) if row else None
+
+
+def put_cached_itinerary(cache_key: str, params: Dict[str, Any], itinerary_json: str, ttl_seconds: int,
+                         source: str = 'request') -> None:
+    """Store (or refresh) a generated itinerary; params holds the normalized request fields."""
+    now = datetime.utcnow()
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO itinerary_cache (cache_key, destination, duration, budget, preferences, departure_location,
+                                     itinerary_json, source, created_at, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(cache_key) DO UPDATE SET itinerary_json = excluded.itinerary_json, source = excluded.source,
+            created_at = excluded.created_at, expires_at = excluded.expires_at
+    ''', (cache_key, *(params[k] for k in _CACHE_PARAMS), _encode_itinerary(cur, itinerary_json), source,
+          now.isoformat(), (now + timedelta(seconds=ttl_seconds)).isoformat()))
+    conn.commit()
+    conn.close()
+
 
-def list_itineraries(user_id: str) -> List[Dict[str, Any]]:
+def get_cache_expiries(cache_keys: List[str]) -> Dict[str, str]:
+    """Map each cached key among cache_keys to its expires_at."""
+    if not cache_keys:
+        return {}
     conn = _get_conn()
     cur = conn.cursor()
-    cur.execute('SELECT id, user_id, created_at, itinerary_json FROM saved_trips WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
+    cur.execute(f'SELECT cache_key, expires_at FROM itinerary_cache WHERE cache_key IN ({",".join("?" * len(cache_keys))})',
+                list(cache_keys))
+    rows = cur.fetchall()
+    conn.close()
+    return {r['cache_key']: r['expires_at'] for r in rows}
+
+
+def purge_expired_itineraries() -> int:
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('DELETE FROM itinerary_cache WHERE expires_at <= ?', (datetime.utcnow().isoformat(),))
+    conn.commit()
+    deleted = cur.rowcount
+    conn.close()
+    return deleted
+
+
+def record_itinerary_request(cache_key: str, params: Dict[str, Any]) -> None:
+    """Count a request for these normalized parameters (feeds popular_itinerary_requests)."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO itinerary_requests (cache_key, destination, duration, budget, preferences, departure_location,
+                                        request_count, last_requested_at)
+        VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+        ON CONFLICT(cache_key) DO UPDATE SET request_count = request_count + 1,
+            last_requested_at = excluded.last_requested_at
+    ''', (cache_key, *(params[k] for k in _CACHE_PARAMS), datetime.utcnow().isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def popular_itinerary_requests(limit: int = 50, min_count: int = 2) -> List[Dict[str, Any]]:
+    """Most requested parameter combinations, most popular first."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('SELECT cache_key, destination, duration, budget, preferences, departure_location, request_count '
+                'FROM itinerary_requests WHERE request_count >= ? ORDER BY request_count DESC LIMIT ?',
+                (min_count, limit))
     rows = cur.fetchall()
     conn.close()
     return [dict(r) for r in rows]
 
 
+def claim_warmer_run(run_key: str) -> bool:
+    """Atomically claim a warmer run; False if another process already started it."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('INSERT OR IGNORE INTO cache_warmer_runs (run_key, started_at) VALUES (?, ?)',
+                (run_key, datetime.utcnow().isoformat()))
+    conn.commit()
+    claimed = cur.rowcount == 1
+    conn.close()
+    return claimed
+
+
+def finish_warmer_run(run_key: str, warmed: int, failed: int) -> None:
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('UPDATE cache_warmer_runs SET finished_at = ?, warmed = ?, failed = ? WHERE run_key = ?',
+                (datetime.utcnow().isoformat(), warmed, failed, run_key))
+    conn.commit()
+    conn.close()
+
+
+def _immediate(write, *args):
+    """Run write(cur, *args) in its own BEGIN IMMEDIATE transaction on a fresh connection.
+
+    For admission decisions, which must not queue behind a group-commit batch.
+    IMMEDIATE takes the write lock up front, so concurrent workers can't both
+    spend the last token or claim the last slot.
+    """
+    conn = _get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        result = write(cur, *args)
+        conn.commit()
+        return result
+    finally:
+        conn.close()
+
+
+def _take_rate_token(cur, client_key: str, rate: float, burst: float, now: float) -> float:
+    cur.execute('SELECT tokens, updated_at FROM rate_buckets WHERE client_key = ?', (client_key,))
+    row = cur.fetchone()
+    tokens = burst if row is None else min(burst, row['tokens'] + max(0.0, now - row['updated_at']) * rate)
+    if tokens >= 1:
+        tokens -= 1
+        wait = 0.0
+    else:
+        wait = (1 - tokens) / rate
+    cur.execute('INSERT INTO rate_buckets (client_key, tokens, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(client_key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at',
+                (client_key, tokens, now))
+    if random.random() < 0.001:
+        # buckets idle long enough to have refilled are equivalent to no row at all
+        cur.execute('DELETE FROM rate_buckets WHERE updated_at < ?', (now - burst / rate,))
+    return wait
+
+
+def _acquire_llm_slot(cur, holder: str, limit: int, lease_seconds: float, now: float) -> bool:
+    cur.execute('''
+        WITH RECURSIVE n(slot) AS (SELECT 1 UNION ALL SELECT slot + 1 FROM n WHERE slot < ?)
+        INSERT OR IGNORE INTO llm_slots (slot) SELECT slot FROM n
+    ''', (limit,))
+    cur.execute('''
+        UPDATE llm_slots SET holder = ?, acquired_at = ? WHERE slot = (
+            SELECT slot FROM llm_slots WHERE slot <= ? AND (holder IS NULL OR acquired_at < ?) ORDER BY slot LIMIT 1)
+    ''', (holder, now, limit, now - lease_seconds))
+    return cur.rowcount == 1
+
+
+def _admit_llm_call(cur, client_key, rate, burst, holder, limit, lease_seconds, now) -> tuple[float, bool]:
+    wait = _take_rate_token(cur, client_key, rate, burst, now)
+    if wait > 0:
+        return wait, False
+    return 0.0, _acquire_llm_slot(cur, holder, limit, lease_seconds, now)
+
+
+def take_rate_token(client_key: str, rate: float, burst: float, now: float | None = None) -> float:
+    """Take one token from client_key's bucket, refilled at rate tokens/second up to burst.
+
+    Returns 0 if a token was taken, otherwise the seconds until one is available.
+    """
+    now = time.time() if now is None else now
+    return _immediate(_take_rate_token, client_key, rate, burst, now)
+
+
+def acquire_llm_slot(holder: str, limit: int, lease_seconds: float, now: float | None = None) -> bool:
+    """Claim one of limit shared LLM call slots for holder; False if all are taken.
+
+    Slots held longer than lease_seconds (e.g. by a crashed worker) are reclaimed.
+    """
+    now = time.time() if now is None else now
+    return _immediate(_acquire_llm_slot, holder, limit, lease_seconds, now)
+
+
+def admit_llm_call(client_key: str, rate: float, burst: float, holder: str, limit: int, lease_seconds: float,
+                   now: float | None = None) -> tuple[float, bool]:
+    """take_rate_token and, if a token was taken, acquire_llm_slot, in one transaction.
+
+    Returns (wait, acquired). A rate-limited call (wait > 0) claims no slot.
+    """
+    now = time.time() if now is None else now
+    return _immediate(_admit_llm_call, client_key, rate, burst, holder, limit, lease_seconds, now)
+
+
+def release_llm_slot(holder: str) -> None:
+    conn = _get_conn()
+    try:
+        # one autocommitted statement, without a separate BEGIN and COMMIT
+        conn.isolation_level = None
+        conn.execute('UPDATE llm_slots SET holder = NULL, acquired_at = NULL WHERE holder = ?', (holder,))
+    finally:
+        conn.close()
+
+
+def get_geocodes(address_keys: List[str], negative_ttl_seconds: int, provider: str | None = None) -> Dict[str, tuple | None]:
+    """Cached coordinates for address_keys: (lat, lng), or None for a cached miss.
+
+    Misses older than negative_ttl_seconds are left out, so they get retried.
+    With provider, only that geocoder's results count. Keys that were never
+    looked up are absent.
+    """
+    if not address_keys:
+        return {}
+    cutoff = (datetime.utcnow() - timedelta(seconds=negative_ttl_seconds)).isoformat()
+    provider_clause = 'AND provider = ?' if provider else ''
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute(f'SELECT address_key, lat, lng FROM geocode_cache WHERE address_key IN ({",".join("?" * len(address_keys))}) '
+                f'AND (lat IS NOT NULL OR created_at > ?) {provider_clause}',
+                [*address_keys, cutoff, *([provider] if provider else [])])
+    rows = cur.fetchall()
+    conn.close()
+    return {r['address_key']: (r['lat'], r['lng']) if r['lat'] is not None else None for r in rows}
+
+
+def put_geocodes(results: Dict[str, tuple | None], provider: str) -> None:
+    """Store geocoder results keyed by normalized address; None records a miss."""
+    if not results:
+        return
+    now = datetime.utcnow().isoformat()
+    conn = _get_conn()
+    conn.executemany('INSERT OR REPLACE INTO geocode_cache (address_key, lat, lng, provider, created_at) '
+                     'VALUES (?, ?, ?, ?, ?)',
+                     [(key, *(coords or (None, None)), provider, now) for key, coords in results.items()])
+    conn.commit()
+    conn.close()
+
+
+def insert_user_queries(records) -> int:
+    """Insert (query_text, response_data, created_at) records in one transaction."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.executemany('INSERT INTO trip_planner_userquery (query_text, response_data, created_at) VALUES (?, ?, ?)',
+                    [(text, jsoncodec.dumps(data), created_at.isoformat(sep=' ')) for text, data, created_at in records])
+    conn.commit()
+    conn.close()
+    return len(records)
+
+
+def _fts_query(text: str) -> str | None:
+    """Turn free text into a safe FTS5 query (quoted terms, prefix match on the last)."""
+    terms = re.findall(r'\w+', text or '')
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_itineraries(user_id: str, query: str, scope: str = 'mine', limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+    """Full-text search over saved trips, best matches first.
+
+    scope is 'mine' (user_id's own trips), 'following' (trips of people
+    user_id follows) or 'all' (both).
+    """
+    match = _fts_query(query)
+    if not match:
+        return []
+    if scope == 'mine':
+        owner_clause = 't.user_id = ?'
+        owner_args = (user_id,)
+    elif scope == 'following':
+        owner_clause = 't.user_id IN (SELECT followed_id FROM follows WHERE follower_id = ?)'
+        owner_args = (user_id,)
+    elif scope == 'all':
+        owner_clause = '(t.user_id = ? OR t.user_id IN (SELECT followed_id FROM follows WHERE follower_id = ?))'
+        owner_args = (user_id, user_id)
+    else:
+        raise ValueError(f'Unknown search scope: {scope}')
+
+    weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute(f'''
+    SELECT t.id, t.user_id, t.created_at, {_trip_body_sql('t')} AS itinerary_json,
+           snippet(saved_trips_fts, -1, '[', ']', '...', 12) AS snippet,
+           bm25(saved_trips_fts, {weights}) AS rank
+    FROM saved_trips_fts
+    JOIN saved_trips t ON t.id = saved_trips_fts.rowid
+    WHERE saved_trips_fts MATCH ? AND {owner_clause}
+    ORDER BY rank
+    LIMIT ? OFFSET ?
+    ''', (match, *owner_args, limit, offset))
+    rows = cur.fetchall()
+    conn.close()
+    return _decode_rows(rows)
+
+
+# one row per followed user (follows may hold duplicates) carrying the cached profile
+_FEED_AUTHORS = '''
+    SELECT f.followed_id, f.name, f.username, f.picture
+    FROM follows f
+    WHERE f.id IN (SELECT MIN(id) FROM follows WHERE follower_id = ? GROUP BY followed_id)
+'''
+
+
+def list_feed(follower_id: str, limit: int = 20, before: tuple | None = None) -> List[Dict[str, Any]]:
+    """Return the most recent trips across everyone follower_id follows.
+
+    before is the (created_at, id) of the last trip on the previous page.
+    Followers with a materialized inbox read from it; everyone else gets a
+    single join of follows against the (user_id, created_at) trip index.
+    """
+    cursor_clause = 'AND (t.created_at, t.id) < (?, ?)' if before else ''
+    inbox_cursor_clause = 'AND (i.created_at, i.trip_id) < (?, ?)' if before else ''
+    cursor_args = tuple(before) if before else ()
+
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('SELECT 1 FROM feed_inbox_owners WHERE follower_id = ?', (follower_id,))
+    if cur.fetchone():
+        cur.execute(f'''
+        SELECT t.id, t.user_id, t.created_at, {_trip_body_sql('t')} AS itinerary_json, a.name, a.username, a.picture
+        FROM feed_inbox i
+        JOIN saved_trips t ON t.id = i.trip_id
+        LEFT JOIN ({_FEED_AUTHORS}) a ON a.followed_id = t.user_id
+        WHERE i.follower_id = ? {inbox_cursor_clause}
+        ORDER BY i.created_at DESC, i.trip_id DESC
+        LIMIT ?
+        ''', (follower_id, follower_id, *cursor_args, limit))
+    else:
+        cur.execute(f'''
+        SELECT t.id, t.user_id, t.created_at, {_trip_body_sql('t')} AS itinerary_json, a.name, a.username, a.picture
+        FROM ({_FEED_AUTHORS}) a
+        JOIN saved_trips t ON t.user_id = a.followed_id
+        WHERE 1 = 1 {cursor_clause}
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT ?
+        ''', (follower_id, *cursor_args, limit))
+    rows = cur.fetchall()
+    conn.close()
+    return _decode_rows(rows)
+
+
+def _materialize_feed_inbox(cur, follower_id: str) -> None:
+    cur.execute('INSERT OR IGNORE INTO feed_inbox_owners (follower_id, created_at) VALUES (?, ?)',
+                (follower_id, datetime.utcnow().isoformat()))
+    cur.execute('''
+    INSERT OR IGNORE INTO feed_inbox (follower_id, created_at, trip_id)
+    SELECT ?, t.created_at, t.id
+    FROM saved_trips t
+    WHERE t.user_id IN (SELECT followed_id FROM follows WHERE follower_id = ?)
+    ''', (follower_id, follower_id))
+
+
+def materialize_feed_inbox(follower_id: str) -> None:
+    """Switch follower_id to a materialized inbox, backfilling it from current follows."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    _materialize_feed_inbox(cur, follower_id)
+    conn.commit()
+    conn.close()
+
+
 def list_follows(follower_id: str) -> List[Dict[str, Any]]:
     """Return list of followed people for a given follower_id."""
     conn = _get_conn()
@@ -84,17 +1391,171 @@ def get_followed_profile(followed_id: str) -> Dict[str, Any] | None:
     return dict(row) if row else None
 
 
-def save_follow(follower_id: str, followed_id: str, name: str | None = None, username: str | None = None, bio: str | None = None, picture: str | None = None) -> int:
+def get_followed_profiles(followed_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Batch version of get_followed_profile: one IN (...) query, keyed by id."""
+    ids = list(dict.fromkeys(followed_ids))
+    if not ids:
+        return {}
+    placeholders = ', '.join('?' for _ in ids)
     conn = _get_conn()
     cur = conn.cursor()
+    cur.execute(f'''
+    SELECT followed_id as id, name, username, bio, picture, created_at FROM follows
+    WHERE id IN (SELECT MIN(id) FROM follows WHERE followed_id IN ({placeholders}) GROUP BY followed_id)
+    ''', ids)
+    rows = cur.fetchall()
+    conn.close()
+    return {r['id']: dict(r) for r in rows}
+
+
+def _insert_follow(cur, follower_id, followed_id, name, username, bio, picture) -> int:
     cur.execute('INSERT INTO follows (follower_id, followed_id, name, username, bio, picture, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
                 (follower_id, followed_id, name, username, bio, picture, datetime.utcnow().isoformat()))
-    conn.commit()
     rowid = cur.lastrowid
-    conn.close()
+    # heavy followers switch to a fan-out-on-write inbox (the follow trigger keeps it current afterwards)
+    cur.execute('SELECT COUNT(DISTINCT followed_id) FROM follows WHERE follower_id = ?', (follower_id,))
+    if cur.fetchone()[0] >= FEED_INBOX_THRESHOLD:
+        cur.execute('SELECT 1 FROM feed_inbox_owners WHERE follower_id = ?', (follower_id,))
+        if not cur.fetchone():
+            _materialize_feed_inbox(cur, follower_id)
     return rowid
 
 
+def save_follow(follower_id: str, followed_id: str, name: str | None = None, username: str | None = None, bio: str | None = None, picture: str | None = None) -> int:
+    return _write(_insert_follow, follower_id, followed_id, name, username, bio, picture)
+
+
+def bulk_insert_follows(rows, batch_size: int = 5000) -> int:
+    """Bulk-insert (follower_id, followed_id, name, username, bio, picture, created_at or None) rows.
+
+    Commits once per batch_size rows. Afterwards, followers who reached
+    FEED_INBOX_THRESHOLD get a materialized inbox, as save_follow would
+    have given them one follow at a time.
+    """
+    inserted = 0
+    conn = _get_conn()
+    cur = conn.cursor()
+
+    def flush(batch):
+        cur.executemany('INSERT INTO follows (follower_id, followed_id, name, username, bio, picture, created_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+        conn.commit()
+        return len(batch)
+
+    try:
+        batch = []
+        for follower_id, followed_id, name, username, bio, picture, created_at in rows:
+            batch.append((follower_id, followed_id, name, username, bio, picture,
+                          created_at or datetime.utcnow().isoformat()))
+            if len(batch) >= batch_size:
+                inserted += flush(batch)
+                batch = []
+        if batch:
+            inserted += flush(batch)
+
+        cur.execute('SELECT follower_id FROM follows GROUP BY follower_id HAVING COUNT(DISTINCT followed_id) >= ? '
+                    'EXCEPT SELECT follower_id FROM feed_inbox_owners', (FEED_INBOX_THRESHOLD,))
+        for (follower_id,) in cur.fetchall():
+            _materialize_feed_inbox(cur, follower_id)
+        conn.commit()
+    finally:
+        conn.rollback()
+        conn.close()
+    return inserted
+
+
+def _trip_patches(cur, trip_id: int, from_version: int, to_version: int) -> list | None:
+    """The patches taking trip_id from from_version to to_version, or None if any is missing."""
+    cur.execute('SELECT version, patch FROM trip_patches WHERE trip_id = ? AND version > ? AND version <= ? '
+                'ORDER BY version', (trip_id, from_version, to_version))
+    rows = cur.fetchall()
+    if [r['version'] for r in rows] != list(range(from_version + 1, to_version + 1)):
+        return None
+    return [jsoncodec.loads(r['patch']) for r in rows]
+
+
+def list_changes(user_id: str, since: int = 0, limit: int = 100) -> tuple[List[Dict[str, Any]], int, bool]:
+    """Changes to user_id's trips, follows and profile after seq since.
+
+    Returns (changes, last_seq, has_more). limit counts log rows; several
+    rows for the same trip, follow or profile collapse into one change
+    carrying its current state, at the seq of the last of them. A trip
+    that was only edited with PATCH comes with the patches since the
+    version the client last saw (from_version) instead of the whole
+    itinerary. last_seq is the since to pass next time.
+    """
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('SELECT seq, entity, entity_id, op, version FROM changes WHERE user_id = ? AND seq > ? '
+                'ORDER BY seq LIMIT ?', (user_id, since, limit + 1))
+    rows = cur.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    groups: Dict[tuple, list] = {}
+    for r in rows:
+        groups.setdefault((r['entity'], r['entity_id']), []).append(r)
+
+    def current(entity, sql):
+        ids = [int(entity_id) for kind, entity_id in groups if kind == entity]
+        if not ids:
+            return {}
+        cur.execute(sql.format(', '.join('?' for _ in ids)), (*ids, user_id))
+        return {r['id']: r for r in cur.fetchall()}
+
+    trips = current('trip', f'SELECT t.id, t.created_at, t.version, {_trip_body_sql("t")} AS itinerary_json '
+                            'FROM saved_trips t WHERE t.id IN ({}) AND t.user_id = ?')
+    follows = current('follow', 'SELECT id, follower_id, followed_id, name, username, bio, picture, created_at '
+                                'FROM follows WHERE id IN ({}) AND follower_id = ?')
+
+    changes = []
+    for (entity, entity_id), group in groups.items():
+        change = {'seq': group[-1]['seq'], 'type': entity, 'id': entity_id, 'op': 'upsert'}
+        if entity == 'trip':
+            change['id'] = trip_id = int(entity_id)
+            trip = trips.get(trip_id)
+            if trip is None:
+                change['op'] = 'delete'
+            else:
+                change['version'] = trip['version']
+                patches = None
+                if all(r['op'] == 'update' for r in group):
+                    from_version = min(r['version'] for r in group) - 1
+                    patches = _trip_patches(cur, trip_id, from_version, trip['version'])
+                if patches is not None:
+                    change.update(from_version=from_version, patches=patches)
+                else:
+                    change.update(created_at=trip['created_at'],
+                                  itinerary_json=_decode_itinerary(trip['itinerary_json']))
+        elif entity == 'follow':
+            change['id'] = follow_id = int(entity_id)
+            follow = follows.get(follow_id)
+            if follow is None:
+                change['op'] = 'delete'
+            else:
+                change['follow'] = dict(follow)
+        else:
+            cur.execute('SELECT bio, updated_at FROM profiles WHERE user_id = ?', (user_id,))
+            profile = cur.fetchone()
+            if profile is None:
+                change['op'] = 'delete'
+            else:
+                change['profile'] = {'id': user_id, **dict(profile)}
+        changes.append(change)
+    conn.close()
+    changes.sort(key=lambda c: c['seq'])
+    return changes, rows[-1]['seq'] if rows else since, has_more
+
+
+def get_user_version(user_id: str) -> tuple[int, str | None]:
+    """Return (version, updated_at) of user_id's data; (0, None) if never written."""
+    conn = _get_conn()
+    cur = conn.cursor()
+    cur.execute('SELECT version, updated_at FROM user_versions WHERE user_id = ?', (user_id,))
+    row = cur.fetchone()
+    conn.close()
+    return (row['version'], row['updated_at']) if row else (0, None)
+
+
 def get_profile(user_id: str) -> dict | None:
     conn = _get_conn()
     cur = conn.cursor()
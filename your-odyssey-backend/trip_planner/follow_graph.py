@@ -0,0 +1,180 @@
+"""In-memory index of the follow graph: counts and "people you may know".
+
+The follows table answers one hop at a time. Counting followers or finding
+friends of friends in SQL means scans or self-joins that grow with the
+table, so each process keeps the graph in memory instead. Users get compact
+integer ids, and each direction (following, followers) is stored CSR-style:
+an offsets array plus one flat array of neighbour ids, sorted per user.
+
+The index follows the table incrementally. Reads first load rows with an id
+above the last one seen (at most every FOLLOW_GRAPH_REFRESH seconds), so
+follows written by save_follow in any worker, or by bulk loads, show up
+without a rebuild. New edges go into small per-user sets and are folded
+into the arrays once they reach FOLLOW_GRAPH_COMPACT_RATIO of the edges.
+"""
+import heapq
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from trip_planner import db as tp_db
+
+REFRESH_INTERVAL = float(os.getenv('FOLLOW_GRAPH_REFRESH', '1'))
+COMPACT_RATIO = float(os.getenv('FOLLOW_GRAPH_COMPACT_RATIO', '0.1'))
+MIN_COMPACT = 1000
+# bounds the friends-of-friends walk when the people a user follows follow many others
+SCAN_LIMIT = int(os.getenv('FOLLOW_GRAPH_SCAN_LIMIT', '200000'))
+POPULAR_SIZE = 100
+
+
+def _csr(num_nodes: int, edges: list) -> tuple:
+    """(offsets, targets) for sorted, duplicate-free (source, target) pairs."""
+    offsets = array('q', bytes(8 * (num_nodes + 1)))
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for i in range(num_nodes):
+        offsets[i + 1] += offsets[i]
+    return offsets, array('l', (target for _, target in edges))
+
+
+class FollowGraph:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self._ids = {}
+        self._names = []
+        self._last_id = 0
+        self._refreshed_at = 0.0
+        self._out = self._in = (array('q', [0]), array('l'))
+        self._out_delta = defaultdict(set)
+        self._in_delta = defaultdict(set)
+        self._edges = 0
+        self._delta_edges = 0
+        self._popular = []
+
+    def _intern(self, user_id: str) -> int:
+        node = self._ids.get(user_id)
+        if node is None:
+            node = self._ids[user_id] = len(self._names)
+            self._names.append(user_id)
+        return node
+
+    @staticmethod
+    def _base(csr, node: int):
+        offsets, targets = csr
+        if node + 1 >= len(offsets):
+            return targets[0:0]
+        return targets[offsets[node]:offsets[node + 1]]
+
+    def _has_edge(self, source: int, target: int) -> bool:
+        if target in self._out_delta.get(source, ()):
+            return True
+        base = self._base(self._out, source)
+        i = bisect_left(base, target)
+        return i < len(base) and base[i] == target
+
+    def _neighbours(self, csr, delta, node: int):
+        base = self._base(csr, node)
+        extra = delta.get(node)
+        return list(base) + list(extra) if extra else base
+
+    def _refresh(self, force: bool = False):
+        # each process builds its own copy on first use, since gunicorn forks
+        # workers from the preloaded app
+        if self._pid != os.getpid():
+            self._reset()
+            self._pid = os.getpid()
+            force = True
+        now = time.monotonic()
+        if not force and now - self._refreshed_at < REFRESH_INTERVAL:
+            return
+        self._refreshed_at = now
+        conn = tp_db._get_conn()
+        try:
+            rows = conn.execute('SELECT id, follower_id, followed_id FROM follows WHERE id > ? ORDER BY id',
+                                (self._last_id,)).fetchall()
+        finally:
+            conn.close()
+        for row_id, follower_id, followed_id in rows:
+            self._last_id = row_id
+            source, target = self._intern(follower_id), self._intern(followed_id)
+            if source == target or self._has_edge(source, target):
+                continue
+            self._out_delta[source].add(target)
+            self._in_delta[target].add(source)
+            self._delta_edges += 1
+        if self._delta_edges and (not self._edges or
+                                  self._delta_edges >= max(MIN_COMPACT, COMPACT_RATIO * self._edges)):
+            self._compact()
+
+    def _compact(self):
+        num_nodes = len(self._names)
+        edges = []
+        for source in range(num_nodes):
+            edges.extend((source, target) for target in self._neighbours(self._out, self._out_delta, source))
+        edges.sort()
+        self._out = _csr(num_nodes, edges)
+        edges.sort(key=lambda e: (e[1], e[0]))
+        self._in = _csr(num_nodes, [(target, source) for source, target in edges])
+        self._out_delta.clear()
+        self._in_delta.clear()
+        self._edges = len(edges)
+        self._delta_edges = 0
+        in_offsets = self._in[0]
+        # only users someone follows; padding with zero-follower accounts would be arbitrary
+        followed = (n for n in range(num_nodes) if in_offsets[n + 1] > in_offsets[n])
+        self._popular = heapq.nlargest(POPULAR_SIZE, followed, key=lambda n: in_offsets[n + 1] - in_offsets[n])
+
+    def _follower_count(self, node: int) -> int:
+        return len(self._base(self._in, node)) + len(self._in_delta.get(node, ()))
+
+    def counts(self, user_id: str) -> dict:
+        """{'followers': n, 'following': n} for user_id (zeros for unknown users)."""
+        with self._lock:
+            self._refresh()
+            node = self._ids.get(user_id)
+            if node is None:
+                return {'followers': 0, 'following': 0}
+            following = len(self._base(self._out, node)) + len(self._out_delta.get(node, ()))
+            return {'followers': self._follower_count(node), 'following': following}
+
+    def suggestions(self, user_id: str, limit: int = 10) -> list:
+        """People user_id may know, as (user_id, mutual, followers) tuples, best first.
+
+        Ranked by how many of the people user_id follows also follow them,
+        then by follower count. Padded with the most followed users when the
+        user follows few people; fewer than limit are returned rather than
+        padding with users nobody follows.
+        """
+        with self._lock:
+            self._refresh()
+            node = self._ids.get(user_id)
+            following = set(self._neighbours(self._out, self._out_delta, node)) if node is not None else set()
+            mutual = defaultdict(int)
+            scanned = 0
+            for friend in following:
+                friends_of_friend = self._neighbours(self._out, self._out_delta, friend)
+                for candidate in friends_of_friend:
+                    if candidate != node and candidate not in following:
+                        mutual[candidate] += 1
+                scanned += len(friends_of_friend)
+                if scanned >= SCAN_LIMIT:
+                    break
+            followers = {c: self._follower_count(c) for c in mutual}
+            ranked = heapq.nsmallest(limit, mutual, key=lambda c: (-mutual[c], -followers[c], self._names[c]))
+            for candidate in self._popular:
+                if len(ranked) >= limit:
+                    break
+                if candidate != node and candidate not in following and candidate not in mutual:
+                    ranked.append(candidate)
+                    followers[candidate] = self._follower_count(candidate)
+            return [(self._names[c], mutual.get(c, 0), followers[c]) for c in ranked]
+
+
+index = FollowGraph()
@@ -0,0 +1,256 @@
+"""Attach coordinates to itinerary activities when they are generated or saved.
+
+Each activity's address (or its location plus the destination name, if the
+address is a placeholder) is normalized and looked up in the geocode_cache
+table first. Only addresses that were never seen go to the geocoder, and
+its answers are stored, including misses, which are retried after
+GEOCODE_NEGATIVE_TTL. The frontend maps can then use activity.lat/lng
+instead of geocoding address strings on every view.
+
+The geocoder is chosen with GEOCODER:
+- 'gazetteer' (default): a local table of city coordinates. No network;
+  activities get their city's centre. Extend it with a CSV file of
+  name,lat,lng rows in GEOCODER_GAZETTEER_PATH.
+- 'nominatim': OpenStreetMap's Nominatim (GEOCODER_URL), throttled to one
+  request per GEOCODER_MIN_INTERVAL seconds per process, as its usage
+  policy requires.
+- 'none', or 'package.module:ClassName' for any class with a
+  geocode(query) -> (lat, lng) | None method and a name attribute (and
+  optionally precision, 'address' by default).
+
+Every located activity also gets geo_precision and geo_source (the
+geocoder's name). The gazetteer only knows city centres, so its results are
+marked 'city': route optimization ignores them, and a finer geocoder
+configured later replaces them. Coordinates without a precision were set by
+the client and are left alone. Cached results only count for the geocoder
+that produced them.
+
+Remote lookups run on a shared pool of GEOCODER_CONCURRENCY threads per
+process. One itinerary sends at most GEOCODE_MAX_LOOKUPS new addresses and
+waits at most GEOCODE_TIMEOUT seconds. Whatever is still running after that
+is cached when it finishes, and the activity is left without coordinates.
+"""
+import csv
+import importlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from trip_planner import db as tp_db
+from trip_planner import jsoncodec
+
+GEOCODER = os.getenv('GEOCODER', 'gazetteer')
+GAZETTEER_PATH = os.getenv('GEOCODER_GAZETTEER_PATH')
+GEOCODER_URL = os.getenv('GEOCODER_URL', 'https://nominatim.openstreetmap.org/search')
+USER_AGENT = os.getenv('GEOCODER_USER_AGENT', 'YourOdyssey/1.0')
+MIN_INTERVAL = float(os.getenv('GEOCODER_MIN_INTERVAL', '1'))
+CONCURRENCY = int(os.getenv('GEOCODER_CONCURRENCY', '4'))
+MAX_LOOKUPS = int(os.getenv('GEOCODE_MAX_LOOKUPS', '40'))
+TIMEOUT = float(os.getenv('GEOCODE_TIMEOUT', '5'))
+NEGATIVE_TTL = int(os.getenv('GEOCODE_NEGATIVE_TTL', str(24 * 3600)))
+
+# geo_precision values, coarsest first
+PRECISIONS = ('city', 'address')
+
+# Activity defaults (see trip_planner.models) that say nothing about where it is
+_PLACEHOLDERS = {'', 'address not available', 'unknown location'}
+
+# city centres for the gazetteer geocoder, keyed by ascii-folded lowercase name
+CITIES = {
+    'amsterdam': (52.3676, 4.9041), 'athens': (37.9838, 23.7275), 'bali': (-8.4095, 115.1889),
+    'bangkok': (13.7563, 100.5018), 'barcelona': (41.3874, 2.1686), 'beijing': (39.9042, 116.4074),
+    'berlin': (52.52, 13.405), 'boston': (42.3601, -71.0589), 'brooklyn': (40.6782, -73.9442),
+    'budapest': (47.4979, 19.0402), 'buenos aires': (-34.6037, -58.3816), 'cairo': (30.0444, 31.2357),
+    'cape town': (-33.9249, 18.4241), 'cascais': (38.6979, -9.4215), 'chicago': (41.8781, -87.6298),
+    'copenhagen': (55.6761, 12.5683), 'dubai': (25.2048, 55.2708), 'dublin': (53.3498, -6.2603),
+    'edinburgh': (55.9533, -3.1883), 'florence': (43.7696, 11.2558), 'hanoi': (21.0278, 105.8342),
+    'havana': (23.1136, -82.3666), 'helsinki': (60.1699, 24.9384), 'hong kong': (22.3193, 114.1694),
+    'honolulu': (21.3069, -157.8583), 'istanbul': (41.0082, 28.9784), 'jakarta': (-6.2088, 106.8456),
+    'kyoto': (35.0116, 135.7681), 'lake district': (54.4609, -3.0886), 'las vegas': (36.1699, -115.1398),
+    'lima': (-12.0464, -77.0428), 'lisbon': (38.7223, -9.1393), 'lisboa': (38.7223, -9.1393),
+    'london': (51.5074, -0.1278), 'los angeles': (34.0522, -118.2437), 'madrid': (40.4168, -3.7038),
+    'manhattan': (40.7831, -73.9712), 'marrakech': (31.6295, -7.9811), 'melbourne': (-37.8136, 144.9631),
+    'mexico city': (19.4326, -99.1332), 'miami': (25.7617, -80.1918), 'milan': (45.4642, 9.19),
+    'montreal': (45.5017, -73.5673), 'mumbai': (19.076, 72.8777), 'munich': (48.1351, 11.582),
+    'naples': (40.8518, 14.2681), 'new york': (40.7128, -74.006), 'new york city': (40.7128, -74.006),
+    'nikko': (36.7199, 139.6982), 'osaka': (34.6937, 135.5023), 'oslo': (59.9139, 10.7522),
+    'paris': (48.8566, 2.3522), 'prague': (50.0755, 14.4378), 'reykjavik': (64.1466, -21.9426),
+    'rio de janeiro': (-22.9068, -43.1729), 'rome': (41.9028, 12.4964), 'san francisco': (37.7749, -122.4194),
+    'sao paulo': (-23.5505, -46.6333), 'seattle': (47.6062, -122.3321), 'seoul': (37.5665, 126.978),
+    'singapore': (1.3521, 103.8198), 'stockholm': (59.3293, 18.0686), 'sydney': (-33.8688, 151.2093),
+    'taipei': (25.033, 121.5654), 'tokyo': (35.6762, 139.6503), 'toronto': (43.6532, -79.3832),
+    'vancouver': (49.2827, -123.1207), 'venice': (45.4408, 12.3155), 'vienna': (48.2082, 16.3738),
+    'washington': (38.9072, -77.0369), 'zurich': (47.3769, 8.5417),
+}
+
+
+def normalize_address(text: str) -> str:
+    """Cache key for an address: case-folded, whitespace and comma spacing collapsed."""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = re.sub(r'\s*,\s*', ', ', text)
+    return re.sub(r'\s+', ' ', text).strip(' ,.;')
+
+
+def _fold(text: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+class GazetteerGeocoder:
+    """Resolve an address to the centre of the first known city in it, scanning from the end."""
+    name = 'gazetteer'
+    precision = 'city'
+
+    def __init__(self, path: str | None = GAZETTEER_PATH):
+        self.places = dict(CITIES)
+        if path:
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    if len(row) >= 3 and not row[0].startswith('#'):
+                        self.places[_fold(normalize_address(row[0]))] = (float(row[1]), float(row[2]))
+
+    def geocode(self, query: str):
+        for part in reversed(_fold(normalize_address(query)).split(',')):
+            # drop postal codes and house numbers: "75004 paris" -> "paris"
+            name = re.sub(r'\s+', ' ', re.sub(r'\S*\d\S*', ' ', part)).strip()
+            if name in self.places:
+                return self.places[name]
+        return None
+
+
+class NominatimGeocoder:
+    name = 'nominatim'
+    precision = 'address'
+
+    def __init__(self, url: str = GEOCODER_URL, min_interval: float = MIN_INTERVAL):
+        self.url = url
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def geocode(self, query: str):
+        with self._lock:
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_at = time.monotonic() + self.min_interval
+        req = Request(f'{self.url}?{urlencode({"q": query, "format": "json", "limit": 1})}',
+                      headers={'User-Agent': USER_AGENT})
+        with urlopen(req, timeout=TIMEOUT) as response:
+            results = jsoncodec.loads(response.read())
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+
+def load_geocoder(spec: str = GEOCODER):
+    if spec == 'none':
+        return None
+    if spec == 'gazetteer':
+        return GazetteerGeocoder()
+    if spec == 'nominatim':
+        return NominatimGeocoder()
+    module, _, cls = spec.partition(':')
+    return getattr(importlib.import_module(module), cls)()
+
+
+geocoder = load_geocoder()
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    # created lazily per process: threads don't survive gunicorn's fork
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix='geocode')
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _lookup(query: str):
+    """(lat, lng), None for a miss, or False if the geocoder failed (not cached)."""
+    try:
+        return geocoder.geocode(query)
+    except Exception as e:
+        print(f'Geocoding failed for {query!r}: {e}')
+        return False
+
+
+def _store_late(key: str):
+    def store(future):
+        result = future.result()
+        if result is not False:
+            tp_db.put_geocodes({key: result}, geocoder.name)
+    return store
+
+
+def _query(activity, place: str) -> str | None:
+    if normalize_address(activity.address) not in _PLACEHOLDERS:
+        return activity.address
+    if normalize_address(activity.location) not in _PLACEHOLDERS:
+        return f'{activity.location}, {place}' if place else activity.location
+    return None
+
+
+def _coarser(current: str | None, precision: str) -> bool:
+    """Whether coordinates of precision current should be replaced by a geocoder of precision."""
+    if current is None:
+        # set by the client
+        return False
+    rank = {p: i for i, p in enumerate(PRECISIONS)}
+    return rank.get(current, -1) < rank.get(precision, len(PRECISIONS))
+
+
+def geocode_itinerary(itinerary) -> int:
+    """Set lat/lng on the itinerary's activities that lack them; returns how many it located."""
+    if geocoder is None:
+        return 0
+    place = str(itinerary.destination_info.get('name') or itinerary.destination or '')
+    precision = getattr(geocoder, 'precision', 'address')
+    pending = {}
+    for day in itinerary.days:
+        for activity in day.activities:
+            if isinstance(activity, str):
+                # a bare name from an older trip: nowhere to put coordinates
+                continue
+            if activity.lat is not None and activity.lng is not None and not _coarser(activity.geo_precision, precision):
+                continue
+            query = _query(activity, place)
+            if query:
+                pending.setdefault(normalize_address(query), (query, []))[1].append(activity)
+    if not pending:
+        return 0
+
+    found = tp_db.get_geocodes(list(pending), NEGATIVE_TTL, geocoder.name)
+    missing = [key for key in pending if key not in found][:MAX_LOOKUPS]
+    if missing:
+        if isinstance(geocoder, GazetteerGeocoder):
+            # in-memory lookups: no point handing them to threads
+            fresh = {key: _lookup(pending[key][0]) for key in missing}
+        else:
+            futures = {_executor().submit(_lookup, pending[key][0]): key for key in missing}
+            done, late = wait(futures, timeout=TIMEOUT)
+            fresh = {futures[f]: f.result() for f in done}
+            for f in late:
+                f.add_done_callback(_store_late(futures[f]))
+        fresh = {key: coords for key, coords in fresh.items() if coords is not False}
+        tp_db.put_geocodes(fresh, geocoder.name)
+        found.update(fresh)
+
+    located = 0
+    for key, (_, activities) in pending.items():
+        coords = found.get(key)
+        if coords:
+            for activity in activities:
+                activity.lat, activity.lng = coords
+                activity.geo_precision, activity.geo_source = precision, geocoder.name
+                located += 1
+    return located
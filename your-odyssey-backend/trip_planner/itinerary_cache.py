@@ -0,0 +1,74 @@
+"""Cache of generated itineraries, keyed by normalized request parameters.
+
+Requests that differ only in case or spacing ("paris " vs "Paris") share an
+entry. Fallback itineraries (returned when Gemini fails) are never cached.
+Entries expire after CACHE_TTL seconds; trip_planner.warmer refreshes the
+popular ones before that happens.
+"""
+import os
+import hashlib
+from typing import Any, Dict
+
+from trip_planner import db as tp_db
+from trip_planner import costs
+from trip_planner import geocode
+from trip_planner import jsoncodec
+
+CACHE_TTL = int(os.getenv('ITINERARY_CACHE_TTL', str(7 * 24 * 3600)))
+
+
+def _clean(value) -> str:
+    return ' '.join(str(value or '').split())
+
+
+def normalize(destination: str, duration: int, preferences: str, budget: str,
+              departure_location: str = '') -> Dict[str, Any]:
+    """Request parameters in the canonical form used for cache keys and request counts."""
+    return {
+        'destination': _clean(destination),
+        'duration': int(duration),
+        'budget': _clean(budget).lower() or 'moderate',
+        'preferences': _clean(preferences).lower(),
+        'departure_location': _clean(departure_location),
+    }
+
+
+def cache_key(params: Dict[str, Any]) -> str:
+    folded = [params['destination'].casefold(), params['duration'], params['budget'], params['preferences'],
+              params['departure_location'].casefold()]
+    return hashlib.sha1(jsoncodec.dumps_bytes(folded)).hexdigest()
+
+
+def lookup(params: Dict[str, Any]) -> str | None:
+    return tp_db.get_cached_itinerary(cache_key(params))
+
+
+def record_request(params: Dict[str, Any]) -> None:
+    tp_db.record_itinerary_request(cache_key(params), params)
+
+
+def generate(agent, params: Dict[str, Any], source: str = 'request') -> str:
+    """Generate an itinerary with Gemini and cache it; raises if generation fails."""
+    itinerary = agent.generate_itinerary(params['destination'], params['duration'], params['preferences'],
+                                         params['budget'], params['departure_location'], allow_fallback=False)
+    geocode.geocode_itinerary(itinerary)
+    costs.price_itinerary(itinerary)
+    itinerary_json = jsoncodec.dumps(itinerary)
+    tp_db.put_cached_itinerary(cache_key(params), params, itinerary_json, CACHE_TTL, source)
+    return itinerary_json
+
+
+def get_or_generate(agent, params: Dict[str, Any]) -> tuple[str, str]:
+    """Return (itinerary_json, status) where status is 'hit', 'miss' or 'fallback'."""
+    cached = lookup(params)
+    if cached is not None:
+        return cached, 'hit'
+    try:
+        return generate(agent, params), 'miss'
+    except Exception:
+        fallback = agent._create_fallback_full_itinerary(params['destination'], params['duration'],
+                                                         params['preferences'], params['budget'],
+                                                         params['departure_location'])
+        geocode.geocode_itinerary(fallback)
+        costs.price_itinerary(fallback)
+        return jsoncodec.dumps(fallback), 'fallback'
@@ -0,0 +1,150 @@
+"""JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7386) for parsed JSON documents.
+
+Both apply functions return the patched document and leave their arguments
+untouched, so a failed patch never leaves a half-applied itinerary behind.
+diff() goes the other way: the JSON Patch that turns one document into another.
+"""
+import copy
+
+_OPS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+
+class PatchError(ValueError):
+    """Raised when a patch is malformed or can't be applied to the document."""
+
+
+def _pointer(path) -> list:
+    if not isinstance(path, str) or (path and not path.startswith('/')):
+        raise PatchError(f'invalid JSON pointer {path!r}')
+    return [p.replace('~1', '/').replace('~0', '~') for p in path.split('/')[1:]]
+
+
+def _index(container: list, token: str, path: str, append: bool = False) -> int:
+    if append and token == '-':
+        return len(container)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise PatchError(f'{path}: invalid array index {token!r}')
+    i = int(token)
+    if i > len(container) or (i == len(container) and not append):
+        raise PatchError(f'{path}: index {i} out of range')
+    return i
+
+
+def _resolve(doc, tokens: list, path: str):
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f'{path}: no such member {token!r}')
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token, path)]
+        else:
+            raise PatchError(f'{path}: cannot descend into a {type(doc).__name__}')
+    return doc
+
+
+def _add(doc, tokens: list, value, path: str):
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1], path)
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], path, append=True), value)
+    else:
+        raise PatchError(f'{path}: cannot add to a {type(parent).__name__}')
+    return doc
+
+
+def _remove(doc, tokens: list, path: str):
+    if not tokens:
+        raise PatchError('cannot remove the whole document')
+    parent = _resolve(doc, tokens[:-1], path)
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise PatchError(f'{path}: no such member {tokens[-1]!r}')
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, tokens[-1], path))
+    raise PatchError(f'{path}: cannot remove from a {type(parent).__name__}')
+
+
+def apply_json_patch(doc, operations):
+    """Apply a list of RFC 6902 operations; all succeed or PatchError is raised."""
+    if not isinstance(operations, list):
+        raise PatchError('a JSON Patch must be an array of operations')
+    doc = copy.deepcopy(doc)
+    for n, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get('op') not in _OPS:
+            raise PatchError(f'operation {n}: op must be one of {", ".join(_OPS)}')
+        path = op.get('path')
+        tokens = _pointer(path)
+        if op['op'] in ('add', 'replace', 'test') and 'value' not in op:
+            raise PatchError(f'operation {n}: missing value')
+        if op['op'] == 'add':
+            doc = _add(doc, tokens, copy.deepcopy(op['value']), path)
+        elif op['op'] == 'remove':
+            _remove(doc, tokens, path)
+        elif op['op'] == 'replace':
+            _resolve(doc, tokens, path)
+            if tokens:
+                _remove(doc, tokens, path)
+            doc = _add(doc, tokens, copy.deepcopy(op['value']), path)
+        elif op['op'] == 'test':
+            if _resolve(doc, tokens, path) != op['value']:
+                raise PatchError(f'operation {n}: test failed at {path}')
+        else:
+            source = _pointer(op.get('from'))
+            if op['op'] == 'move':
+                if tokens[:len(source)] == source and tokens != source:
+                    raise PatchError(f'operation {n}: cannot move {op["from"]} into itself')
+                value = _remove(doc, source, op['from'])
+            else:
+                value = copy.deepcopy(_resolve(doc, source, op['from']))
+            doc = _add(doc, tokens, value, path)
+    return doc
+
+
+def apply_merge_patch(doc, patch):
+    """Apply an RFC 7386 merge patch: objects merge recursively, null deletes, anything else replaces."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(doc) if isinstance(doc, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def _escape(token) -> str:
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def diff(old, new, path: str = '') -> list:
+    """A JSON Patch that turns old into new: replace/add/remove operations only."""
+    if type(old) is not type(new):
+        return [{'op': 'replace', 'path': path, 'value': copy.deepcopy(new)}]
+    if isinstance(old, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+            else:
+                ops += diff(old[key], new[key], f'{path}/{_escape(key)}')
+        for key in new:
+            if key not in old:
+                ops.append({'op': 'add', 'path': f'{path}/{_escape(key)}', 'value': copy.deepcopy(new[key])})
+        return ops
+    if isinstance(old, list):
+        ops = []
+        for i in range(min(len(old), len(new))):
+            ops += diff(old[i], new[i], f'{path}/{i}')
+        for i in range(len(old), len(new)):
+            ops.append({'op': 'add', 'path': f'{path}/-', 'value': copy.deepcopy(new[i])})
+        # from the end, so the remaining indices stay valid
+        for i in range(len(old) - 1, len(new) - 1, -1):
+            ops.append({'op': 'remove', 'path': f'{path}/{i}'})
+        return ops
+    return [] if old == new else [{'op': 'replace', 'path': path, 'value': new}]
@@ -0,0 +1,49 @@
+import json
+import dataclasses
+from datetime import date, datetime
+
+# orjson is optional: it is several times faster and serializes dataclasses
+# natively, but everything works with the stdlib json module as well
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def _default(obj):
+    """Stdlib fallback for types orjson handles natively."""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        # shallow: the encoder calls back here for nested dataclasses, unlike asdict's deep copy
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps_bytes(obj, sort_keys: bool = False, indent: bool = False) -> bytes:
+    """Serialize obj (dicts, lists, dataclasses, datetimes) to compact UTF-8 JSON, or indented by 2 spaces."""
+    if orjson:
+        option = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0) | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    return dumps(obj, sort_keys, indent).encode('utf-8')
+
+
+def dumps(obj, sort_keys: bool = False, indent: bool = False) -> str:
+    if orjson:
+        return dumps_bytes(obj, sort_keys, indent).decode('utf-8')
+    return json.dumps(obj, default=_default, sort_keys=sort_keys, indent=2 if indent else None,
+                      separators=(',', ': ') if indent else (',', ':'), ensure_ascii=False)
+
+
+def loads(data):
+    """Parse JSON from str or bytes."""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+JSONDecodeError = orjson.JSONDecodeError if orjson else json.JSONDecodeError
@@ -0,0 +1,216 @@
+"""Itinerary models and the decoder that builds them from JSON data.
+
+The models are slotted dataclasses (no per-instance __dict__). Each class
+gets a decoder compiled once from its type hints. The decoder checks and
+converts a parsed JSON dict in a single walk, filling in defaults for
+missing fields. It works in two modes:
+
+- lenient (LLM output): scalars of the wrong type are coerced where that
+  makes sense ("4.5" -> 4.5, 3 -> "3").
+- strict (client payloads such as POST /saved_trips): a wrong type or an
+  unknown field raises ValidationError, so malformed data never reaches the
+  database and nothing the client sent is silently dropped.
+
+Older saved trips list activities as plain names. Lenient mode turns those
+into Activity(name=...); strict mode keeps them as strings, so a stored
+trip is not rewritten with placeholder details.
+"""
+import typing
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+from trip_planner import jsoncodec
+
+
+class ValidationError(ValueError):
+    """Raised when itinerary data doesn't match the models."""
+
+
+@dataclass(slots=True)
+class TransportationInfo:
+    departure_location: str = 'Unknown'
+    arrival_location: str = 'Unknown'
+    transport_type: str = 'Flight'
+    duration: str = 'Unknown'
+    estimated_cost: str = 'N/A'
+    booking_info: Optional[str] = None
+    tips: Optional[str] = None
+    # parsed from estimated_cost by trip_planner.costs
+    cost_min: Optional[float] = None
+    cost_max: Optional[float] = None
+    currency: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Activity:
+    name: str = 'Unknown Activity'
+    description: str = 'No description available'
+    location: str = 'Unknown location'
+    address: str = 'Address not available'
+    duration: str = '1 hour'
+    estimated_cost: str = 'Free'
+    category: str = 'general'
+    rating: Optional[float] = None
+    opening_hours: Optional[str] = None
+    tips: Optional[str] = None
+    phone: Optional[str] = None
+    website: Optional[str] = None
+    # filled in by trip_planner.geocode when the itinerary is generated or saved
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    # 'address' or 'city' (just the city centre), and the geocoder that found lat/lng
+    geo_precision: Optional[str] = None
+    geo_source: Optional[str] = None
+    # parsed from estimated_cost by trip_planner.costs
+    cost_min: Optional[float] = None
+    cost_max: Optional[float] = None
+    currency: Optional[str] = None
+
+
+@dataclass(slots=True)
+class DayPlan:
+    day: int = 1
+    date: str = ''
+    theme: str = 'Exploration'
+    # Activity, or a plain name in older trips decoded strictly (see decode)
+    activities: List[Activity] = field(default_factory=list)
+    total_estimated_cost: str = 'N/A'
+    transportation_notes: Optional[str] = None
+    # sums of the activities priced in the trip's currency (trip_planner.costs)
+    total_cost_min: Optional[float] = None
+    total_cost_max: Optional[float] = None
+
+    def __post_init__(self):
+        if not self.date:
+            self.date = f'Day {self.day}'
+
+
+@dataclass(slots=True)
+class TravelItinerary:
+    destination: str = 'Unknown'
+    duration: int = 0
+    outbound_transport: TransportationInfo = field(default_factory=TransportationInfo)
+    return_transport: TransportationInfo = field(default_factory=TransportationInfo)
+    days: List[DayPlan] = field(default_factory=list)
+    destination_info: Dict = field(default_factory=dict)
+    practical_info: Dict = field(default_factory=dict)
+    cost_summary: Dict = field(default_factory=dict)
+    cover_photo: Optional[str] = None
+
+
+def _fail(path: str, expected: str, value: Any):
+    raise ValidationError(f'{path or "itinerary"}: expected {expected}, got {type(value).__name__}')
+
+
+def _str(value, path, lenient):
+    if isinstance(value, str):
+        return value
+    if lenient and isinstance(value, (int, float)):
+        return str(value)
+    _fail(path, 'string', value)
+
+
+def _int(value, path, lenient):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if lenient:
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            pass
+    _fail(path, 'integer', value)
+
+
+def _float(value, path, lenient):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if lenient:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    _fail(path, 'number', value)
+
+
+def _dict(value, path, lenient):
+    if isinstance(value, dict):
+        return value
+    _fail(path, 'object', value)
+
+
+_SCALARS = {str: _str, int: _int, float: _float, dict: _dict, Dict: _dict}
+_compiled: Dict[type, Any] = {}
+
+
+def _field_decoder(tp):
+    """Build a (value, path, lenient) -> value function for one annotated type."""
+    origin = typing.get_origin(tp)
+    if origin is typing.Union:
+        # Optional[X]: None passes through, anything else decodes as X
+        inner = _field_decoder(next(a for a in typing.get_args(tp) if a is not type(None)))
+        return lambda v, path, lenient: None if v is None else inner(v, path, lenient)
+    if origin in (list, List):
+        item = _field_decoder(typing.get_args(tp)[0])
+
+        def decode_list(v, path, lenient):
+            if not isinstance(v, list):
+                _fail(path, 'array', v)
+            return [item(x, f'{path}[{i}]', lenient) for i, x in enumerate(v)]
+        return decode_list
+    if origin is dict:
+        return _dict
+    if tp in _SCALARS:
+        return _SCALARS[tp]
+    return lambda v, path, lenient: decode(tp, v, lenient, path)
+
+
+def _compile(cls):
+    hints = typing.get_type_hints(cls)
+    plan = [(f.name, _field_decoder(hints[f.name])) for f in fields(cls)]
+    _compiled[cls] = plan, frozenset(name for name, _ in plan)
+    return _compiled[cls]
+
+
+def decode(cls, data, lenient: bool = False, path: str = ''):
+    """Build a cls instance from parsed JSON data, validating as it goes."""
+    if cls is Activity and isinstance(data, str):
+        # older saved trips list activities as plain names
+        return Activity(name=data) if lenient else data
+    if not isinstance(data, dict):
+        if data is None and lenient:
+            data = {}
+        else:
+            _fail(path, 'object', data)
+    plan, known = _compiled.get(cls) or _compile(cls)
+    if not lenient and not known.issuperset(data):
+        name = next(k for k in data if k not in known)
+        raise ValidationError(f'{path + "." if path else ""}{name}: unknown field')
+    kwargs = {}
+    for name, decoder in plan:
+        value = data.get(name)
+        if value is not None:
+            value = decoder(value, f'{path}.{name}' if path else name, lenient)
+        # missing (or uncoercible) values fall back to the model's defaults
+        if value is not None:
+            kwargs[name] = value
+    return cls(**kwargs)
+
+
+def itinerary_from_llm(data) -> TravelItinerary:
+    """Decode the JSON object Gemini returns (see SimplifiedTravelAgent.generate_itinerary)."""
+    if not isinstance(data, dict):
+        _fail('', 'object', data)
+    itinerary = decode(TravelItinerary, data, lenient=True)
+    itinerary.destination = str(itinerary.destination_info.get('name') or 'Unknown')
+    itinerary.duration = len(itinerary.days)
+    return itinerary
+
+
+def decode_saved_itinerary(data) -> TravelItinerary:
+    """Strictly validate an itinerary payload sent by a client (str/bytes JSON or parsed)."""
+    if isinstance(data, (str, bytes)):
+        try:
+            data = jsoncodec.loads(data)
+        except ValueError as e:
+            raise ValidationError(f'itinerary: invalid JSON ({e})') from e
+    return decode(TravelItinerary, data)
@@ -0,0 +1,134 @@
+"""Write-behind logging of user queries into the UserQuery table.
+
+Handlers call log_query(), which only puts a record on a bounded in-memory
+queue. A background thread writes records in batches, one transaction per
+batch. It flushes when QUERY_LOG_BATCH_SIZE records are waiting or every
+QUERY_LOG_INTERVAL seconds, whichever comes first, so requests never wait
+on a database write.
+
+When the queue is full, log_query blocks for at most QUERY_LOG_BLOCK_TIMEOUT
+seconds. If there is still no room, it drops the record and counts it. Logs
+are analytics, so they should not stall the request path. Records still
+queued at exit are flushed.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from trip_planner import db as tp_db
+
+MAX_QUEUE = int(os.getenv('QUERY_LOG_MAX_QUEUE', '10000'))
+BATCH_SIZE = int(os.getenv('QUERY_LOG_BATCH_SIZE', '200'))
+INTERVAL = float(os.getenv('QUERY_LOG_INTERVAL', '2'))
+BLOCK_TIMEOUT = float(os.getenv('QUERY_LOG_BLOCK_TIMEOUT', '0.05'))
+
+_STOP = object()
+
+
+class WriteBehindLog:
+    def __init__(self, flush, max_queue: int = MAX_QUEUE, batch_size: int = BATCH_SIZE,
+                 interval: float = INTERVAL, block_timeout: float = BLOCK_TIMEOUT):
+        self.flush = flush
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.interval = interval
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _ensure_started(self):
+        # started lazily and per process: a thread started before a fork (gunicorn
+        # preload) does not exist in the child
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._thread = threading.Thread(target=self._run, name='query-log-writer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def enqueue(self, record) -> bool:
+        """Queue a record for writing; False if it had to be dropped."""
+        self._ensure_started()
+        try:
+            if self.block_timeout > 0:
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        q = self._queue
+        stopping = False
+        while not stopping:
+            first = q.get()
+            if first is _STOP:
+                break
+            # keep collecting until the batch is full or the interval since its first record is up
+            batch = [first]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            self.written += self.flush(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f'Query log: failed to write {len(batch)} records: {e}')
+
+    def close(self, timeout: float = 5.0):
+        """Write out everything queued so far and stop the writer thread."""
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        # anything the thread did not get to (or queued after the stop marker)
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        for i in range(0, len(leftover), self.batch_size):
+            self._write(leftover[i:i + self.batch_size])
+
+    def stats(self) -> dict:
+        return {'queued': self._queue.qsize() if self._queue else 0, 'written': self.written,
+                'dropped': self.dropped, 'failed': self.failed}
+
+
+writer = WriteBehindLog(tp_db.insert_user_queries)
+atexit.register(writer.close)
+
+
+def log_query(query_text: str, response_data) -> bool:
+    return writer.enqueue((query_text, response_data, datetime.utcnow()))
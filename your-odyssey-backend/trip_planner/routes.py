@@ -0,0 +1,162 @@
+"""Reorder each day's activities to shorten the walk between them.
+
+Needs coordinates on the activities (see trip_planner.geocode); days where
+any activity lacks them, or only has its city's centre (geo_precision
+'city'), are left as they are. All days of a trip are solved
+together. Each day is padded to the longest one, so every step below is one
+NumPy operation over the whole trip:
+
+1. one (days, n, n) haversine distance tensor;
+2. a nearest-neighbour tour for every day at once, kept only where it is
+   shorter than the original order;
+3. 2-opt from there, so a day never gets longer: each round scores every segment reversal of every day and applies
+   the best improving one per day, until no day improves.
+
+Routes are open paths. Each day gets a virtual start and end node. A fixed
+end is joined only to its activity, at zero cost. A free end is joined to
+every activity at zero cost. So keeping the first and/or last activity in
+place is just a different distance matrix, with no special cases in the
+search.
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371.0
+# cost of an edge that must never be used (a fixed endpoint joined to the wrong activity)
+_BLOCKED = 1e9
+_MIN_GAIN = 1e-9
+
+
+def haversine_matrix(lat, lng):
+    """Great-circle distances in km between all points, over the last axis: (..., n) -> (..., n, n)."""
+    lat, lng = np.radians(lat), np.radians(lng)
+    dlat = lat[..., :, None] - lat[..., None, :]
+    dlng = lng[..., :, None] - lng[..., None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[..., :, None] * np.cos(lat)[..., None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _coords(activity):
+    get = activity.get if isinstance(activity, dict) else lambda name: getattr(activity, name, None)
+    if get('geo_precision') == 'city':
+        # every activity in the city shares that point: nothing to optimize
+        return None, None
+    return get('lat'), get('lng')
+
+
+def _distances(points: list, fixed_first: bool, fixed_last: bool):
+    """(days, m, m) distances with node 0 the virtual start, 1..n the activities, n + 1 the virtual end."""
+    sizes = np.array([len(p) for p in points])
+    m = sizes.max() + 2
+    lat = np.zeros((len(points), m))
+    lng = np.zeros((len(points), m))
+    for k, day in enumerate(points):
+        lat[k, 1:len(day) + 1], lng[k, 1:len(day) + 1] = zip(*day)
+    dist = haversine_matrix(lat, lng)
+    for k, n in enumerate(sizes):
+        end = n + 1
+        dist[k, 0, :] = dist[k, :, 0] = _BLOCKED if fixed_first else 0.0
+        dist[k, end, :] = dist[k, :, end] = _BLOCKED if fixed_last else 0.0
+        dist[k, 0, 1] = dist[k, 1, 0] = 0.0
+        dist[k, end, n] = dist[k, n, end] = 0.0
+        if not fixed_first:
+            dist[k, 0, 1:end] = dist[k, 1:end, 0] = 0.0
+        if not fixed_last:
+            dist[k, end, 1:end] = dist[k, 1:end, end] = 0.0
+        dist[k, 0, end] = dist[k, end, 0] = _BLOCKED
+    return dist, sizes
+
+
+def _nearest_neighbour(dist, sizes, fixed_last: bool):
+    days, m, _ = dist.shape
+    rows = np.arange(days)
+    tours = np.zeros((days, m), dtype=np.intp)
+    visited = np.arange(m)[None, :] > sizes[:, None]  # padding and the virtual end
+    visited[:, 0] = True
+    if fixed_last:
+        # the last activity is placed right before the end, after the search
+        visited[rows, sizes] = True
+    current = np.zeros(days, dtype=np.intp)
+    for step in range(1, m - 1):
+        active = step <= sizes - (1 if fixed_last else 0)
+        candidates = np.where(visited, np.inf, dist[rows, current])
+        nxt = np.where(active, candidates.argmin(axis=1), 0)
+        tours[active, step] = nxt[active]
+        visited[rows[active], nxt[active]] = True
+        current = np.where(active, nxt, current)
+    if fixed_last:
+        tours[rows, sizes] = sizes
+    tours[rows, sizes + 1] = sizes + 1
+    return tours
+
+
+def _path_cost(dist, tours, sizes):
+    steps = np.arange(tours.shape[1] - 1)[None, :] <= sizes[:, None]
+    legs = dist[np.arange(len(tours))[:, None], tours[:, :-1], tours[:, 1:]]
+    return np.where(steps, legs, 0.0).sum(axis=1)
+
+
+def _two_opt(dist, tours, sizes, max_rounds: int = 1000):
+    days, m, _ = dist.shape
+    d = np.arange(days)[:, None]
+    positions = np.arange(1, m - 1)
+    # reversing tour[i..j] is allowed for 1 <= i < j <= n (the virtual ends never move)
+    valid = (positions[:, None] < positions[None, :])[None] & (positions[None, None, :] <= sizes[:, None, None])
+    for _ in range(max_rounds):
+        before, first, after = tours[:, :-2], tours[:, 1:-1], tours[:, 2:]
+        removed_in = dist[d, before, first]  # edge into position i
+        removed_out = dist[d, first, after]  # edge out of position j
+        added_in = dist[d[:, :, None], before[:, :, None], first[:, None, :]]
+        added_out = dist[d[:, :, None], first[:, :, None], after[:, None, :]]
+        gain = removed_in[:, :, None] + removed_out[:, None, :] - added_in - added_out
+        gain = np.where(valid, gain, -np.inf).reshape(days, -1)
+        best = gain.argmax(axis=1)
+        improving = np.flatnonzero(gain[np.arange(days), best] > _MIN_GAIN)
+        if not improving.size:
+            break
+        for k in improving:
+            i, j = divmod(best[k], m - 2)
+            tours[k, i + 1:j + 2] = tours[k, i + 1:j + 2][::-1].copy()
+    return tours
+
+
+def optimize_itinerary(itinerary, fixed_first: bool = True, fixed_last: bool = True) -> int:
+    """Reorder activities within each day of a TravelItinerary (or its JSON dict) in place.
+
+    fixed_first / fixed_last keep each day's first / last activity where it
+    is. Returns the number of days whose order changed.
+    """
+    if np is None:
+        raise RuntimeError('numpy is required for route optimization')
+    if isinstance(itinerary, dict):
+        day_lists = [day.get('activities') for day in itinerary.get('days') or [] if isinstance(day, dict)]
+    else:
+        day_lists = [day.activities for day in itinerary.days]
+
+    days, points = [], []
+    for activities in day_lists:
+        # fewer than two activities free to move: nothing to reorder
+        if not isinstance(activities, list) or len(activities) - fixed_first - fixed_last < 2:
+            continue
+        coords = [_coords(a) for a in activities]
+        if all(lat is not None and lng is not None for lat, lng in coords):
+            days.append(activities)
+            points.append(coords)
+    if not days:
+        return 0
+
+    dist, sizes = _distances(points, fixed_first, fixed_last)
+    nearest = _nearest_neighbour(dist, sizes, fixed_last)
+    positions = np.arange(dist.shape[1])[None, :]
+    original = np.where(positions <= sizes[:, None] + 1, positions, 0)
+    shorter = _path_cost(dist, nearest, sizes) < _path_cost(dist, original, sizes)
+    tours = _two_opt(dist, np.where(shorter[:, None], nearest, original), sizes)
+    changed = 0
+    for k, activities in enumerate(days):
+        order = tours[k, 1:sizes[k] + 1] - 1
+        if (order != np.arange(sizes[k])).any():
+            activities[:] = [activities[i] for i in order]
+            changed += 1
+    return changed
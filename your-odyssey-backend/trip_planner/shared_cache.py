@@ -0,0 +1,114 @@
+"""Key/value cache shared by every worker process, backed by a SQLite file.
+
+Each SharedCache is a namespace in one table of SHARED_CACHE_PATH (a separate
+file from the main database, in WAL mode, so cache writes never wait on app
+writes). Values are JSON. Each process also keeps hot entries in memory for
+local_ttl seconds, so very frequent reads (JWKS on every authenticated
+request) do not query SQLite every time.
+
+The itinerary cache itself lives in the main database (see
+trip_planner.itinerary_cache), which is already shared the same way.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from trip_planner import jsoncodec
+
+SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH',
+                              os.path.join(os.path.dirname(__file__), '..', 'cache.sqlite3'))
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def _get_conn():
+    conn = sqlite3.connect(SHARED_CACHE_PATH, timeout=5)
+    if SHARED_CACHE_PATH not in _initialized:
+        with _init_lock:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS shared_cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+            ''')
+            conn.commit()
+            _initialized.add(SHARED_CACHE_PATH)
+    return conn
+
+
+class SharedCache:
+    def __init__(self, namespace: str, ttl: float, local_ttl: float = 60):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            hit = self._local.get(key)
+        if hit and hit[1] > now:
+            return hit[0]
+        conn = _get_conn()
+        try:
+            row = conn.execute('SELECT value, expires_at FROM shared_cache WHERE namespace = ? AND key = ? '
+                               'AND expires_at > ?', (self.namespace, key, now)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        value = jsoncodec.loads(row[0])
+        self._remember(key, value, min(row[1], now + self.local_ttl))
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        conn = _get_conn()
+        try:
+            conn.execute('INSERT OR REPLACE INTO shared_cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                         (self.namespace, key, jsoncodec.dumps_bytes(value), expires_at))
+            conn.commit()
+        finally:
+            conn.close()
+        self._remember(key, value, min(expires_at, now + self.local_ttl))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+        conn = _get_conn()
+        try:
+            conn.execute('DELETE FROM shared_cache WHERE namespace = ? AND key = ?', (self.namespace, key))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_or_set(self, key: str, compute, ttl: float | None = None):
+        """Return the cached value, computing and storing it with compute() on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value, ttl)
+        return value
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._local[key] = (value, expires_at)
+
+
+def purge_expired() -> int:
+    conn = _get_conn()
+    try:
+        deleted = conn.execute('DELETE FROM shared_cache WHERE expires_at <= ?', (time.time(),)).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return deleted
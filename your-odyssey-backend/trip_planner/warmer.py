@@ -0,0 +1,126 @@
+"""Pre-generate popular itineraries into the itinerary cache during off-peak hours.
+
+Candidates are the most requested (destination, duration, budget, ...)
+combinations recorded by /generate_itinerary, followed by the curated
+destinations crossed with common durations and budgets. Only entries that
+are missing or expire within REFRESH_MARGIN seconds are regenerated, with at
+most CONCURRENCY Gemini calls in flight. Each call also takes one of the
+shared admission slots, so warming stays under LLM_MAX_CONCURRENCY together
+with live traffic; an item that can't get a slot in time fails and is
+retried on the next run.
+
+Run it from cron with scripts/warm_cache.py, or set ENABLE_CACHE_WARMER=1 to
+start a scheduler thread in the Flask process.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from trip_planner import admission
+from trip_planner import db as tp_db
+from trip_planner import itinerary_cache
+
+# the destinations vacation_planner_web/trip_planner/agent_functions.py has curated data for
+POPULAR_DESTINATIONS = ('Paris', 'Tokyo', 'Rome', 'London', 'Barcelona', 'Bali', 'Bangkok', 'New York')
+# the planning form's duration options up to a week, its budget options and its default style
+WARM_DURATIONS = (3, 5, 7)
+WARM_BUDGETS = ('budget', 'moderate', 'luxury')
+WARM_PREFERENCES = 'mix of everything'
+
+CONCURRENCY = int(os.getenv('CACHE_WARMER_CONCURRENCY', '2'))
+MAX_PER_RUN = int(os.getenv('CACHE_WARMER_MAX_PER_RUN', '100'))
+TOP_REQUESTED = int(os.getenv('CACHE_WARMER_TOP_REQUESTED', '30'))
+REFRESH_MARGIN = int(os.getenv('CACHE_WARMER_REFRESH_MARGIN', str(24 * 3600)))
+# off-peak window in UTC hours, start inclusive and end exclusive; may wrap midnight (e.g. "22-4")
+OFF_PEAK_HOURS = os.getenv('CACHE_WARMER_HOURS', '2-6')
+CHECK_INTERVAL = int(os.getenv('CACHE_WARMER_CHECK_INTERVAL', '600'))
+
+
+def candidates(top_requested: int = TOP_REQUESTED) -> List[Dict[str, Any]]:
+    """Parameter sets worth keeping warm, in priority order, without duplicates."""
+    params = [{k: row[k] for k in ('destination', 'duration', 'budget', 'preferences', 'departure_location')}
+              for row in tp_db.popular_itinerary_requests(limit=top_requested)] if top_requested else []
+    params += [itinerary_cache.normalize(dest, duration, WARM_PREFERENCES, budget)
+               for dest in POPULAR_DESTINATIONS for duration in WARM_DURATIONS for budget in WARM_BUDGETS]
+    seen = set()
+    unique = []
+    for p in params:
+        key = itinerary_cache.cache_key(p)
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
+
+
+def stale(params: List[Dict[str, Any]], refresh_margin: int = REFRESH_MARGIN) -> List[Dict[str, Any]]:
+    """The subset of params that is not cached or expires within refresh_margin seconds."""
+    expiries = tp_db.get_cache_expiries([itinerary_cache.cache_key(p) for p in params])
+    cutoff = (datetime.utcnow() + timedelta(seconds=refresh_margin)).isoformat()
+    return [p for p in params if expiries.get(itinerary_cache.cache_key(p), '') <= cutoff]
+
+
+def _generate(agent, params: Dict[str, Any]) -> str:
+    with admission.llm_slot():
+        return itinerary_cache.generate(agent, params, 'warmer')
+
+
+def warm(agent, max_items: int = MAX_PER_RUN, concurrency: int = CONCURRENCY,
+         refresh_margin: int = REFRESH_MARGIN, top_requested: int = TOP_REQUESTED) -> Dict[str, int]:
+    """Regenerate stale popular itineraries; returns counts for logging."""
+    all_params = candidates(top_requested)
+    todo = stale(all_params, refresh_margin)[:max_items]
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(_generate, agent, p) for p in todo]
+        for p, future in zip(todo, futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Cache warmer: failed for {p['destination']} ({p['duration']} days, {p['budget']}): {e}")
+    tp_db.purge_expired_itineraries()
+    return {'candidates': len(all_params), 'stale': len(todo), 'warmed': len(todo) - failed, 'failed': failed}
+
+
+def in_off_peak(now: datetime, hours: str = OFF_PEAK_HOURS) -> bool:
+    start, end = (int(h) for h in hours.split('-'))
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def run_scheduled(agent, now: datetime | None = None) -> Dict[str, int] | None:
+    """Warm once per day inside the off-peak window; None if it's not time or another process claimed the run."""
+    now = now or datetime.utcnow()
+    if not in_off_peak(now):
+        return None
+    # a window that wraps midnight belongs to the day it started on
+    start = int(OFF_PEAK_HOURS.split('-')[0])
+    run_key = (now - timedelta(days=1) if now.hour < start else now).date().isoformat()
+    if not tp_db.claim_warmer_run(run_key):
+        return None
+    stats = {'warmed': 0, 'failed': 0}
+    try:
+        stats = warm(agent)
+        print(f'Cache warmer: {stats}')
+        return stats
+    finally:
+        tp_db.finish_warmer_run(run_key, stats['warmed'], stats['failed'])
+
+
+def start_scheduler(agent) -> threading.Thread:
+    """Start a daemon thread that calls run_scheduled every CHECK_INTERVAL seconds."""
+    def loop():
+        while True:
+            try:
+                run_scheduled(agent)
+            except Exception as e:
+                print(f'Cache warmer error: {e}')
+            time.sleep(CHECK_INTERVAL)
+
+    thread = threading.Thread(target=loop, name='itinerary-cache-warmer', daemon=True)
+    thread.start()
+    return thread